@@ -3,7 +3,7 @@ from app.models import db
 from flask_login import LoginManager, current_user
 from app.models import Empresa, Asistencia, Usuario, AuditLog, HorarioEmpleado
 import os
-from zoneinfo import ZoneInfo
+import tempfile
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 
@@ -34,6 +34,64 @@ def create_app():
     app.config['TEMPLATES_AUTO_RELOAD'] = True
     app.config['EXPLAIN_TEMPLATE_LOADING'] = True
 
+    # segundos que vive el snapshot del dashboard por empresa
+    app.config['DASHBOARD_CACHE_TTL'] = int(
+        os.getenv("DASHBOARD_CACHE_TTL", "30")
+    )
+
+    # cálculo del reporte mensual: "rollup" (tabla diaria),
+    # "columnar" (fichajes crudos emparejados con NumPy) o
+    # "streaming" (fichajes crudos con cursor del servidor)
+    app.config['REPORTE_MENSUAL_MODO'] = os.getenv(
+        "REPORTE_MENSUAL_MODO", "rollup"
+    )
+
+    # exportaciones en segundo plano: carpeta local, segundos
+    # que se conserva cada archivo y procesos del pool
+    app.config['EXPORT_DIR'] = os.getenv(
+        "EXPORT_DIR",
+        os.path.join(tempfile.gettempdir(), "ontimecheck_exports")
+    )
+    app.config['EXPORT_TTL'] = int(os.getenv("EXPORT_TTL", "3600"))
+    app.config['EXPORT_WORKERS'] = int(os.getenv("EXPORT_WORKERS", "2"))
+
+    # cache de reportes por versión de datos: período en
+    # curso y períodos ya cerrados
+    app.config['REPORTE_CACHE_TTL'] = int(
+        os.getenv("REPORTE_CACHE_TTL", "300")
+    )
+    app.config['REPORTE_CACHE_TTL_CERRADO'] = int(
+        os.getenv("REPORTE_CACHE_TTL_CERRADO", "3600")
+    )
+
+    # streams SSE abiertos a la vez por proceso (cada uno
+    # ocupa un thread): por defecto la mitad de los threads
+    app.config['PRESENCIA_MAX_STREAMS'] = int(os.getenv(
+        "PRESENCIA_MAX_STREAMS",
+        str(int(os.getenv("GUNICORN_THREADS", "32")) // 2)
+    ))
+
+    # instrumentación SQL por request: off / header / on
+    app.config['SQL_INSTRUMENTACION'] = os.getenv("SQL_INSTRUMENTACION", "off")
+    app.config['SQL_N1_UMBRAL'] = int(os.getenv("SQL_N1_UMBRAL", "5"))
+
+    # auditoría: "async" (cola + inserts en lote desde un
+    # thread) o "sync" (insert + commit en el request, tests);
+    # tamaño de lote, segundos máximos de espera y tope de cola
+    app.config['AUDIT_MODO'] = os.getenv("AUDIT_MODO", "async")
+    app.config['AUDIT_LOTE'] = int(os.getenv("AUDIT_LOTE", "200"))
+    app.config['AUDIT_INTERVALO'] = float(os.getenv("AUDIT_INTERVALO", "1.0"))
+    app.config['AUDIT_COLA_MAX'] = int(os.getenv("AUDIT_COLA_MAX", "10000"))
+
+    # audit_log particionada por mes: las particiones más
+    # viejas que AUDIT_RETENCION_MESES se exportan a JSONL.gz
+    # en AUDIT_ARCHIVO_DIR (flask auditoria archivar)
+    app.config['AUDIT_RETENCION_MESES'] = int(os.getenv("AUDIT_RETENCION_MESES", "12"))
+    app.config['AUDIT_ARCHIVO_DIR'] = os.getenv(
+        "AUDIT_ARCHIVO_DIR",
+        os.path.join(app.instance_path, "auditoria_archivo")
+    )
+
     db.init_app(app)
     login_manager.init_app(app)
 
@@ -50,14 +108,18 @@ def create_app():
         cursor.close()
 
     # ==========================================
-    # 🕒 FILTRO GLOBAL HORA ARGENTINA (CLAVE)
+    # 🕒 FILTRO GLOBAL HORA LOCAL DE LA EMPRESA
     # ==========================================
-    def convertir_a_argentina(fecha):
+    from app.services.calendario_service import zona_empresa
+
+    def convertir_a_hora_local(fecha):
         if fecha is None:
             return ""
-        return fecha.astimezone(ZoneInfo("America/Argentina/Buenos_Aires"))
+        return fecha.astimezone(zona_empresa())
 
-    app.jinja_env.filters['hora_ar'] = convertir_a_argentina
+    # 'hora_ar' se mantiene por compatibilidad con los templates
+    app.jinja_env.filters['hora_ar'] = convertir_a_hora_local
+    app.jinja_env.filters['hora_local'] = convertir_a_hora_local
 
     # -------------------------------------------------------------------------------------------------------
     from app.routes.empleados import empleados_bp
@@ -105,10 +167,21 @@ def create_app():
     from app.routes.puestos import puestos_bp
     app.register_blueprint(puestos_bp)
 
+    from app.routes.presencia import presencia_bp
+    app.register_blueprint(presencia_bp)
+
+    from app.routes.cierres import cierres_bp
+    app.register_blueprint(cierres_bp)
+
     # -------------------------------------------------------------------------------------------------------
-    # 🔑 CREAR TABLAS SI NO EXISTEN
-    with app.app_context():
-        db.create_all()
+    # 🔑 ESQUEMA: migraciones versionadas, fuera del arranque
+    #    flask --app "run:create_app()" migraciones aplicar
+    from app.migraciones import migraciones_cli
+    app.cli.add_command(migraciones_cli)
+
+    #    flask --app "run:create_app()" auditoria particiones | archivar
+    from app.services.particiones_auditoria import auditoria_cli
+    app.cli.add_command(auditoria_cli)
 
 
 
@@ -122,6 +195,27 @@ def create_app():
         else:
             g.empresa = None
 
+    # ==========================================
+    # CAMBIOS DE FICHAJES ENTRE PROCESOS (NOTIFY)
+    # ==========================================
+    from app.services.presencia_hub import iniciar_listener
+
+    @app.before_request
+    def escuchar_cambios():
+        iniciar_listener(app)
+
+    # ==========================================
+    # CONSULTAS POR REQUEST / N+1 (OPT-IN)
+    # ==========================================
+    from app.services.instrumentacion_sql import instalar_instrumentacion_sql
+    instalar_instrumentacion_sql(app)
+
+    # ==========================================
+    # AUDITORÍA EN LOTE (THREAD POR PROCESO)
+    # ==========================================
+    from app.audit import iniciar_auditoria
+    iniciar_auditoria(app)
+
     # ==============================
     # PAGINA 403 PERSONALIZADA
     # ==============================
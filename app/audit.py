@@ -1,4 +1,11 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
 from app.models import db, AuditLog
+from flask import current_app
 from flask_login import current_user
 from app.security import obtener_ip_cliente
 
@@ -6,23 +13,198 @@ from app.security import obtener_ip_cliente
 def registrar_evento(accion, descripcion=None, entidad="SISTEMA"):
     """
     Guarda un evento de auditoría del sistemaaaa
+
+    En modo "async" (por defecto) el evento se encola y lo
+    inserta en lote el thread de auditoría; en modo "sync"
+    se inserta y commitea acá mismo (también con TESTING).
     """
 
     try:
         if not current_user.is_authenticated:
             return
 
-        evento = AuditLog(
-            empresa_id=current_user.empresa_id,
-            usuario_id=current_user.id,
-            accion=accion,
-            entidad=entidad,   # 🔥 AHORA SI
-            descripcion=descripcion,
-            ip=obtener_ip_cliente()
-        )
+        evento = {
+            "empresa_id": current_user.empresa_id,
+            "usuario_id": current_user.id,
+            "accion": accion,
+            "entidad": entidad,   # 🔥 AHORA SI
+            "descripcion": descripcion,
+            "ip": obtener_ip_cliente(),
+            # hora del evento, no la del insert en lote
+            "created_at": datetime.now(timezone.utc)
+        }
+
+        if escritor.activo and not current_app.testing:
+            escritor.encolar(evento)
+            return
 
-        db.session.add(evento)
+        db.session.add(AuditLog(**evento))
         db.session.commit()
 
     except Exception as e:
         print("ERROR AUDITORIA:", e)
+
+
+# =====================================================
+# EVENTOS DIFERIDOS HASTA EL COMMIT
+# =====================================================
+_CLAVE_DIFERIDOS = "auditoria_diferida"
+
+
+def registrar_evento_diferido(accion, descripcion=None, entidad="SISTEMA"):
+
+    """
+    Como registrar_evento, pero el evento se registra recién
+    cuando la transacción en curso se confirma (ver
+    registrar_eventos_diferidos). Si no se confirma, se
+    descarta con la sesión del request.
+    """
+
+    db.session.info.setdefault(_CLAVE_DIFERIDOS, []).append(
+        (accion, descripcion, entidad)
+    )
+
+
+def registrar_eventos_diferidos():
+
+    for accion, descripcion, entidad in db.session.info.pop(_CLAVE_DIFERIDOS, []):
+        registrar_evento(accion, descripcion, entidad)
+
+
+# =====================================================
+# ESCRITOR EN LOTE (UN THREAD POR PROCESO)
+# =====================================================
+class EscritorAuditoria:
+
+    """
+    Cola en memoria + thread que inserta los eventos de a
+    lotes (un INSERT multi-fila y un commit por lote) cuando
+    se juntan AUDIT_LOTE eventos o pasan AUDIT_INTERVALO
+    segundos. Al terminar el proceso vacía lo pendiente.
+    """
+
+    def __init__(self):
+        self.activo = False
+        self._app = None
+        self._cola = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+
+    def configurar(self, app):
+
+        self._app = app
+        self.lote = app.config.get("AUDIT_LOTE", 200)
+        self.intervalo = app.config.get("AUDIT_INTERVALO", 1.0)
+        self._cola = queue.Queue(maxsize=app.config.get("AUDIT_COLA_MAX", 10000))
+
+        self.activo = app.config.get("AUDIT_MODO", "async") == "async"
+
+        if self.activo:
+            atexit.register(self.detener)
+
+    def encolar(self, evento):
+
+        self._asegurar_thread()
+
+        try:
+            self._cola.put_nowait(evento)
+        except queue.Full:
+            # cola llena (base caída o muy lenta): se escribe directo
+            self._insertar([evento])
+
+    def _asegurar_thread(self):
+
+        # el thread se arranca en cada worker (después del fork)
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._detener.clear()
+            self._thread = threading.Thread(
+                target=self._bucle,
+                name="auditoria-writer",
+                daemon=True
+            )
+            self._thread.start()
+
+    def _bucle(self):
+
+        while not self._detener.is_set():
+
+            lote = self._juntar_lote()
+
+            if lote:
+                self._insertar(lote)
+
+    def _juntar_lote(self):
+
+        try:
+            lote = [self._cola.get(timeout=self.intervalo)]
+        except queue.Empty:
+            return []
+
+        limite = time.monotonic() + self.intervalo
+
+        while len(lote) < self.lote:
+
+            restante = limite - time.monotonic()
+
+            if restante <= 0:
+                break
+
+            try:
+                lote.append(self._cola.get(timeout=restante))
+            except queue.Empty:
+                break
+
+        return lote
+
+    def _insertar(self, lote):
+
+        try:
+            with self._app.app_context():
+                db.session.execute(db.insert(AuditLog), lote)
+                db.session.commit()
+
+        except Exception as e:
+            print("ERROR AUDITORIA (lote de", len(lote), "eventos):", e)
+
+    def vaciar(self):
+
+        """
+        Inserta ya todo lo encolado (fin del proceso o tests).
+        """
+
+        pendientes = []
+
+        while True:
+            try:
+                pendientes.append(self._cola.get_nowait())
+            except queue.Empty:
+                break
+
+        for i in range(0, len(pendientes), self.lote):
+            self._insertar(pendientes[i:i + self.lote])
+
+    def detener(self):
+
+        self._detener.set()
+
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=self.intervalo + 5)
+
+        self.vaciar()
+
+
+escritor = EscritorAuditoria()
+
+
+def iniciar_auditoria(app):
+    escritor.configurar(app)
@@ -0,0 +1,177 @@
+import importlib
+import pkgutil
+import click
+from flask.cli import AppGroup
+from sqlalchemy import text
+from app.models import db
+
+
+# =====================================================
+# MIGRACIONES VERSIONADAS DEL ESQUEMA
+# =====================================================
+#
+# Cada módulo mNNNN_descripcion.py de este paquete define:
+#
+#   VERSION = "NNNN"
+#   DESCRIPCION = "..."
+#   def upgrade(conn): ...
+#
+# Se aplican en orden con `flask migraciones aplicar`
+# (fuera del arranque de la app) y quedan registradas
+# en la tabla schema_migracion.
+#
+# El motor soportado es PostgreSQL (producción y local):
+# las migraciones, el rollup y los reportes usan SQL
+# propio de PostgreSQL.
+
+# lock de PostgreSQL para que dos deploys no migren a la vez
+LOCK_MIGRACIONES = 48390001
+
+class ErrorMigracion(click.ClickException):
+
+    """
+    Una migración que no puede aplicarse con los datos
+    actuales: se revierte y no queda registrada, así el
+    próximo `aplicar` la reintenta.
+    """
+
+
+migraciones_cli = AppGroup(
+    "migraciones",
+    help="Migraciones del esquema de base de datos."
+)
+
+
+def listar_migraciones():
+
+    modulos = []
+
+    for info in pkgutil.iter_modules(__path__):
+
+        if not info.name.startswith("m"):
+            continue
+
+        modulos.append(
+            importlib.import_module(f"{__name__}.{info.name}")
+        )
+
+    return sorted(modulos, key=lambda m: m.VERSION)
+
+
+def _es_postgres(conn):
+    return conn.dialect.name == "postgresql"
+
+
+def _asegurar_tabla_versiones(conn):
+
+    conn.execute(text(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migracion (
+            version VARCHAR(20) PRIMARY KEY,
+            descripcion VARCHAR(200),
+            aplicada_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    ))
+
+
+def versiones_aplicadas(conn):
+
+    _asegurar_tabla_versiones(conn)
+
+    return {
+        fila[0]
+        for fila in conn.execute(text("SELECT version FROM schema_migracion"))
+    }
+
+
+def aplicar_migraciones(hasta=None):
+
+    """
+    Aplica las migraciones pendientes, cada una en su
+    propia transacción. Devuelve las versiones aplicadas.
+    """
+
+    aplicadas_ahora = []
+
+    with db.engine.connect() as lock_conn:
+
+        if not _es_postgres(lock_conn):
+            raise ErrorMigracion(
+                f"Motor no soportado: {lock_conn.dialect.name}. "
+                f"Las migraciones requieren PostgreSQL."
+            )
+
+        lock_conn.execute(
+            text("SELECT pg_advisory_lock(:k)"),
+            {"k": LOCK_MIGRACIONES}
+        )
+
+        try:
+
+            with db.engine.begin() as conn:
+                aplicadas = versiones_aplicadas(conn)
+
+            for migracion in listar_migraciones():
+
+                if migracion.VERSION in aplicadas:
+                    continue
+
+                if hasta and migracion.VERSION > hasta:
+                    break
+
+                with db.engine.begin() as conn:
+
+                    migracion.upgrade(conn)
+
+                    conn.execute(
+                        text(
+                            "INSERT INTO schema_migracion (version, descripcion) "
+                            "VALUES (:v, :d)"
+                        ),
+                        {"v": migracion.VERSION, "d": migracion.DESCRIPCION}
+                    )
+
+                aplicadas_ahora.append(migracion)
+
+        finally:
+
+            lock_conn.execute(
+                text("SELECT pg_advisory_unlock(:k)"),
+                {"k": LOCK_MIGRACIONES}
+            )
+            lock_conn.commit()
+
+    return aplicadas_ahora
+
+
+# =====================================================
+# COMANDOS CLI
+# =====================================================
+@migraciones_cli.command("aplicar")
+@click.option("--hasta", default=None, help="Última versión a aplicar.")
+def aplicar_command(hasta):
+
+    """Aplica las migraciones pendientes."""
+
+    aplicadas = aplicar_migraciones(hasta)
+
+    if not aplicadas:
+        click.echo("Esquema al día, nada para aplicar.")
+        return
+
+    for m in aplicadas:
+        click.echo(f"✔ {m.VERSION} {m.DESCRIPCION}")
+
+
+@migraciones_cli.command("estado")
+def estado_command():
+
+    """Lista las migraciones y si están aplicadas."""
+
+    with db.engine.begin() as conn:
+        aplicadas = versiones_aplicadas(conn)
+
+    for m in listar_migraciones():
+        marca = "✔" if m.VERSION in aplicadas else "·"
+        click.echo(f"{marca} {m.VERSION} {m.DESCRIPCION}")
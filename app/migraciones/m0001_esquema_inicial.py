@@ -0,0 +1,29 @@
+from app.models import db
+
+
+VERSION = "0001"
+DESCRIPCION = "Esquema inicial (tablas existentes)"
+
+TABLAS = [
+    "empresa",
+    "sucursal",
+    "puesto",
+    "empleado",
+    "asistencia",
+    "usuario",
+    "audit_log",
+    "horario_empleado",
+    "horario_bloque",
+    "kiosco",
+]
+
+
+def upgrade(conn):
+
+    # equivalente a lo que hacía db.create_all() al arrancar:
+    # en bases existentes no toca nada (checkfirst)
+    db.metadata.create_all(
+        bind=conn,
+        tables=[db.metadata.tables[t] for t in TABLAS],
+        checkfirst=True
+    )
@@ -0,0 +1,105 @@
+from sqlalchemy import text
+from app.migraciones import ErrorMigracion
+
+
+VERSION = "0002"
+DESCRIPCION = "Índices compuestos, parciales y únicos de consultas frecuentes"
+
+INDICES = [
+    # fichajes por empleado y rango (estado actual, reportes, secuencia)
+    """
+    CREATE INDEX IF NOT EXISTS ix_asistencia_empresa_empleado_fecha
+    ON asistencia (empresa_id, empleado_id, fecha_hora)
+    """,
+    # fichajes de la empresa por rango (dashboard, reporte diario)
+    """
+    CREATE INDEX IF NOT EXISTS ix_asistencia_empresa_fecha
+    ON asistencia (empresa_id, fecha_hora)
+    """,
+    # solo ingresos (pendientes del día, primer ingreso, llegada tarde)
+    """
+    CREATE INDEX IF NOT EXISTS ix_asistencia_ingresos
+    ON asistencia (empresa_id, empleado_id, fecha_hora)
+    WHERE tipo = 'INGRESO'
+    """,
+    # bloques de un horario
+    """
+    CREATE INDEX IF NOT EXISTS ix_horario_bloque_horario
+    ON horario_bloque (horario_id)
+    """,
+    # alertas de puntualidad / filtros por entidad
+    """
+    CREATE INDEX IF NOT EXISTS ix_audit_log_empresa_entidad_fecha
+    ON audit_log (empresa_id, entidad, created_at)
+    """,
+    # listado de auditoría por empresa
+    """
+    CREATE INDEX IF NOT EXISTS ix_audit_log_empresa_fecha
+    ON audit_log (empresa_id, created_at)
+    """,
+]
+
+# (nombre, tabla, columnas): índices únicos declarados en models.py
+UNICOS = [
+    ("uq_horario_empleado_fecha", "horario_empleado", "empleado_id, fecha"),
+    ("uq_empleado_empresa_dni", "empleado", "empresa_id, dni"),
+]
+
+
+def duplicados(conn, tabla, columnas, limite=20):
+
+    """
+    Claves repetidas (hasta `limite`) con su cantidad.
+    """
+
+    return conn.execute(text(
+        f"SELECT {columnas}, COUNT(*) FROM {tabla} "
+        f"GROUP BY {columnas} "
+        f"HAVING COUNT(*) > 1 "
+        f"ORDER BY COUNT(*) DESC "
+        f"LIMIT {limite}"
+    )).all()
+
+
+def crear_unicos(conn):
+
+    """
+    Crea los índices únicos de UNICOS. Si hay claves
+    repetidas la migración falla listándolas: el índice no
+    se degrada a no único (el esquema quedaría distinto de
+    los modelos para siempre).
+    """
+
+    problemas = []
+
+    for nombre, tabla, columnas in UNICOS:
+
+        repetidas = duplicados(conn, tabla, columnas)
+
+        if repetidas:
+            problemas.append(
+                f"{tabla} ({columnas}) → {nombre}:\n" + "\n".join(
+                    f"  {tuple(fila[:-1])} × {fila[-1]}"
+                    for fila in repetidas
+                )
+            )
+            continue
+
+        conn.execute(text(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {nombre} "
+            f"ON {tabla} ({columnas})"
+        ))
+
+    if problemas:
+        raise ErrorMigracion(
+            "Hay claves duplicadas; corregí los datos y volvé a aplicar:\n"
+            + "\n".join(problemas)
+        )
+
+
+def upgrade(conn):
+
+    for sql in INDICES:
+        conn.execute(text(sql))
+
+    crear_unicos(conn)
@@ -0,0 +1,19 @@
+from sqlalchemy import text
+from app.models import AsistenciaDiaria
+from app.services.rollup_service import reconstruir_rollup
+from app.services.calendario_service import TZ_DEFAULT
+
+
+VERSION = "0003"
+DESCRIPCION = "Rollup asistencia_diaria + carga inicial"
+
+
+def upgrade(conn):
+
+    AsistenciaDiaria.__table__.create(bind=conn, checkfirst=True)
+
+    empresas = conn.execute(text("SELECT id FROM empresa")).all()
+
+    for (empresa_id,) in empresas:
+        # zona fija: la columna empresa.zona_horaria llega en 0005
+        reconstruir_rollup(empresa_id, tz_nombre=TZ_DEFAULT, conn=conn)
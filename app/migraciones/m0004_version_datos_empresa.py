@@ -0,0 +1,22 @@
+from sqlalchemy import inspect, text
+
+
+VERSION = "0004"
+DESCRIPCION = "empresa.version_datos (versión de datos por empresa)"
+
+
+def upgrade(conn):
+
+    # en una base nueva la 0001 ya crea la tabla con la
+    # columna (create_all usa los modelos actuales)
+    columnas = {c["name"] for c in inspect(conn).get_columns("empresa")}
+
+    if "version_datos" in columnas:
+        return
+
+    conn.execute(text(
+        """
+        ALTER TABLE empresa
+        ADD COLUMN version_datos BIGINT NOT NULL DEFAULT 0
+        """
+    ))
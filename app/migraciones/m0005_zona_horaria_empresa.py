@@ -0,0 +1,23 @@
+from sqlalchemy import inspect, text
+
+
+VERSION = "0005"
+DESCRIPCION = "empresa.zona_horaria (zona horaria por empresa)"
+
+
+def upgrade(conn):
+
+    # en una base nueva la 0001 ya crea la tabla con la
+    # columna (create_all usa los modelos actuales)
+    columnas = {c["name"] for c in inspect(conn).get_columns("empresa")}
+
+    if "zona_horaria" in columnas:
+        return
+
+    conn.execute(text(
+        """
+        ALTER TABLE empresa
+        ADD COLUMN zona_horaria VARCHAR(64) NOT NULL
+        DEFAULT 'America/Argentina/Buenos_Aires'
+        """
+    ))
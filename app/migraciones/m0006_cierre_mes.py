@@ -0,0 +1,11 @@
+from app.models import CierreMes, CierreMesEmpleado, CierreMesBloque, AjusteCierre
+
+
+VERSION = "0006"
+DESCRIPCION = "Cierre de mes: snapshots por empleado, bloques y ajustes"
+
+
+def upgrade(conn):
+
+    for modelo in (CierreMes, CierreMesEmpleado, CierreMesBloque, AjusteCierre):
+        modelo.__table__.create(bind=conn, checkfirst=True)
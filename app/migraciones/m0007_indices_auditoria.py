@@ -0,0 +1,18 @@
+from sqlalchemy import text
+
+
+VERSION = "0007"
+DESCRIPCION = "Índice cubriente de audit_log para estadísticas agregadas"
+
+
+def upgrade(conn):
+
+    # GROUP BY accion / entidad / usuario / período sobre un
+    # rango de fechas sin leer la tabla (index-only scan)
+    conn.execute(text(
+        """
+        CREATE INDEX IF NOT EXISTS ix_audit_log_estadisticas
+        ON audit_log (empresa_id, created_at)
+        INCLUDE (accion, entidad, usuario_id)
+        """
+    ))
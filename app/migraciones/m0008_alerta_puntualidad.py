@@ -0,0 +1,10 @@
+from app.models import AlertaPuntualidad
+
+
+VERSION = "0008"
+DESCRIPCION = "alerta_puntualidad (una llegada tarde por empleado y día)"
+
+
+def upgrade(conn):
+
+    AlertaPuntualidad.__table__.create(bind=conn, checkfirst=True)
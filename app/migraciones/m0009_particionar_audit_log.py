@@ -0,0 +1,102 @@
+from datetime import timezone
+from sqlalchemy import text
+from app.services.particiones_auditoria import (
+    COLUMNAS,
+    DEFAULT,
+    asegurar_particiones,
+    es_particionada
+)
+
+
+VERSION = "0009"
+DESCRIPCION = "audit_log particionada por mes (created_at)"
+
+
+def upgrade(conn):
+
+    if es_particionada(conn):
+        return
+
+    # la tabla de m0001 pasa a ser la vieja; sus índices y
+    # su PK se renombran para liberar los nombres
+    conn.execute(text("ALTER TABLE audit_log RENAME TO audit_log_anterior"))
+    conn.execute(text("ALTER INDEX audit_log_pkey RENAME TO audit_log_anterior_pkey"))
+
+    for indice in (
+        "ix_audit_log_empresa_entidad_fecha",
+        "ix_audit_log_empresa_fecha",
+        "ix_audit_log_estadisticas"
+    ):
+        conn.execute(text(f"DROP INDEX IF EXISTS {indice}"))
+
+    secuencia = conn.execute(text(
+        "SELECT pg_get_serial_sequence('audit_log_anterior', 'id')"
+    )).scalar()
+
+    if not secuencia:
+        secuencia = "audit_log_id_seq"
+        conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {secuencia}"))
+        conn.execute(text(
+            f"SELECT setval('{secuencia}', "
+            f"COALESCE((SELECT MAX(id) FROM audit_log_anterior), 0) + 1, false)"
+        ))
+
+    # la PK de una tabla particionada incluye la clave de partición
+    conn.execute(text(
+        f"""
+        CREATE TABLE audit_log (
+            id INTEGER NOT NULL DEFAULT nextval('{secuencia}'),
+            empresa_id INTEGER NOT NULL REFERENCES empresa (id),
+            usuario_id INTEGER REFERENCES usuario (id),
+            accion VARCHAR(100) NOT NULL,
+            entidad VARCHAR(50) NOT NULL,
+            descripcion TEXT,
+            ip VARCHAR(50),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    ))
+
+    conn.execute(text(f"CREATE TABLE {DEFAULT} PARTITION OF audit_log DEFAULT"))
+
+    # una partición por mes desde el evento más viejo
+    primero = conn.execute(text(
+        "SELECT MIN(created_at) FROM audit_log_anterior"
+    )).scalar()
+
+    if primero:
+        primero = primero.astimezone(timezone.utc)
+
+    asegurar_particiones(
+        conn,
+        desde=(primero.year, primero.month) if primero else None
+    )
+
+    conn.execute(text(
+        f"""
+        INSERT INTO audit_log ({COLUMNAS})
+        SELECT {COLUMNAS} FROM audit_log_anterior
+        """
+    ))
+
+    conn.execute(text(f"ALTER SEQUENCE {secuencia} OWNED BY audit_log.id"))
+    conn.execute(text("DROP TABLE audit_log_anterior"))
+
+    # índices en la tabla padre: se crean en cada partición
+    conn.execute(text(
+        """
+        CREATE INDEX ix_audit_log_empresa_entidad_fecha
+        ON audit_log (empresa_id, entidad, created_at)
+        """
+    ))
+    conn.execute(text(
+        "CREATE INDEX ix_audit_log_empresa_fecha ON audit_log (empresa_id, created_at)"
+    ))
+    conn.execute(text(
+        """
+        CREATE INDEX ix_audit_log_estadisticas
+        ON audit_log (empresa_id, created_at)
+        INCLUDE (accion, entidad, usuario_id)
+        """
+    ))
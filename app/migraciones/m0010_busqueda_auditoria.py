@@ -0,0 +1,32 @@
+from sqlalchemy import text
+
+
+VERSION = "0010"
+DESCRIPCION = "Búsqueda de texto completo en audit_log (tsvector + GIN)"
+
+
+def upgrade(conn):
+
+    # 'simple': sin stemming, los nombres, emails y DNI
+    # se indexan tal cual (en minúsculas)
+    conn.execute(text(
+        """
+        ALTER TABLE audit_log
+        ADD COLUMN IF NOT EXISTS busqueda tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector(
+                'simple'::regconfig,
+                coalesce(accion, '') || ' ' ||
+                coalesce(entidad, '') || ' ' ||
+                coalesce(descripcion, '')
+            )
+        ) STORED
+        """
+    ))
+
+    conn.execute(text(
+        """
+        CREATE INDEX IF NOT EXISTS ix_audit_log_busqueda
+        ON audit_log USING gin (busqueda)
+        """
+    ))
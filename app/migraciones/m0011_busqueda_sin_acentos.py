@@ -0,0 +1,50 @@
+from sqlalchemy import text
+
+
+VERSION = "0011"
+DESCRIPCION = "Búsqueda de auditoría sin acentos (unaccent)"
+
+
+def upgrade(conn):
+
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+
+    # unaccent() es STABLE (depende del diccionario por
+    # defecto); con el diccionario fijo se puede declarar
+    # IMMUTABLE y usar en la columna generada
+    conn.execute(text(
+        """
+        CREATE OR REPLACE FUNCTION inmutable_unaccent(text)
+        RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """
+    ))
+
+    # la expresión de una columna generada no se puede
+    # cambiar: se recrea (y con ella el índice GIN)
+    conn.execute(text("ALTER TABLE audit_log DROP COLUMN IF EXISTS busqueda"))
+
+    conn.execute(text(
+        """
+        ALTER TABLE audit_log
+        ADD COLUMN busqueda tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector(
+                'simple'::regconfig,
+                inmutable_unaccent(
+                    coalesce(accion, '') || ' ' ||
+                    coalesce(entidad, '') || ' ' ||
+                    coalesce(descripcion, '')
+                )
+            )
+        ) STORED
+        """
+    ))
+
+    conn.execute(text(
+        """
+        CREATE INDEX IF NOT EXISTS ix_audit_log_busqueda
+        ON audit_log USING gin (busqueda)
+        """
+    ))
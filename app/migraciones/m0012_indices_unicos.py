@@ -0,0 +1,33 @@
+from sqlalchemy import text
+from app.migraciones.m0002_indices_consultas import UNICOS, crear_unicos
+
+
+VERSION = "0012"
+DESCRIPCION = "Índices únicos de empleado (DNI) y horario_empleado (fecha)"
+
+
+def _es_unico(conn, nombre):
+
+    return conn.execute(
+        text(
+            """
+            SELECT i.indisunique
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = :nombre
+            """
+        ),
+        {"nombre": nombre}
+    ).scalar()
+
+
+def upgrade(conn):
+
+    # bases donde la 0002 los creó como índices simples
+    # porque había duplicados: se vuelven a crear únicos
+    # (o la migración falla listando las claves repetidas)
+    for nombre, _, _ in UNICOS:
+        if _es_unico(conn, nombre) is False:
+            conn.execute(text(f"DROP INDEX IF EXISTS {nombre}"))
+
+    crear_unicos(conn)
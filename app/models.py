@@ -18,6 +18,20 @@ class Empresa(db.Model):
         db.DateTime(timezone=True),
         server_default=func.now()
     )
+    # zona horaria IANA de la empresa (días, reportes, turnos)
+    zona_horaria = db.Column(
+        db.String(64),
+        nullable=False,
+        default="America/Argentina/Buenos_Aires",
+        server_default="America/Argentina/Buenos_Aires"
+    )
+    # se incrementa con cada alta / edición / baja de fichajes
+    version_datos = db.Column(
+        db.BigInteger,
+        nullable=False,
+        default=0,
+        server_default="0"
+    )
     # 🔐 SEGURIDAD RED
     #ip_publica = db.Column(db.String(50), nullable=True)
     #ip_rango = db.Column(db.String(50), nullable=True)
@@ -125,6 +139,9 @@ class Puesto(db.Model):
 # =========================
 class Empleado(db.Model):
     __tablename__ = 'empleado'
+    __table_args__ = (
+        db.Index('uq_empleado_empresa_dni', 'empresa_id', 'dni', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     empresa_id = db.Column(
         db.Integer,
@@ -169,6 +186,18 @@ class Empleado(db.Model):
 # =========================
 class Asistencia(db.Model):
     __tablename__ = 'asistencia'
+    __table_args__ = (
+        db.Index(
+            'ix_asistencia_empresa_empleado_fecha',
+            'empresa_id', 'empleado_id', 'fecha_hora'
+        ),
+        db.Index('ix_asistencia_empresa_fecha', 'empresa_id', 'fecha_hora'),
+        db.Index(
+            'ix_asistencia_ingresos',
+            'empresa_id', 'empleado_id', 'fecha_hora',
+            postgresql_where=db.text("tipo = 'INGRESO'")
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
     empresa_id = db.Column(
         db.Integer,
@@ -222,6 +251,67 @@ class Asistencia(db.Model):
     def __repr__(self):
         return f'<Asistencia {self.tipo} - Empleado {self.empleado_id}>'
 
+# =========================
+# ASISTENCIA DIARIA (ROLLUP)
+# =========================
+class AsistenciaDiaria(db.Model):
+
+    """
+    Resumen por empleado y día local, mantenido en cada
+    alta / edición / baja de Asistencia. El día de un
+    bloque es la fecha local de su INGRESO.
+    """
+
+    __tablename__ = 'asistencia_diaria'
+    __table_args__ = (
+        db.Index(
+            'uq_asistencia_diaria_empresa_empleado_fecha',
+            'empresa_id', 'empleado_id', 'fecha',
+            unique=True
+        ),
+        db.Index('ix_asistencia_diaria_empresa_fecha', 'empresa_id', 'fecha'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    empresa_id = db.Column(
+        db.Integer,
+        db.ForeignKey('empresa.id'),
+        nullable=False
+    )
+    empleado_id = db.Column(
+        db.Integer,
+        db.ForeignKey('empleado.id'),
+        nullable=False
+    )
+    fecha = db.Column(db.Date, nullable=False)
+
+    # segundos de los bloques cerrados (INGRESO → SALIDA)
+    segundos = db.Column(db.Integer, nullable=False, default=0)
+    # cantidad de bloques cerrados
+    bloques = db.Column(db.Integer, nullable=False, default=0)
+
+    primer_ingreso = db.Column(db.DateTime(timezone=True), nullable=True)
+    ultima_salida = db.Column(db.DateTime(timezone=True), nullable=True)
+    bloque_abierto = db.Column(db.Boolean, nullable=False, default=False)
+
+    # sucursal del primer ingreso del día
+    sucursal_id = db.Column(
+        db.Integer,
+        db.ForeignKey('sucursal.id'),
+        nullable=True
+    )
+
+    actualizado_at = db.Column(
+        db.DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now()
+    )
+
+    empleado = db.relationship('Empleado')
+
+    def __repr__(self):
+        return f'<AsistenciaDiaria {self.empleado_id} {self.fecha}>'
+
 # =========================
 # USUARIO (BASE PARA FUTURO)
 # =========================
@@ -255,7 +345,23 @@ class Usuario(UserMixin, db.Model):
 # AUDITORÍA DEL SISTEMA
 # ========================
 class AuditLog(db.Model):
+    # en PostgreSQL la tabla está particionada por mes de
+    # created_at (m0009, PK id + created_at); los meses
+    # archivados se leen de archivo_auditoria_service
     __tablename__ = 'audit_log'
+    __table_args__ = (
+        db.Index(
+            'ix_audit_log_empresa_entidad_fecha',
+            'empresa_id', 'entidad', 'created_at'
+        ),
+        db.Index('ix_audit_log_empresa_fecha', 'empresa_id', 'created_at'),
+        # estadísticas: index-only scan del rango
+        db.Index(
+            'ix_audit_log_estadisticas',
+            'empresa_id', 'created_at',
+            postgresql_include=['accion', 'entidad', 'usuario_id']
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
     empresa_id = db.Column(
         db.Integer,
@@ -287,6 +393,13 @@ class AuditLog(db.Model):
 # ========================
 class HorarioEmpleado(db.Model):
     __tablename__ = "horario_empleado"
+    __table_args__ = (
+        db.Index(
+            'uq_horario_empleado_fecha',
+            'empleado_id', 'fecha',
+            unique=True
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -314,6 +427,9 @@ class HorarioEmpleado(db.Model):
 class HorarioBloque(db.Model):
 
     __tablename__ = "horario_bloque"
+    __table_args__ = (
+        db.Index('ix_horario_bloque_horario', 'horario_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     horario_id = db.Column(
@@ -356,4 +472,238 @@ class Kiosco(db.Model):
     )
     token = db.Column(db.String(100), unique=True, nullable=False)
     activo = db.Column(db.Boolean, default=True)
-    sucursal = db.relationship('Sucursal')
\ No newline at end of file
+    sucursal = db.relationship('Sucursal')
+
+# =========================
+# CIERRE DE MES (SNAPSHOT)
+# ========================
+class CierreMes(db.Model):
+
+    """
+    Mes cerrado de una empresa. Los reportes del mes leen
+    de las tablas del cierre y ya no de Asistencia.
+    """
+
+    __tablename__ = 'cierre_mes'
+    __table_args__ = (
+        db.Index(
+            'uq_cierre_mes_empresa_periodo',
+            'empresa_id', 'year', 'month',
+            unique=True
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    empresa_id = db.Column(
+        db.Integer,
+        db.ForeignKey('empresa.id'),
+        nullable=False
+    )
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+
+    # zona con la que se calcularon los días del cierre
+    zona_horaria = db.Column(db.String(64), nullable=False)
+    total_segundos = db.Column(db.BigInteger, nullable=False, default=0)
+
+    usuario_id = db.Column(
+        db.Integer,
+        db.ForeignKey('usuario.id'),
+        nullable=True
+    )
+    cerrado_at = db.Column(
+        db.DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    usuario = db.relationship('Usuario')
+
+    def __repr__(self):
+        return f'<CierreMes {self.empresa_id} {self.month}/{self.year}>'
+
+
+class CierreMesEmpleado(db.Model):
+
+    """
+    Totales congelados de un empleado en un mes cerrado,
+    con el estado de cumplimiento de cada día.
+    """
+
+    __tablename__ = 'cierre_mes_empleado'
+    __table_args__ = (
+        db.Index(
+            'uq_cierre_mes_empleado',
+            'cierre_id', 'empleado_id',
+            unique=True
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    cierre_id = db.Column(
+        db.Integer,
+        db.ForeignKey('cierre_mes.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    empresa_id = db.Column(
+        db.Integer,
+        db.ForeignKey('empresa.id'),
+        nullable=False
+    )
+    empleado_id = db.Column(
+        db.Integer,
+        db.ForeignKey('empleado.id'),
+        nullable=False
+    )
+
+    # datos del empleado al momento del cierre
+    apellido = db.Column(db.String(50), nullable=False)
+    nombre = db.Column(db.String(50), nullable=False)
+    sucursal_id = db.Column(
+        db.Integer,
+        db.ForeignKey('sucursal.id'),
+        nullable=True
+    )
+
+    segundos = db.Column(db.Integer, nullable=False, default=0)
+    dias = db.Column(db.Integer, nullable=False, default=0)
+    incompleto = db.Column(db.Boolean, nullable=False, default=False)
+
+    # {"celdas": [[estado, detalle], ...], "conteo": {estado: n}}
+    cumplimiento = db.Column(db.JSON(none_as_null=True), nullable=True)
+
+    cierre = db.relationship(
+        'CierreMes',
+        backref=db.backref(
+            'empleados',
+            cascade='all, delete-orphan',
+            lazy=True
+        )
+    )
+
+
+class CierreMesBloque(db.Model):
+
+    """
+    Bloque INGRESO → SALIDA congelado. Cuenta para el mes
+    del día local de su ingreso (igual que el rollup).
+    """
+
+    __tablename__ = 'cierre_mes_bloque'
+    __table_args__ = (
+        db.Index(
+            'ix_cierre_mes_bloque_cierre_empleado',
+            'cierre_id', 'empleado_id', 'ingreso'
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    cierre_id = db.Column(
+        db.Integer,
+        db.ForeignKey('cierre_mes.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    empleado_id = db.Column(
+        db.Integer,
+        db.ForeignKey('empleado.id'),
+        nullable=False
+    )
+    fecha = db.Column(db.Date, nullable=False)
+    ingreso = db.Column(db.DateTime(timezone=True), nullable=False)
+    salida = db.Column(db.DateTime(timezone=True), nullable=True)
+    segundos = db.Column(db.Integer, nullable=False, default=0)
+    actividad = db.Column(db.String(50), nullable=True)
+
+
+class AjusteCierre(db.Model):
+
+    """
+    Corrección explícita sobre un mes cerrado: suma (o
+    resta) segundos al total congelado del empleado.
+    """
+
+    __tablename__ = 'ajuste_cierre'
+    __table_args__ = (
+        db.Index('ix_ajuste_cierre_cierre', 'cierre_id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    cierre_id = db.Column(
+        db.Integer,
+        db.ForeignKey('cierre_mes.id', ondelete='CASCADE'),
+        nullable=False
+    )
+    empresa_id = db.Column(
+        db.Integer,
+        db.ForeignKey('empresa.id'),
+        nullable=False
+    )
+    empleado_id = db.Column(
+        db.Integer,
+        db.ForeignKey('empleado.id'),
+        nullable=False
+    )
+    segundos = db.Column(db.Integer, nullable=False)
+    motivo = db.Column(db.Text, nullable=False)
+    usuario_id = db.Column(
+        db.Integer,
+        db.ForeignKey('usuario.id'),
+        nullable=True
+    )
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    empleado = db.relationship('Empleado')
+    usuario = db.relationship('Usuario')
+
+
+# =========================
+# ALERTAS DE PUNTUALIDAD
+# ========================
+class AlertaPuntualidad(db.Model):
+
+    """
+    Una llegada tarde por empleado y día local. El índice
+    único hace de dedupe (INSERT ... ON CONFLICT DO NOTHING).
+    """
+
+    __tablename__ = 'alerta_puntualidad'
+    __table_args__ = (
+        db.Index(
+            'uq_alerta_puntualidad_empresa_empleado_fecha',
+            'empresa_id', 'empleado_id', 'fecha',
+            unique=True
+        ),
+        db.Index('ix_alerta_puntualidad_empresa_fecha', 'empresa_id', 'fecha'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    empresa_id = db.Column(
+        db.Integer,
+        db.ForeignKey('empresa.id'),
+        nullable=False
+    )
+    empleado_id = db.Column(
+        db.Integer,
+        db.ForeignKey('empleado.id'),
+        nullable=False
+    )
+    fecha = db.Column(db.Date, nullable=False)
+
+    ingreso = db.Column(db.DateTime(timezone=True), nullable=False)
+    turno_inicio = db.Column(db.Time, nullable=False)
+    minutos_tarde = db.Column(db.Integer, nullable=False)
+
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+
+    empleado = db.relationship('Empleado')
+
+    def __repr__(self):
+        return f'<AlertaPuntualidad {self.empleado_id} {self.fecha}>'
@@ -1,12 +1,14 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
-from app.models import db, Empleado, Asistencia, AuditLog
+from app.models import db, Empleado, Asistencia
 from app.multitenant import empleados_empresa, asistencias_empresa
-from zoneinfo import ZoneInfo
+from app.services.calendario_service import zona_empresa
 from datetime import datetime, timedelta, timezone
 from app.security import requiere_validacion_fichaje
 from app.audit import registrar_evento
-from app.services.horarios_service import evaluar_llegada_tarde, obtener_turno_dia
+from app.services.puntualidad_service import registrar_llegada_tarde
+from app.services.eventos_asistencia_service import notificar_cambio_asistencia
+from app.services.cierre_service import periodo_cerrado_fichaje
 
 
 asistencias_bp = Blueprint(
@@ -33,8 +35,8 @@ def marcar_asistencia():
             .all()
         )
 
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
-    ahora_ar = datetime.now(tz_ar)
+    tz_local = zona_empresa()
+    ahora_ar = datetime.now(tz_local)
 
     inicio_dia_ar = ahora_ar.replace(
         hour=0, minute=0, second=0, microsecond=0
@@ -75,7 +77,7 @@ def marcar_asistencia():
             try:
                 fecha_str = f"{fecha_manual} {hora_manual}"
                 fecha_local = datetime.strptime(fecha_str, "%Y-%m-%d %H:%M")
-                fecha_local = fecha_local.replace(tzinfo=tz_ar)
+                fecha_local = fecha_local.replace(tzinfo=tz_local)
                 fecha_hora = fecha_local.astimezone(timezone.utc)
             except Exception:
                 flash("❌ Fecha u hora manual inválida", "danger")
@@ -88,6 +90,20 @@ def marcar_asistencia():
             flash("❌ No se puede cargar asistencia en el futuro", "danger")
             return redirect(url_for('asistencias.marcar_asistencia'))
 
+        # 🔒 mes cerrado (el del fichaje o el del INGRESO que cierra)
+        cierre = periodo_cerrado_fichaje(
+            current_user.empresa_id,
+            empleado_id,
+            fecha_hora
+        )
+
+        if cierre:
+            flash(
+                f"🔒 {cierre.month:02d}/{cierre.year} está cerrado: registrá un ajuste en el cierre del mes",
+                "danger"
+            )
+            return redirect(url_for('asistencias.marcar_asistencia'))
+
         # 🚫 validaciones básicas
         if not empleado_id or tipo not in ['INGRESO', 'SALIDA']:
             flash('❌ Datos inválidos', 'danger')
@@ -130,53 +146,10 @@ def marcar_asistencia():
         # =========================
         if tipo == "INGRESO":
 
-            fecha_hora_ar = fecha_hora.astimezone(tz_ar)
-
-            if evaluar_llegada_tarde(empleado, fecha_hora_ar):
-
-                inicio_dia = fecha_hora_ar.replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                )
-                fin_dia = inicio_dia + timedelta(days=1)
-
-                ya_existe = db.session.query(
-                    db.exists().where(
-                        db.and_(
-                            AuditLog.empresa_id == current_user.empresa_id,
-                            AuditLog.entidad == "PUNTUALIDAD",
+            fecha_hora_ar = fecha_hora.astimezone(tz_local)
 
-                            # 🔥 MISMO EMPLEADO
-                            AuditLog.descripcion.contains(
-                                f"{empleado.apellido}, {empleado.nombre}"
-                            ),
-
-                            AuditLog.created_at >= inicio_dia.astimezone(timezone.utc),
-
-                            AuditLog.created_at < fin_dia.astimezone(timezone.utc)
-                        )
-                    )
-                ).scalar()
-
-                if not ya_existe:
-
-                    turno = obtener_turno_dia(empleado, fecha_hora_ar)
-
-                    hora_turno_str = (
-                        turno["inicio"].strftime('%H:%M')
-                        if turno and turno["inicio"]
-                        else "--:--"
-                    )
-
-                    registrar_evento(
-                        accion="ALERTA",
-                        entidad="PUNTUALIDAD",
-                        descripcion=(
-                            f"Llegada tarde: "
-                            f"{empleado.apellido}, {empleado.nombre} "
-                            f"(Ingreso {fecha_hora_ar.strftime('%H:%M')}, "
-                            f"Turno {hora_turno_str})"
-                        )
-                    )
+            # una alerta por empleado y día (índice único)
+            registrar_llegada_tarde(empleado, fecha_hora_ar)
 
         # =========================
         # 💾 GUARDAR ASISTENCIA
@@ -191,7 +164,13 @@ def marcar_asistencia():
         )
 
         db.session.add(asistencia)
-        db.session.commit()
+        db.session.flush()
+
+        notificar_cambio_asistencia(
+            current_user.empresa_id,
+            asistencia.empleado_id,
+            [asistencia.fecha_hora]
+        )
 
         registrar_evento(
             accion="CREAR",
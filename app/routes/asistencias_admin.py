@@ -1,10 +1,16 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
-from app.models import Asistencia, Empleado, db
+from sqlalchemy.orm import joinedload
+from app.models import Asistencia, Empleado, Sucursal, db
 from app.roles import admin_o_supervisor
-from app.multitenant import asistencias_empresa
+from app.multitenant import asistencias_empresa, empleados_empresa
+from app.services.calendario_service import zona_empresa, limites_dia
+from app.services.bloques_service import empleados_sucursal
+from app.services.paginacion_service import pagina_keyset
 from datetime import datetime
 from app.audit import registrar_evento
+from app.services.eventos_asistencia_service import notificar_cambio_asistencia
+from app.services.cierre_service import periodo_cerrado_fichaje
 
 asistencias_admin_bp = Blueprint(
     'asistencias_admin',
@@ -15,22 +21,91 @@ asistencias_admin_bp = Blueprint(
 # ==========================================
 # LISTADO GENERAL DE ASISTENCIAS
 # ==========================================
+def fecha_filtro(nombre):
+
+    try:
+        return datetime.strptime(request.args.get(nombre, ""), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
 @asistencias_admin_bp.route('/')
 @login_required
 @admin_o_supervisor
 def listado():
 
-    asistencias = (
-        asistencias_empresa()
-        .join(Empleado)
-        .order_by(Asistencia.fecha_hora.desc())
-        .limit(1000)
-        .all()
+    """
+    Paginado por (fecha_hora, id) con los filtros en la
+    consulta: cada página es un SELECT acotado.
+    """
+
+    filtros = {
+        "empleado_id": request.args.get("empleado_id", type=int),
+        "sucursal_id": request.args.get("sucursal_id", type=int),
+        "tipo": request.args.get("tipo") if request.args.get("tipo") in ("INGRESO", "SALIDA") else None,
+        "desde": fecha_filtro("desde"),
+        "hasta": fecha_filtro("hasta")
+    }
+
+    consulta = asistencias_empresa().options(joinedload(Asistencia.empleado))
+
+    if filtros["empleado_id"]:
+        consulta = consulta.filter(Asistencia.empleado_id == filtros["empleado_id"])
+
+    if filtros["sucursal_id"]:
+        # sucursal del empleado (igual que los reportes)
+        consulta = consulta.filter(Asistencia.empleado_id.in_(
+            empleados_sucursal(current_user.empresa_id, filtros["sucursal_id"])
+        ))
+
+    if filtros["tipo"]:
+        consulta = consulta.filter(Asistencia.tipo == filtros["tipo"])
+
+    tz_nombre = zona_empresa().key
+
+    if filtros["desde"]:
+        consulta = consulta.filter(
+            Asistencia.fecha_hora >= limites_dia(tz_nombre, filtros["desde"])[0]
+        )
+
+    if filtros["hasta"]:
+        consulta = consulta.filter(
+            Asistencia.fecha_hora < limites_dia(tz_nombre, filtros["hasta"])[1]
+        )
+
+    asistencias, cursor_antes, cursor_despues = pagina_keyset(
+        consulta,
+        Asistencia.fecha_hora,
+        Asistencia.id,
+        antes=request.args.get("antes"),
+        despues=request.args.get("despues")
     )
 
+    empleados = empleados_empresa().order_by(
+        Empleado.apellido,
+        Empleado.nombre
+    ).all()
+
+    sucursales = Sucursal.query.filter_by(
+        empresa_id=current_user.empresa_id
+    ).all()
+
+    # filtros activos para los links de página
+    args_filtros = {
+        k: (v.isoformat() if hasattr(v, "isoformat") else v)
+        for k, v in filtros.items()
+        if v
+    }
+
     return render_template(
         'asistencias_admin_list.html',
-        asistencias=asistencias
+        asistencias=asistencias,
+        empleados=empleados,
+        sucursales=sucursales,
+        filtros=filtros,
+        args_filtros=args_filtros,
+        cursor_antes=cursor_antes,
+        cursor_despues=cursor_despues
     )
 
 
@@ -44,8 +119,32 @@ def eliminar(id):
 
     asistencia = asistencias_empresa().filter_by(id=id).first_or_404()
 
+    empleado_id = asistencia.empleado_id
+    fecha_hora = asistencia.fecha_hora
+
+    # 🔒 mes cerrado (el del fichaje o el del INGRESO que cierra)
+    cierre = periodo_cerrado_fichaje(
+        current_user.empresa_id,
+        empleado_id,
+        fecha_hora,
+        excluir_id=asistencia.id
+    )
+
+    if cierre:
+        flash(
+            f"🔒 {cierre.month:02d}/{cierre.year} está cerrado: registrá un ajuste en el cierre del mes",
+            "danger"
+        )
+        return redirect(url_for('asistencias_admin.listado'))
+
     db.session.delete(asistencia)
-    db.session.commit()
+    db.session.flush()
+
+    notificar_cambio_asistencia(
+        current_user.empresa_id,
+        empleado_id,
+        [fecha_hora]
+    )
 
     # ==============================
     # 🧾 AUDITORÍA
@@ -78,24 +177,63 @@ def editar(id):
         actividad = request.form.get('actividad')
         fecha_hora = request.form.get('fecha_hora')
 
+        fecha_anterior = asistencia.fecha_hora
+
+        # 🔒 mes cerrado (se valida antes de tocar el registro)
+        cierre = periodo_cerrado_fichaje(
+            current_user.empresa_id,
+            asistencia.empleado_id,
+            fecha_anterior,
+            excluir_id=asistencia.id
+        )
+
+        if cierre:
+            flash(
+                f"🔒 {cierre.month:02d}/{cierre.year} está cerrado: registrá un ajuste en el cierre del mes",
+                "danger"
+            )
+            return redirect(url_for('asistencias_admin.listado'))
+
         asistencia.tipo = tipo
         asistencia.actividad = actividad if tipo == 'INGRESO' else None
-        from zoneinfo import ZoneInfo
         from datetime import timezone
+        from app.services.calendario_service import zona_empresa
 
-        tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
+        tz_local = zona_empresa()
 
         fecha_local = datetime.strptime(fecha_hora, "%Y-%m-%dT%H:%M")
 
-        # 👉 convertir a datetime con zona Argentina
-        fecha_local = fecha_local.replace(tzinfo=tz_ar)
+        # 👉 convertir a datetime con la zona de la empresa
+        fecha_local = fecha_local.replace(tzinfo=tz_local)
 
         # 👉 convertir a UTC (como usa tu sistema)
         fecha_utc = fecha_local.astimezone(timezone.utc)
 
+        # tampoco se puede mover a un mes cerrado
+        cierre = periodo_cerrado_fichaje(
+            current_user.empresa_id,
+            asistencia.empleado_id,
+            fecha_utc,
+            excluir_id=asistencia.id
+        )
+
+        if cierre:
+            db.session.rollback()
+            flash(
+                f"🔒 {cierre.month:02d}/{cierre.year} está cerrado: registrá un ajuste en el cierre del mes",
+                "danger"
+            )
+            return redirect(url_for('asistencias_admin.listado'))
+
         asistencia.fecha_hora = fecha_utc
 
-        db.session.commit()
+        db.session.flush()
+
+        notificar_cambio_asistencia(
+            current_user.empresa_id,
+            asistencia.empleado_id,
+            [fecha_anterior, asistencia.fecha_hora]
+        )
         flash("Asistencia actualizada", "success")
 
         return redirect(url_for('asistencias_admin.listado'))
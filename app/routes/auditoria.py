@@ -1,9 +1,24 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, current_app, render_template, request, jsonify
 from flask_login import login_required
+from sqlalchemy.orm import joinedload
 from app.roles import solo_admin
-from app.models import AuditLog
+from app.models import AuditLog, Usuario
 from flask_login import current_user
-from collections import Counter
+from datetime import datetime, timedelta
+from app.services.calendario_service import zona_empresa
+from app.services.paginacion_service import codificar_cursor, pagina_keyset
+from app.services.auditoria_service import (
+    ENTIDADES_AUDITORIA,
+    buscar_auditoria,
+    condiciones_auditoria,
+    estadisticas_auditoria
+)
+from app.services.archivo_auditoria_service import (
+    meses_en_rango,
+    pagina_archivo,
+    rango_filtros,
+    sumar_estadisticas_archivo
+)
 
 auditoria_bp = Blueprint(
     'auditoria',
@@ -11,35 +26,226 @@ auditoria_bp = Blueprint(
     url_prefix='/auditoria'
 )
 
+
+def fecha_filtro(nombre):
+
+    try:
+        return datetime.strptime(request.args.get(nombre, ""), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def filtros_auditoria():
+
+    return {
+        "entidad": request.args.get("entidad") or None,
+        "accion": request.args.get("accion") or None,
+        "usuario_id": request.args.get("usuario_id", type=int),
+        "desde": fecha_filtro("desde"),
+        "hasta": fecha_filtro("hasta")
+    }
+
+
+def rango_por_defecto(filtros, tz):
+
+    """
+    Sin desde / hasta: últimos 30 días (estadísticas).
+    """
+
+    if filtros["desde"] or filtros["hasta"]:
+        return filtros
+
+    hasta = datetime.now(tz).date()
+
+    return dict(filtros, desde=hasta - timedelta(days=29), hasta=hasta)
+
+
 # ==========================================
-# LISTADO + ESTADISTICAS AUDITORIA
+# LISTADO + BÚSQUEDA + ESTADISTICAS AUDITORIA
 # ==========================================
 @auditoria_bp.route('/')
 @login_required
 @solo_admin
 def auditoria():
 
+    filtros = filtros_auditoria()
+
+    tz_nombre = zona_empresa().key
+
     # 🔐 logs solo de la empresa del usuario
-    logs = (
-        AuditLog.query
-        .filter_by(empresa_id=current_user.empresa_id)
-        .order_by(AuditLog.created_at.desc())
-        .limit(1000)
-        .all()
+    condiciones = condiciones_auditoria(
+        current_user.empresa_id,
+        tz_nombre,
+        **filtros
     )
 
+    directorio = current_app.config["AUDIT_ARCHIVO_DIR"]
+
+    hay_archivo = bool(meses_en_rango(
+        directorio,
+        current_user.empresa_id,
+        *rango_filtros(tz_nombre, filtros["desde"], filtros["hasta"])
+    ))
+
+    # búsqueda de texto: resultados por relevancia, por página
+    texto = (request.args.get("q") or "").strip()
+    pagina = max(request.args.get("pagina", 1, type=int), 1)
+    hay_mas_resultados = False
+
+    en_archivo = hay_archivo and request.args.get("archivo") == "1"
+
+    if en_archivo:
+
+        # meses ya exportados: se leen de los JSONL.gz (con
+        # texto, se buscan los términos recorriendo los meses)
+        logs, cursor_antes, cursor_despues = pagina_archivo(
+            directorio,
+            current_user.empresa_id,
+            tz_nombre,
+            filtros,
+            antes=request.args.get("antes"),
+            despues=request.args.get("despues"),
+            texto=texto
+        )
+
+    elif texto:
+
+        logs, hay_mas_resultados = buscar_auditoria(condiciones, texto, pagina)
+        cursor_antes = cursor_despues = None
+
+    else:
+
+        logs, cursor_antes, cursor_despues = pagina_keyset(
+            AuditLog.query.options(joinedload(AuditLog.usuario)).filter(*condiciones),
+            AuditLog.created_at,
+            AuditLog.id,
+            antes=request.args.get("antes"),
+            despues=request.args.get("despues")
+        )
+
+    # fin de la base → "Más viejos" sigue en el archivo;
+    # principio del archivo → "Más nuevos" vuelve a la base
+    # (con texto: a la última página de resultados en vivo)
+    seguir_en_archivo = hay_archivo and not en_archivo and (
+        not hay_mas_resultados if texto else not cursor_antes
+    )
+    volver_a_base = None
+
+    if en_archivo and logs and not cursor_despues and not texto:
+        volver_a_base = codificar_cursor(logs[0].created_at, logs[0].id)
+
     # ======================================
     # 📊 GENERAR DATOS PARA EL GRÁFICO
     # ======================================
-    acciones = [log.accion for log in logs]
-    conteo = Counter(acciones)
+    # mismo rango que /api/estadisticas (sin fechas: últimos
+    # 30 días), nunca toda la historia de la empresa
+    filtros_grafico = rango_por_defecto(filtros, zona_empresa())
 
-    chart_labels = list(conteo.keys())
-    chart_data = list(conteo.values())
+    datos = estadisticas_auditoria(
+        condiciones_auditoria(current_user.empresa_id, tz_nombre, **filtros_grafico),
+        tz_nombre
+    )
+
+    if meses_en_rango(
+        directorio,
+        current_user.empresa_id,
+        *rango_filtros(tz_nombre, filtros_grafico["desde"], filtros_grafico["hasta"])
+    ):
+        sumar_estadisticas_archivo(
+            datos,
+            directorio,
+            current_user.empresa_id,
+            tz_nombre,
+            filtros_grafico
+        )
+
+    chart_labels = [d["accion"] for d in datos["por_accion"]]
+    chart_data = [d["cantidad"] for d in datos["por_accion"]]
+
+    # opciones de los filtros: las conocidas + las del rango
+    entidades = sorted(
+        set(ENTIDADES_AUDITORIA)
+        | {d["entidad"] for d in datos["por_entidad"]}
+        | ({filtros["entidad"]} if filtros["entidad"] else set())
+    )
+
+    usuarios = Usuario.query.filter_by(
+        empresa_id=current_user.empresa_id
+    ).order_by(Usuario.email).all()
+
+    args_filtros = {
+        k: (v.isoformat() if hasattr(v, "isoformat") else v)
+        for k, v in filtros.items()
+        if v
+    }
 
     return render_template(
         "auditoria.html",
         logs=logs,
         chart_labels=chart_labels,
-        chart_data=chart_data
+        chart_data=chart_data,
+        entidades=entidades,
+        usuarios=usuarios,
+        filtros=filtros,
+        args_filtros=args_filtros,
+        cursor_antes=cursor_antes,
+        cursor_despues=cursor_despues,
+        en_archivo=en_archivo,
+        hay_archivo=hay_archivo,
+        texto=texto,
+        pagina=pagina,
+        hay_mas_resultados=hay_mas_resultados,
+        seguir_en_archivo=seguir_en_archivo,
+        volver_a_base=volver_a_base
+    )
+
+
+# ==========================================
+# ESTADÍSTICAS AGREGADAS (JSON)
+# ==========================================
+@auditoria_bp.route('/api/estadisticas')
+@login_required
+@solo_admin
+def estadisticas():
+
+    """
+    Conteos por acción, entidad, usuario y período
+    (?agrupar=hora|dia|semana) para cualquier rango.
+    Sin fechas: últimos 30 días. Si el rango llega a
+    meses archivados se suman los eventos del archivo.
+    """
+
+    tz = zona_empresa()
+    filtros = rango_por_defecto(filtros_auditoria(), tz)
+
+    condiciones = condiciones_auditoria(
+        current_user.empresa_id,
+        tz.key,
+        **filtros
     )
+
+    datos = estadisticas_auditoria(
+        condiciones,
+        tz.key,
+        request.args.get("agrupar", "dia")
+    )
+
+    directorio = current_app.config["AUDIT_ARCHIVO_DIR"]
+
+    if meses_en_rango(
+        directorio,
+        current_user.empresa_id,
+        *rango_filtros(tz.key, filtros["desde"], filtros["hasta"])
+    ):
+        sumar_estadisticas_archivo(
+            datos,
+            directorio,
+            current_user.empresa_id,
+            tz.key,
+            filtros
+        )
+
+    datos["desde"] = filtros["desde"].isoformat() if filtros["desde"] else None
+    datos["hasta"] = filtros["hasta"].isoformat() if filtros["hasta"] else None
+
+    return jsonify(datos)
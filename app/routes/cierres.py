@@ -0,0 +1,172 @@
+from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask_login import login_required, current_user
+from app.models import CierreMes, CierreMesEmpleado, AjusteCierre
+from app.roles import solo_admin, admin_o_supervisor
+from app.audit import registrar_evento
+from app.services.calendario_service import zona_empresa
+from app.services.cumplimiento_service import matriz_cumplimiento
+from app.services.horas_service import formatear_hhmm
+from app.services.cierre_service import (
+    cerrar_mes,
+    registrar_ajuste,
+    ajustes_por_empleado,
+    primer_dia_mes_siguiente
+)
+from datetime import date, datetime, timedelta
+
+
+cierres_bp = Blueprint(
+    'cierres',
+    __name__,
+    url_prefix='/cierres'
+)
+
+
+def cierre_de_empresa(cierre_id):
+
+    return CierreMes.query.filter_by(
+        id=cierre_id,
+        empresa_id=current_user.empresa_id
+    ).first_or_404()
+
+
+# ==========================================
+# LISTADO DE MESES CERRADOS
+# ==========================================
+@cierres_bp.route('/')
+@login_required
+@admin_o_supervisor
+def listado():
+
+    cierres = CierreMes.query.filter_by(
+        empresa_id=current_user.empresa_id
+    ).order_by(
+        CierreMes.year.desc(),
+        CierreMes.month.desc()
+    ).all()
+
+    # por defecto se propone el mes anterior
+    anterior = datetime.now(zona_empresa()).date().replace(day=1) - timedelta(days=1)
+
+    return render_template(
+        'cierres.html',
+        cierres=cierres,
+        year=anterior.year,
+        month=anterior.month,
+        formatear_hhmm=formatear_hhmm
+    )
+
+
+# ==========================================
+# CERRAR UN MES
+# ==========================================
+@cierres_bp.route('/cerrar', methods=['POST'])
+@login_required
+@solo_admin
+def cerrar():
+
+    year = request.form.get('year', type=int)
+    month = request.form.get('month', type=int)
+
+    if not year or not month or not 1 <= month <= 12:
+        flash("❌ Mes inválido", "danger")
+        return redirect(url_for('cierres.listado'))
+
+    try:
+        cierre = cerrar_mes(
+            current_user.empresa_id,
+            year,
+            month,
+            matriz_cumplimiento(current_user.empresa_id, year, month),
+            current_user.id
+        )
+    except ValueError as e:
+        flash(f"❌ {e}", "danger")
+        return redirect(url_for('cierres.listado'))
+
+    registrar_evento(
+        accion="CERRAR",
+        entidad="CIERRE_MES",
+        descripcion=f"{month:02d}/{year} | {formatear_hhmm(cierre.total_segundos)} hs"
+    )
+
+    flash(f"🔒 Mes {month:02d}/{year} cerrado", "success")
+    return redirect(url_for('cierres.detalle', cierre_id=cierre.id))
+
+
+# ==========================================
+# DETALLE DE UN CIERRE + AJUSTES
+# ==========================================
+@cierres_bp.route('/<int:cierre_id>')
+@login_required
+@admin_o_supervisor
+def detalle(cierre_id):
+
+    cierre = cierre_de_empresa(cierre_id)
+
+    empleados = CierreMesEmpleado.query.filter_by(
+        cierre_id=cierre.id
+    ).order_by(
+        CierreMesEmpleado.apellido,
+        CierreMesEmpleado.nombre
+    ).all()
+
+    ajustes = AjusteCierre.query.filter_by(
+        cierre_id=cierre.id
+    ).order_by(AjusteCierre.created_at).all()
+
+    desde = date(cierre.year, cierre.month, 1)
+    hasta = primer_dia_mes_siguiente(desde) - timedelta(days=1)
+
+    return render_template(
+        'cierre_detalle.html',
+        cierre=cierre,
+        empleados=empleados,
+        ajustes=ajustes,
+        ajustes_empleado=ajustes_por_empleado([cierre.id]),
+        desde=desde,
+        hasta=hasta,
+        formatear_hhmm=formatear_hhmm
+    )
+
+
+@cierres_bp.route('/<int:cierre_id>/ajuste', methods=['POST'])
+@login_required
+@solo_admin
+def nuevo_ajuste(cierre_id):
+
+    cierre = cierre_de_empresa(cierre_id)
+
+    empleado_id = request.form.get('empleado_id', type=int)
+    minutos = request.form.get('minutos', type=int)
+    motivo = (request.form.get('motivo') or "").strip()
+
+    empleado = CierreMesEmpleado.query.filter_by(
+        cierre_id=cierre.id,
+        empleado_id=empleado_id
+    ).first()
+
+    if not empleado or not minutos or not motivo:
+        flash("❌ Empleado, minutos y motivo son obligatorios", "danger")
+        return redirect(url_for('cierres.detalle', cierre_id=cierre.id))
+
+    registrar_ajuste(
+        cierre,
+        empleado_id,
+        minutos * 60,
+        motivo,
+        current_user.id
+    )
+
+    registrar_evento(
+        accion="AJUSTE",
+        entidad="CIERRE_MES",
+        descripcion=(
+            f"{cierre.month:02d}/{cierre.year} | "
+            f"{empleado.apellido}, {empleado.nombre} | "
+            f"{minutos:+d} min | {motivo}"
+        )
+    )
+
+    flash("✅ Ajuste registrado", "success")
+    return redirect(url_for('cierres.detalle', cierre_id=cierre.id))
@@ -246,6 +246,16 @@ def editar_empleado(id):
         if turno_fin:
             turno_fin = datetime.strptime(turno_fin, "%H:%M").time()
 
+        # Validar DNI dentro de la empresa (otro empleado)
+        existe = (
+            empleados_empresa()
+            .filter(Empleado.dni == dni, Empleado.id != empleado.id)
+            .first()
+        )
+        if existe:
+            flash('Ya existe un empleado con ese DNI', 'warning')
+            return redirect(url_for('empleados.editar_empleado', id=id))
+
         # 🔒 Validar jornada abierta
         ultima = (
             Asistencia.query
@@ -3,6 +3,10 @@ from flask_login import login_required, current_user
 from app.models import db, Empresa
 from app.roles import solo_admin
 from app.security import obtener_ip_cliente
+from app.services.calendario_service import ZONAS_DISPONIBLES
+from app.services.rollup_service import reconstruir_rollup
+from app.services.version_datos_service import incrementar_version_datos
+from app.services.dashboard_service import invalidar_dashboard
 
 empresa_bp = Blueprint(
     'empresa',
@@ -28,14 +32,34 @@ def configuracion_empresa():
             flash("El nombre de la empresa es obligatorio", "danger")
             return redirect(url_for('empresa.configuracion_empresa'))
 
+        zona_horaria = request.form.get('zona_horaria') or empresa.zona_horaria
+
+        if zona_horaria not in dict(ZONAS_DISPONIBLES):
+            flash("Zona horaria inválida", "danger")
+            return redirect(url_for('empresa.configuracion_empresa'))
+
+        cambio_zona = zona_horaria != empresa.zona_horaria
+
         empresa.nombre = nombre
+        empresa.zona_horaria = zona_horaria
+
+        if cambio_zona:
+            # los días locales cambian: se rearma el rollup
+            # y se invalidan snapshots y ETags
+            reconstruir_rollup(empresa.id, tz_nombre=zona_horaria)
+            incrementar_version_datos(empresa.id)
+
         db.session.commit()
 
+        if cambio_zona:
+            invalidar_dashboard(empresa.id)
+
         flash('Configuración de empresa actualizada correctamente', 'success')
         return redirect(url_for('empresa.configuracion_empresa'))
 
     return render_template(
         'empresa_config.html',
         empresa=empresa,
-        ip_actual=ip_actual
+        ip_actual=ip_actual,
+        zonas=ZONAS_DISPONIBLES
     )
\ No newline at end of file
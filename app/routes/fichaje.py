@@ -1,15 +1,17 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
-from app.models import db, Asistencia, AuditLog
+from app.models import db, Asistencia
 from app.multitenant import asistencias_empresa
 from app.audit import registrar_evento
 from app.services.validacion_fichaje_service import (
     validar_acceso_fichaje
 )
-from zoneinfo import ZoneInfo
+from app.services.calendario_service import zona_empresa
 from datetime import datetime, timedelta, timezone
-from app.services.horarios_service import evaluar_llegada_tarde, obtener_turno_dia
+from app.services.puntualidad_service import registrar_llegada_tarde
 from app.services.geolocalizacion_service import (ubicacion_permitida)
+from app.services.eventos_asistencia_service import notificar_cambio_asistencia
+from app.services.cierre_service import periodo_cerrado
 
 
 fichaje_bp = Blueprint(
@@ -80,11 +82,11 @@ def fichar_ingreso():
         flash("Ya tenés un ingreso activo", "warning")
         return redirect(url_for("fichaje.home"))
 
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
+    tz_local = zona_empresa()
     empleado = current_user.empleado
     sucursal = empleado.sucursal
 
-    fecha_hora_ar = datetime.now(tz_ar)
+    fecha_hora_ar = datetime.now(tz_local)
 
 
     # =========================
@@ -123,51 +125,8 @@ def fichar_ingreso():
     # 🔥 SOLO evaluar primer ingreso
     if not ingreso_previo:
 
-        if evaluar_llegada_tarde(
-                empleado,
-                fecha_hora_ar
-        ):
-
-            ya_existe = db.session.query(
-                db.exists().where(
-                    db.and_(
-                        AuditLog.empresa_id == current_user.empresa_id,
-                        AuditLog.entidad == "PUNTUALIDAD",
-
-                        # 🔥 EMPLEADO ESPECÍFICO
-                        AuditLog.descripcion.contains(
-                            f"{empleado.apellido}, {empleado.nombre}"
-                        ),
-
-                        AuditLog.created_at >= inicio_dia.astimezone(timezone.utc),
-
-                        AuditLog.created_at < fin_dia.astimezone(timezone.utc)
-                    )
-                )
-            ).scalar()
-
-            if not ya_existe:
-                turno = obtener_turno_dia(
-                    empleado,
-                    fecha_hora_ar
-                )
-
-                hora_turno_str = (
-                    turno["inicio"].strftime('%H:%M')
-                    if turno and turno["inicio"]
-                    else "--:--"
-                )
-
-                registrar_evento(
-                    accion="ALERTA",
-                    entidad="PUNTUALIDAD",
-                    descripcion=(
-                        f"Llegada tarde: "
-                        f"{empleado.apellido}, {empleado.nombre} "
-                        f"(Ingreso {fecha_hora_ar.strftime('%H:%M')}, "
-                        f"Turno {hora_turno_str})"
-                    )
-                )
+        # una alerta por empleado y día (índice único)
+        registrar_llegada_tarde(empleado, fecha_hora_ar)
 
     # ==========================================
     # VALIDAR GEOLOCALIZACIÓN
@@ -250,7 +209,13 @@ def fichar_ingreso():
     )
 
     db.session.add(asistencia)
-    db.session.commit()
+    db.session.flush()
+
+    notificar_cambio_asistencia(
+        current_user.empresa_id,
+        asistencia.empleado_id,
+        [asistencia.fecha_hora]
+    )
 
     registrar_evento(
         "CREAR",
@@ -286,6 +251,16 @@ def fichar_salida():
         flash("No hay ingreso activo", "warning")
         return redirect(url_for("fichaje.home"))
 
+    # 🔒 el INGRESO que esta salida cierra quedó en un mes cerrado
+    cierre = periodo_cerrado(current_user.empresa_id, ultima.fecha_hora)
+
+    if cierre:
+        flash(
+            f"🔒 {cierre.month:02d}/{cierre.year} está cerrado: pedí a un administrador que registre la salida como ajuste",
+            "danger"
+        )
+        return redirect(url_for("fichaje.home"))
+
     asistencia = Asistencia(
         empleado_id=empleado_id,
         empresa_id=current_user.empresa_id,
@@ -298,7 +273,13 @@ def fichar_salida():
     )
 
     db.session.add(asistencia)
-    db.session.commit()
+    db.session.flush()
+
+    notificar_cambio_asistencia(
+        current_user.empresa_id,
+        asistencia.empleado_id,
+        [asistencia.fecha_hora]
+    )
 
     registrar_evento(
         "CREAR",
@@ -1,12 +1,14 @@
 from flask import Blueprint, render_template, request, jsonify
 from flask_login import login_required, current_user
-from datetime import datetime, timedelta, timezone
-from zoneinfo import ZoneInfo
-from app.models import db, Empleado, Asistencia, AuditLog, Kiosco
+from datetime import datetime, timezone
+from app.services.calendario_service import zona_empresa
+from app.models import db, Empleado, Asistencia, Kiosco
 from app.multitenant import empleados_empresa, asistencias_empresa
 from app.security import requiere_validacion_fichaje
 from app.audit import registrar_evento
-from app.services.horarios_service import evaluar_llegada_tarde, obtener_turno_dia
+from app.services.puntualidad_service import registrar_llegada_tarde
+from app.services.eventos_asistencia_service import notificar_cambio_asistencia
+from app.services.cierre_service import periodo_cerrado
 
 
 kiosco_bp = Blueprint(
@@ -78,51 +80,24 @@ def fichar(token):
     else:
         tipo = "SALIDA"
 
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
+    # 🔒 una SALIDA no puede cerrar un INGRESO de un mes cerrado
+    if tipo == "SALIDA" and periodo_cerrado(current_user.empresa_id, ultima.fecha_hora):
+        return jsonify({
+            "status": "error",
+            "mensaje": "La jornada abierta es de un mes cerrado: avisá a un administrador"
+        })
+
+    tz_local = zona_empresa()
 
     # =========================
     # ⏰ CONTROL LLEGADA TARDE
     # =========================
     if tipo == "INGRESO":
 
-        fecha_hora_ar = datetime.now(tz_ar)
-
-        if evaluar_llegada_tarde(empleado, fecha_hora_ar):
-
-            inicio_dia = fecha_hora_ar.replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
-            fin_dia = inicio_dia + timedelta(days=1)
-
-            ya_existe = db.session.query(db.exists().where(
-                db.and_(
-                    AuditLog.empresa_id == current_user.empresa_id,
-                    AuditLog.entidad == "PUNTUALIDAD",
-                    AuditLog.created_at >= inicio_dia.astimezone(timezone.utc),
-                    AuditLog.created_at < fin_dia.astimezone(timezone.utc)
-                )
-            )).scalar()
-
-            if not ya_existe:
-
-                turno = obtener_turno_dia(empleado, fecha_hora_ar)
-
-                hora_turno_str = (
-                    turno["inicio"].strftime('%H:%M')
-                    if turno and turno["inicio"]
-                    else "--:--"
-                )
-
-                registrar_evento(
-                    accion="ALERTA",
-                    entidad="PUNTUALIDAD",
-                    descripcion=(
-                        f"Llegada tarde: "
-                        f"{empleado.apellido}, {empleado.nombre} "
-                        f"(Ingreso {fecha_hora_ar.strftime('%H:%M')}, "
-                        f"Turno {hora_turno_str})"
-                    )
-                )
+        fecha_hora_ar = datetime.now(tz_local)
+
+        # una alerta por empleado y día (índice único)
+        registrar_llegada_tarde(empleado, fecha_hora_ar)
 
     # =========================
     # 💾 GUARDAR ASISTENCIA
@@ -137,7 +112,13 @@ def fichar(token):
     )
 
     db.session.add(asistencia)
-    db.session.commit()
+    db.session.flush()
+
+    notificar_cambio_asistencia(
+        current_user.empresa_id,
+        asistencia.empleado_id,
+        [asistencia.fecha_hora]
+    )
 
     registrar_evento(
         "CREAR",
@@ -149,6 +130,6 @@ def fichar(token):
         "status": "ok",
         "tipo": tipo,
         "nombre": f"{empleado.apellido} {empleado.nombre}",
-        "hora": datetime.now(tz_ar).strftime("%H:%M:%S"),
+        "hora": datetime.now(tz_local).strftime("%H:%M:%S"),
         "sucursal": empleado.sucursal.nombre
     })
\ No newline at end of file
@@ -1,12 +1,16 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, render_template, request, jsonify, Response
 from flask_login import login_required, current_user
-from app.models import Empleado, Asistencia, AuditLog, db
-from datetime import datetime, timedelta, timezone
-from sqlalchemy import func
-from zoneinfo import ZoneInfo
-from app.multitenant import empleados_empresa, asistencias_empresa
-from collections import defaultdict
-from app.services.horarios_service import obtener_turno_dia
+from app.models import Asistencia
+from app.roles import admin_o_supervisor
+from datetime import datetime
+from app.services.calendario_service import zona_empresa
+from app.services.dashboard_service import (
+    obtener_snapshot_dashboard,
+    etag_dashboard,
+    snapshot_a_json
+)
+from app.services.horas_service import formatear_hhmm, serie_por_dia
+from app.services.rollup_service import horas_por_dia_rollup
 
 main_bp = Blueprint('main', __name__)
 
@@ -18,478 +22,150 @@ main_bp = Blueprint('main', __name__)
 @login_required
 def dashboard():
 
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
-
-    hoy = datetime.now(tz_ar).date()
-    ahora = datetime.now(tz_ar)
-
-    # 👥 empleados activos
-    total_empleados = empleados_empresa().filter_by(activo=True).count()
-
-    # 🕒 asistencias hoy
-    asistencias_hoy = (
-        asistencias_empresa()
-        .filter(db.func.date(Asistencia.fecha_hora) == hoy)
-        .count()
-    )
-
-    # 👷 empleados trabajando ahora
-    trabajando = 0
-    empleados = empleados_empresa().all()
-
-    for emp in empleados:
-        ultima = (
-            asistencias_empresa()
-            .filter_by(empleado_id=emp.id)
-            .order_by(Asistencia.fecha_hora.desc())
-            .first()
-        )
-
-        if ultima and ultima.tipo == 'INGRESO':
-            trabajando += 1
-
-    # ⏱ horas del mes
-    primer_dia_mes = ahora.replace(
-        day=1,
-        hour=0,
-        minute=0,
-        second=0,
-        microsecond=0
-    )
-
-    asistencias_mes = (
-        asistencias_empresa()
-        .filter(Asistencia.fecha_hora >= primer_dia_mes)
-        .order_by(Asistencia.fecha_hora)
-        .all()
-    )
-
-    total_segundos = 0
-    ultimo_ingreso = {}
-
-    for a in asistencias_mes:
-
-        if a.tipo == 'INGRESO':
-            ultimo_ingreso[a.empleado_id] = a.fecha_hora
-
-        elif a.tipo == 'SALIDA' and a.empleado_id in ultimo_ingreso:
-
-            delta = (a.fecha_hora - ultimo_ingreso[a.empleado_id]).total_seconds()
-            total_segundos += delta
-            ultimo_ingreso.pop(a.empleado_id)
-
-    horas = int(total_segundos // 3600)
-    minutos = int((total_segundos % 3600) // 60)
-
-    horas_mes = f"{horas:02d}:{minutos:02d}"
-
     # ==========================================
-    # ⛔ EMPLEADOS PENDIENTES DE INGRESO
+    # DASHBOARD EMPLEADO
     # ==========================================
 
-    pendientes = []
-
-    ahora_ar = datetime.now(tz_ar)
-
-    for emp in empleados:
-
-        turno = obtener_turno_dia(emp, ahora_ar)
-
-        # no trabaja hoy → ignorar
-        if not turno or turno["tipo"] != "TRABAJA":
-            continue
-
-        # sin horario → ignorar
-        if not turno["inicio"]:
-            continue
-
-        # hora de inicio del turno
-        turno_dt = datetime.combine(
-            ahora_ar.date(),
-            turno["inicio"],
-            tzinfo=tz_ar
-        )
-
-        tolerancia = emp.tolerancia_minutos or 0
-        limite = turno_dt + timedelta(minutes=tolerancia)
-
-        # todavía no debería haber llegado → ignorar
-        if ahora_ar <= limite:
-            continue
-
-        # buscar ingresos de HOY correctamente en UTC
-
-        inicio_dia_ar = ahora_ar.replace(
-            hour=0,
-            minute=0,
-            second=0,
-            microsecond=0
-        )
-
-        fin_dia_ar = inicio_dia_ar + timedelta(days=1)
-
-        inicio_utc = inicio_dia_ar.astimezone(timezone.utc)
-        fin_utc = fin_dia_ar.astimezone(timezone.utc)
-
-        ingreso = (
-            asistencias_empresa()
-            .filter(
-                Asistencia.empleado_id == emp.id,
-                Asistencia.tipo == "INGRESO",
-                Asistencia.fecha_hora >= inicio_utc,
-                Asistencia.fecha_hora < fin_utc
-            )
-            .first()
-        )
-
-        # si ya ingresó → no es pendiente
-        if ingreso:
-            continue
-
-        pendientes.append({
-            "nombre": f"{emp.apellido} {emp.nombre}",
-            "hora": turno["inicio"].strftime("%H:%M")
-        })
+    if current_user.rol == "empleado":
+        return dashboard_empleado()
 
     # ==========================================
-    # 📈 HORAS POR DÍA (GRÁFICO)
+    # RESTO DE ROLES (SNAPSHOT CACHEADO)
     # ==========================================
 
-    horas_por_dia = defaultdict(int)
-    ultimo_ingreso = {}
+    sucursal_id = request.args.get("sucursal_id", type=int)
 
-    for a in asistencias_mes:
+    snapshot = obtener_snapshot_dashboard(
+        current_user.empresa_id,
+        sucursal_id
+    )
+
+    return render_template(
+        'dashboard.html',
+        **snapshot
+    )
 
-        fecha = a.fecha_hora.date()
 
-        if a.tipo == 'INGRESO':
-            ultimo_ingreso[a.empleado_id] = a.fecha_hora
+# ==========================================
+# DASHBOARD JSON (MONITORES / APP MÓVIL)
+# ==========================================
+@main_bp.route('/api/dashboard')
+@login_required
+@admin_o_supervisor
+def dashboard_api():
 
-        elif a.tipo == 'SALIDA' and a.empleado_id in ultimo_ingreso:
+    sucursal_id = request.args.get("sucursal_id", type=int)
 
-            delta = (a.fecha_hora - ultimo_ingreso[a.empleado_id]).total_seconds()
-            horas_por_dia[fecha] += delta
-            ultimo_ingreso.pop(a.empleado_id)
+    etag = etag_dashboard(current_user.empresa_id, sucursal_id)
 
-    labels = []
-    data = []
+    # 🔁 sin cambios → 304 sin recalcular ni serializar
+    if request.if_none_match.contains(etag):
+        respuesta = Response(status=304)
+        respuesta.set_etag(etag)
+        respuesta.headers["Cache-Control"] = "private, no-cache"
+        return respuesta
 
-    for dia in sorted(horas_por_dia.keys()):
+    snapshot = obtener_snapshot_dashboard(
+        current_user.empresa_id,
+        sucursal_id
+    )
 
-        labels.append(dia.strftime("%d/%m"))
-        data.append(round(horas_por_dia[dia] / 3600, 2))
+    respuesta = jsonify(snapshot_a_json(snapshot))
+    respuesta.set_etag(etag)
+    respuesta.headers["Cache-Control"] = "private, no-cache"
 
-    # ==========================================
-    # 👤 EMPLEADOS SEGÚN ROL
-    # ==========================================
+    return respuesta
 
 
-    # ==========================================
-    # RESTO DE ROLES
-    # ==========================================
+def dashboard_empleado():
 
-    empleados = Empleado.query.filter_by(
-        empresa_id=current_user.empresa_id,
-        activo=True
-    ).all()
+    tz_local = zona_empresa()
 
+    ahora = datetime.now(tz_local)
+    hoy = ahora.date()
 
+    empleado = current_user.empleado
 
     # ==========================================
-    # ESTADO ACTUAL DEL PERSONAL
+    # 📲 ÚLTIMOS FICHAJES
     # ==========================================
 
-    subquery = (
-        db.session.query(
-            Asistencia.empleado_id,
-            func.max(Asistencia.fecha_hora).label("ultima_fecha")
-        )
-        .filter(
-            Asistencia.empresa_id == current_user.empresa_id
-        )
-        .group_by(Asistencia.empleado_id)
-        .subquery()
-    )
-
-    ultimos_registros = (
-        db.session.query(Asistencia)
-        .join(
-            subquery,
-            (Asistencia.empleado_id == subquery.c.empleado_id) &
-            (Asistencia.fecha_hora == subquery.c.ultima_fecha)
+    ultimos_fichajes = (
+        Asistencia.query
+        .filter_by(
+            empresa_id=current_user.empresa_id,
+            empleado_id=empleado.id
         )
+        .order_by(Asistencia.fecha_hora.desc())
+        .limit(10)
         .all()
     )
 
-    registro_dict = {r.empleado_id: r for r in ultimos_registros}
-
-
     # ==========================================
-    # DASHBOARD EMPLEADO
+    # 📅 ASISTENCIAS SOLO DEL EMPLEADO
     # ==========================================
 
-    if current_user.rol == "empleado":
-
-        empleado = current_user.empleado
-
-        # ==========================================
-        # 📲 ÚLTIMOS FICHAJES
-        # ==========================================
-
-        ultimos_fichajes = (
-            Asistencia.query
-            .filter_by(
-                empresa_id=current_user.empresa_id,
-                empleado_id=empleado.id
-            )
-            .order_by(Asistencia.fecha_hora.desc())
-            .limit(10)
-            .all()
-        )
-
-        # ==========================================
-        # DASHBOARD EMPLEADO
-        # ==========================================
-
-        if current_user.rol == "empleado":
-
-            empleado = current_user.empleado
-
-            # ==========================================
-            # 📅 ASISTENCIAS SOLO DEL EMPLEADO
-            # ==========================================
-
-            asistencias_empleado = (
-                Asistencia.query
-                .filter(
-                    Asistencia.empresa_id == current_user.empresa_id,
-                    Asistencia.empleado_id == empleado.id,
-                    Asistencia.fecha_hora >= primer_dia_mes
-                )
-                .order_by(Asistencia.fecha_hora)
-                .all()
-            )
-
-            # ==========================================
-            # ⏱ HORAS DEL MES
-            # ==========================================
-
-            total_segundos_emp = 0
-            ultimo_ingreso_emp = None
-
-            for a in asistencias_empleado:
-
-                if a.tipo == "INGRESO":
-                    ultimo_ingreso_emp = a.fecha_hora
-
-                elif a.tipo == "SALIDA" and ultimo_ingreso_emp:
-
-                    delta = (
-                            a.fecha_hora - ultimo_ingreso_emp
-                    ).total_seconds()
-
-                    total_segundos_emp += delta
-
-                    ultimo_ingreso_emp = None
-
-            horas_emp = int(total_segundos_emp // 3600)
-            minutos_emp = int((total_segundos_emp % 3600) // 60)
-
-            horas_mes_empleado = f"{horas_emp:02d}:{minutos_emp:02d}"
-
-            # ==========================================
-            # 📈 GRÁFICO INDIVIDUAL
-            # ==========================================
-
-            horas_por_dia_emp = defaultdict(int)
-
-            ultimo_ingreso_emp = None
-
-            for a in asistencias_empleado:
-
-                fecha = a.fecha_hora.date()
-
-                if a.tipo == "INGRESO":
-                    ultimo_ingreso_emp = a.fecha_hora
-
-                elif a.tipo == "SALIDA" and ultimo_ingreso_emp:
-
-                    delta = (
-                            a.fecha_hora - ultimo_ingreso_emp
-                    ).total_seconds()
-
-                    horas_por_dia_emp[fecha] += delta
-
-                    ultimo_ingreso_emp = None
-
-            labels_emp = []
-            data_emp = []
-
-            for dia in sorted(horas_por_dia_emp.keys()):
-                labels_emp.append(dia.strftime("%d/%m"))
-
-                data_emp.append(
-                    round(horas_por_dia_emp[dia] / 3600, 2)
-                )
-
-            # ==========================================
-            # 🟢 ESTADO ACTUAL
-            # ==========================================
-
-            estado_actual = "sin_registro"
-            hora_estado = None
-
-            registro = registro_dict.get(empleado.id)
-
-            if registro:
-                estado_actual = (
-                    "ingreso"
-                    if registro.tipo == "INGRESO"
-                    else "salida"
-                )
-
-                hora_estado = (
-                    registro.fecha_hora
-                    .astimezone(tz_ar)
-                    .strftime("%H:%M")
-                )
-
-            return render_template(
-                'dashboard_empleado.html',
-
-                empleado=empleado,
-
-                fecha_hoy=hoy,
-
-                horas_mes=horas_mes_empleado,
-
-                chart_labels=labels_emp,
-                chart_data=data_emp,
-
-                estado_actual=estado_actual,
-                hora_estado=hora_estado,
-                ultimos_fichajes=ultimos_fichajes
-            )
-
-    empleados_estado = []
-
-    for emp in empleados:
-
-        registro = registro_dict.get(emp.id)
-
-        if registro:
-
-            estado = "ingreso" if registro.tipo == "INGRESO" else "salida"
-
-            hora_ar = registro.fecha_hora.astimezone(tz_ar)
-
-            empleados_estado.append({
-                "nombre": f"{emp.apellido} {emp.nombre}",
-                "estado": estado,
-                "hora": hora_ar.strftime("%H:%M")
-            })
-
-        else:
-
-            empleados_estado.append({
-                "nombre": f"{emp.apellido} {emp.nombre}",
-                "estado": "sin_registro",
-                "hora": None
-            })
-
-    orden_prioridad = {
-        "ingreso": 0,
-        "sin_registro": 1,
-        "salida": 2
-    }
+    primer_dia_mes = ahora.replace(
+        day=1,
+        hour=0,
+        minute=0,
+        second=0,
+        microsecond=0
+    )
 
-    empleados_estado.sort(key=lambda x: orden_prioridad[x["estado"]])
+    horas_empleado = horas_por_dia_rollup(
+        current_user.empresa_id,
+        primer_dia_mes.date(),
+        empleado_id=empleado.id
+    )
 
     # ==========================================
-    # 👷 LISTA DE QUIENES ESTÁN TRABAJANDO
+    # ⏱ HORAS DEL MES
     # ==========================================
 
-    empleados_trabajando = [
-        emp for emp in empleados_estado
-        if emp["estado"] == "ingreso"
-    ]
+    horas_mes_empleado = formatear_hhmm(horas_empleado["total"])
 
     # ==========================================
-    # ⚠ LLEGADAS TARDE HOY
+    # 📈 GRÁFICO INDIVIDUAL
     # ==========================================
 
-    inicio_dia_ar = datetime.now(tz_ar).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    )
-
-    fin_dia_ar = inicio_dia_ar + timedelta(days=1)
-
-    inicio_utc = inicio_dia_ar.astimezone(timezone.utc)
-    fin_utc = fin_dia_ar.astimezone(timezone.utc)
-
-    alertas_tarde = (
-        db.session.query(AuditLog)
-        .filter(
-            AuditLog.empresa_id == current_user.empresa_id,
-            AuditLog.entidad == "PUNTUALIDAD",
-            AuditLog.created_at >= inicio_utc,
-            AuditLog.created_at < fin_utc
-        )
-        .order_by(AuditLog.created_at.desc())
-        .all()
-    )
+    labels_emp, data_emp = serie_por_dia(horas_empleado["por_dia"])
 
     # ==========================================
-    # 📍 EMPLEADOS POR SUCURSAL (KIOSCO)
+    # 🟢 ESTADO ACTUAL
     # ==========================================
 
-    from app.models import Sucursal
-
-    # Traer sucursales
-    sucursales = Sucursal.query.filter_by(
-        empresa_id=current_user.empresa_id,
-        activa=True
-    ).all()
+    estado_actual = "sin_registro"
+    hora_estado = None
 
-    # Inicializar estructura
-    sucursales_data = {s.id: {
-        "nombre": s.nombre,
-        "empleados": []
-    } for s in sucursales}
+    registro = ultimos_fichajes[0] if ultimos_fichajes else None
 
-    # Usamos los últimos registros (ya calculados arriba)
-    for emp in empleados:
+    if registro:
+        estado_actual = (
+            "ingreso"
+            if registro.tipo == "INGRESO"
+            else "salida"
+        )
 
-        registro = registro_dict.get(emp.id)
+        hora_estado = (
+            registro.fecha_hora
+            .astimezone(tz_local)
+            .strftime("%H:%M")
+        )
 
-        if not registro or not registro.sucursal_id:
-            continue
+    return render_template(
+        'dashboard_empleado.html',
 
-        estado = "ACTIVO" if registro.tipo == "INGRESO" else "FUERA"
+        empleado=empleado,
 
-        hora_ar = registro.fecha_hora.astimezone(tz_ar)
+        fecha_hoy=hoy,
 
-        sucursal_id = registro.sucursal_id
+        horas_mes=horas_mes_empleado,
 
-        if sucursal_id in sucursales_data:
-            sucursales_data[sucursal_id]["empleados"].append({
-                "nombre": f"{emp.apellido} {emp.nombre}",
-                "estado": estado,
-                "hora": hora_ar.strftime("%H:%M")
-            })
+        chart_labels=labels_emp,
+        chart_data=data_emp,
 
-    return render_template(
-        'dashboard.html',
-        total_empleados=total_empleados,
-        asistencias_hoy=asistencias_hoy,
-        trabajando=trabajando,
-        horas_mes=horas_mes,
-        chart_labels=labels,
-        chart_data=data,
-        fecha_hoy=hoy,
-        empleados_estado=empleados_estado,
-        empleados_trabajando=empleados_trabajando,
-        alertas_tarde=alertas_tarde,
-        pendientes=pendientes,
-        sucursales_data=sucursales_data
-    )
\ No newline at end of file
+        estado_actual=estado_actual,
+        hora_estado=hora_estado,
+        ultimos_fichajes=ultimos_fichajes
+    )
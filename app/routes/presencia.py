@@ -0,0 +1,190 @@
+import json
+import queue
+import threading
+from flask import Blueprint, render_template, request, jsonify, Response, current_app
+from flask_login import login_required, current_user
+from app.roles import admin_o_supervisor
+from app.models import Sucursal
+from app.services.presencia_service import estado_presencia
+from app.services.presencia_hub import hub, iniciar_listener, ahora_ms, CERRADA
+
+
+presencia_bp = Blueprint(
+    "presencia",
+    __name__,
+    url_prefix="/presencia"
+)
+
+# segundos entre comentarios keep-alive del stream
+KEEPALIVE_SEGUNDOS = 15
+
+# cada stream (y cada long-poll en espera) ocupa un thread
+# de gunicorn mientras está abierto: se limita por proceso
+# (PRESENCIA_MAX_STREAMS) para que las pantallas no dejen
+# sin threads al resto
+_streams_lock = threading.Lock()
+_streams_abiertos = 0
+
+
+def _tomar_stream():
+
+    global _streams_abiertos
+
+    with _streams_lock:
+
+        if _streams_abiertos >= current_app.config["PRESENCIA_MAX_STREAMS"]:
+            return False
+
+        _streams_abiertos += 1
+        return True
+
+
+def _liberar_stream():
+
+    global _streams_abiertos
+
+    with _streams_lock:
+        _streams_abiertos -= 1
+
+
+# ==========================================
+# TABLERO EN VIVO (PANTALLAS DE SUCURSAL)
+# ==========================================
+@presencia_bp.route("/")
+@login_required
+@admin_o_supervisor
+def tablero():
+
+    sucursales = Sucursal.query.filter_by(
+        empresa_id=current_user.empresa_id,
+        activa=True
+    ).all()
+
+    return render_template(
+        "presencia_tablero.html",
+        sucursales=sucursales,
+        sucursal_id=request.args.get("sucursal_id", type=int)
+    )
+
+
+# ==========================================
+# FOTO INICIAL
+# ==========================================
+@presencia_bp.route("/estado")
+@login_required
+@admin_o_supervisor
+def estado():
+
+    sucursal_id = request.args.get("sucursal_id", type=int)
+
+    return jsonify({
+        "seq": ahora_ms(),
+        "empleados": estado_presencia(current_user.empresa_id, sucursal_id)
+    })
+
+
+# ==========================================
+# STREAM SSE DE CAMBIOS
+# ==========================================
+@presencia_bp.route("/stream")
+@login_required
+@admin_o_supervisor
+def stream():
+
+    iniciar_listener(current_app._get_current_object())
+
+    if not _tomar_stream():
+        # sin cupo: el tablero refresca la foto y reintenta
+        return Response(
+            "Sin cupo para más streams",
+            status=503,
+            headers={"Retry-After": "30"}
+        )
+
+    empresa_id = current_user.empresa_id
+    sucursal_id = request.args.get("sucursal_id", type=int)
+
+    cola = hub.suscribir(empresa_id)
+
+    def eventos():
+
+        try:
+            yield "retry: 3000\n\n"
+
+            while True:
+
+                try:
+                    evento = cola.get(timeout=KEEPALIVE_SEGUNDOS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if evento is CERRADA:
+                    # el hub lo descartó por no consumir: se
+                    # perdieron eventos, el tablero recarga la
+                    # foto y se vuelve a conectar
+                    yield "event: reiniciar\ndata: {}\n\n"
+                    return
+
+                if sucursal_id and evento.get("sucursal_id") != sucursal_id:
+                    continue
+
+                yield (
+                    f"id: {evento['seq']}\n"
+                    f"event: presencia\n"
+                    f"data: {json.dumps(evento)}\n\n"
+                )
+
+        finally:
+            hub.desuscribir(empresa_id, cola)
+
+    respuesta = Response(
+        eventos(),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+    # se libera al cerrar la respuesta, aunque el generador
+    # no llegue a arrancar
+    respuesta.call_on_close(_liberar_stream)
+
+    return respuesta
+
+
+# ==========================================
+# LONG-POLL (FALLBACK SIN SSE)
+# ==========================================
+@presencia_bp.route("/poll")
+@login_required
+@admin_o_supervisor
+def poll():
+
+    iniciar_listener(current_app._get_current_object())
+
+    # la espera ocupa un thread igual que un stream: mismo cupo
+    if not _tomar_stream():
+        return Response(
+            "Sin cupo para más conexiones en vivo",
+            status=503,
+            headers={"Retry-After": "30"}
+        )
+
+    desde = request.args.get("desde", 0, type=int)
+    sucursal_id = request.args.get("sucursal_id", type=int)
+
+    try:
+        eventos, seq = hub.esperar_desde(
+            current_user.empresa_id,
+            desde,
+            sucursal_id=sucursal_id
+        )
+    finally:
+        _liberar_stream()
+
+    return jsonify({
+        "seq": seq,
+        "eventos": eventos
+    })
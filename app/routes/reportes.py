@@ -1,16 +1,39 @@
-from flask import Blueprint, render_template, request, send_file
-from datetime import datetime, timedelta, timezone
-from collections import defaultdict
+from flask import Blueprint, render_template, request, current_app, jsonify, url_for, abort, send_file
+from datetime import MAXYEAR, MINYEAR, datetime, timedelta, timezone
 from flask_login import login_required, current_user
 from app.services.excel_export import (
     exportar_reporte_mensual_excel,
-    exportar_detalle_empleado_excel
+    exportar_detalle_empleado_excel,
+    enviar_excel,
+    MIMETYPE_XLSX
 )
 from app.roles import admin_o_supervisor
 from app.models import Empleado, Asistencia, db, Sucursal, HorarioEmpleado
 from app.multitenant import empleados_empresa, asistencias_empresa
-from zoneinfo import ZoneInfo
+from app.services.calendario_service import zona_empresa, limites_mes
 from app.utils.evaluacion import evaluar_dia
+from app.services.horas_service import formatear_hhmm
+from app.services.bloques_service import emparejar_bloques, bloque_en_rango
+from app.services.reporte_mensual_service import (
+    rango_reporte_mensual,
+    resumen_mensual,
+    resumen_mensual_json
+)
+from app.services.version_datos_service import version_datos
+from app.services.exportacion_service import (
+    encolar_exportacion_mensual,
+    leer_trabajo,
+    rutas_trabajo,
+    ESTADO_LISTO
+)
+from app.services.reporte_cache_service import obtener_reporte, empleado_resumen
+from app.services.rollup_service import resumen_dia_rollup
+from app.services.cierre_service import detalle_desde_cierres
+from app.services.intervalos_service import plan_vs_trabajado_mes, CAMPOS_SUMA
+from app.services.cumplimiento_service import (
+    matriz_cumplimiento,
+    ESTADOS_CUMPLIMIENTO
+)
 
 
 MESES_ES = [
@@ -34,18 +57,9 @@ def index():
 # =========================================================
 # 🧠 HELPERS (CLAVE PARA TODO)
 # =========================================================
-def obtener_rango_mes(year, month, tz_ar):
-    inicio_mes_ar = datetime(year, month, 1, tzinfo=tz_ar)
-
-    if month == 12:
-        fin_mes_ar = datetime(year + 1, 1, 1, tzinfo=tz_ar)
-    else:
-        fin_mes_ar = datetime(year, month + 1, 1, tzinfo=tz_ar)
-
-    inicio_utc = inicio_mes_ar.astimezone(timezone.utc)
-    fin_utc = fin_mes_ar.astimezone(timezone.utc)
-
-    return inicio_utc, fin_utc
+def obtener_rango_mes(year, month, tz_local):
+    # límites cacheados por (zona, año, mes)
+    return limites_mes(tz_local.key, year, month)
 
 def obtener_asistencias_mes(empleado_id, inicio_utc, fin_utc):
     buffer_inicio = inicio_utc - timedelta(hours=12)
@@ -62,37 +76,10 @@ def obtener_asistencias_mes(empleado_id, inicio_utc, fin_utc):
         .all()
     )
 
-def procesar_bloques(registros, tz_ar, desde=None, hasta=None):
-
-    bloques = []
-    ingreso = None
-
-    for r in registros:
-
-        fecha_local = r.fecha_hora.astimezone(tz_ar)
+def procesar_bloques(registros, tz_local, desde=None, hasta=None):
 
-        if r.tipo == "INGRESO":
-            ingreso = fecha_local
-
-        elif r.tipo == "SALIDA" and ingreso:
-
-            bloques.append({
-                "fecha": ingreso.date(),
-                "ingreso": ingreso,
-                "salida": fecha_local,
-                "actividad": r.actividad or "-"
-            })
-
-            ingreso = None
-
-    # ingreso sin salida (real)
-    if ingreso:
-        bloques.append({
-            "fecha": ingreso.date(),
-            "ingreso": ingreso,
-            "salida": None,
-            "actividad": "-"
-        })
+    # emparejado compartido con el motor en streaming
+    bloques = list(emparejar_bloques(registros, tz_local))
 
     # 🔥 FILTRAR BIEN POR MES
     bloques_mes = []
@@ -148,146 +135,90 @@ def procesar_bloques(registros, tz_ar, desde=None, hasta=None):
 
     return resultado
 
-# =========================================================
-# REPORTE MENSUAL
-# =========================================================
-@reportes_bp.route('/mensual')
-@login_required
-@admin_o_supervisor
-def reporte_mensual():
-
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
-    fecha_desde = request.args.get("desde")
-    fecha_hasta = request.args.get("hasta")
-    hoy = datetime.now(tz_ar)
-
+def parametros_reporte_mensual():
 
+    """
+    Rango, filtros y modo del reporte mensual a partir de
+    los query args (desde/hasta o year/month). Solo datos
+    simples: se pasan también a otro proceso (exportación
+    en segundo plano).
+    """
 
+    tz_nombre = zona_empresa().key
 
-    # 👉 si no vienen fechas, usar mes actual
-    if not fecha_desde or not fecha_hasta:
-        desde = datetime(hoy.year, hoy.month, 1, tzinfo=tz_ar)
+    rango = rango_reporte_mensual(
+        tz_nombre,
+        request.args.get("desde"),
+        request.args.get("hasta"),
+        request.args.get("year", type=int),
+        request.args.get("month", type=int)
+    )
 
-        if hoy.month == 12:
-            hasta = datetime(hoy.year + 1, 1, 1, tzinfo=tz_ar)
-        else:
-            hasta = datetime(hoy.year, hoy.month + 1, 1, tzinfo=tz_ar)
+    return dict(
+        rango,
+        empresa_id=current_user.empresa_id,
+        empresa_nombre=current_user.empresa.nombre,
+        tz_nombre=tz_nombre,
+        sucursal_id=request.args.get("sucursal_id", type=int),
+        modo=request.args.get("modo") or current_app.config.get(
+            "REPORTE_MENSUAL_MODO", "rollup"
+        )
+    )
 
-    else:
-        desde = datetime.strptime(fecha_desde, "%Y-%m-%d").replace(tzinfo=tz_ar)
-        hasta = datetime.strptime(fecha_hasta, "%Y-%m-%d").replace(tzinfo=tz_ar) + timedelta(days=1)
 
+def resumen_desde_parametros(params):
 
+    return resumen_mensual(
+        params["empresa_id"],
+        params["tz_nombre"],
+        params["desde"],
+        params["hasta"],
+        params["sucursal_id"],
+        params["modo"]
+    )
 
-    inicio_utc = desde.astimezone(timezone.utc)
-    fin_utc = hasta.astimezone(timezone.utc)
+# =========================================================
+# REPORTE MENSUAL
+# =========================================================
+@reportes_bp.route('/mensual')
+@login_required
+@admin_o_supervisor
+def reporte_mensual():
 
-    nombre_mes = f"{desde.strftime('%d/%m')} - {hasta.strftime('%d/%m')}"
+    params = parametros_reporte_mensual()
 
-    sucursal_id = request.args.get('sucursal_id', type=int)
+    resumen = resumen_desde_parametros(params)
 
     sucursales = Sucursal.query.filter_by(
         empresa_id=current_user.empresa_id
     ).all()
 
-
-    empleados = empleados_empresa()
-
-    if sucursal_id:
-        empleados = empleados.filter_by(sucursal_id=sucursal_id)
-
-    empleados = empleados.all()
-    empleados_ids = [e.id for e in empleados]
-
-    asistencias = (
-        asistencias_empresa()
-        .filter(
-            Asistencia.fecha_hora >= inicio_utc - timedelta(hours=12),
-            Asistencia.fecha_hora < fin_utc + timedelta(hours=12),
-            Asistencia.empleado_id.in_(empleados_ids)
-        )
-        .order_by(Asistencia.fecha_hora)
-        .all()
-    )
-
-    registros_por_empleado = defaultdict(list)
-
-    for a in asistencias:
-        registros_por_empleado[a.empleado_id].append(a)
-    resumen = []
-
-    for empleado_id, registros in registros_por_empleado.items():
-
-        empleado = registros[0].empleado
-
-        bloques_raw = procesar_bloques(registros, tz_ar, None)
-
-        bloques = []
-
-        for b in bloques_raw:
-            fecha_ingreso = b["ingreso"].date()
-            fecha_salida = b["salida"].date() if b["salida"] else None
-
-            if (
-                    (desde.date() <= fecha_ingreso < hasta.date()) or
-                    (fecha_salida and desde.date() <= fecha_salida < hasta.date())
-            ):
-                bloques.append(b)
-        total_segundos = sum(
-            (b["salida"] - b["ingreso"]).total_seconds()
-            for b in bloques if b["salida"]
-        )
-
-        if total_segundos > 0:
-            horas = int(total_segundos // 3600)
-            minutos = int((total_segundos % 3600) // 60)
-
-            estado = "OK"
-
-            if any(b["estado"] == "INCOMPLETO" for b in bloques):
-                estado = "INCOMPLETO"
-
-            resumen.append({
-                "empleado": empleado,
-                "empleado_id": empleado.id,
-                "horas": f"{horas:02d}:{minutos:02d}",
-                "dias": len(set(b["fecha"] for b in bloques)),
-                "estado": estado
-            })
-
-    resumen.sort(key=lambda x: x["empleado"].apellido)
-
-    # ==========================================
-    # ⏱ TOTAL GENERAL DEL REPORTE
-    # ==========================================
-
-    total_segundos_general = 0
-
-    for r in resumen:
-
-        horas, minutos = r["horas"].split(":")
-        total_segundos_general += (
-            int(horas) * 3600 +
-            int(minutos) * 60
-        )
-
-    total_horas = int(total_segundos_general // 3600)
-    total_minutos = int((total_segundos_general % 3600) // 60)
-
-    total_general = f"{total_horas:02d}:{total_minutos:02d}"
-
     return render_template(
         "reporte_mensual.html",
-        resumen=resumen,
+        resumen=resumen["filas"],
         year=None,
         month=None,
-        nombre_mes=nombre_mes,
+        nombre_mes=params["nombre_mes"],
         sucursales=sucursales,
-        sucursal_id=sucursal_id,
-        total_general=total_general
+        sucursal_id=params["sucursal_id"],
+        total_general=resumen["total_general"]
     )
 
 
+@reportes_bp.route('/api/mensual')
+@login_required
+@admin_o_supervisor
+def reporte_mensual_api():
+
+    params = parametros_reporte_mensual()
+
+    return jsonify(resumen_mensual_json(
+        resumen_desde_parametros(params),
+        params,
+        params["sucursal_id"]
+    ))
+
+
 # =========================================================
 # DETALLE MENSUAL EMPLEADO
 # =========================================================
@@ -296,7 +227,7 @@ def reporte_mensual():
 @admin_o_supervisor
 def detalle_mensual_empleado(empleado_id):
 
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
+    tz_local = zona_empresa()
     empleado = empleados_empresa().filter_by(id=empleado_id).first_or_404()
     fecha_desde = request.args.get("desde")
     fecha_hasta = request.args.get("hasta")
@@ -304,27 +235,34 @@ def detalle_mensual_empleado(empleado_id):
     if not fecha_desde or not fecha_hasta:
         return "Debe seleccionar desde y hasta", 400
 
-    desde = datetime.strptime(fecha_desde, "%Y-%m-%d").replace(tzinfo=tz_ar)
-    hasta = datetime.strptime(fecha_hasta, "%Y-%m-%d").replace(tzinfo=tz_ar) + timedelta(days=1)
+    desde = datetime.strptime(fecha_desde, "%Y-%m-%d").replace(tzinfo=tz_local)
+    hasta = datetime.strptime(fecha_hasta, "%Y-%m-%d").replace(tzinfo=tz_local) + timedelta(days=1)
 
     inicio_utc = desde.astimezone(timezone.utc)
     fin_utc = hasta.astimezone(timezone.utc)
 
-    registros = obtener_asistencias_mes(empleado_id, inicio_utc, fin_utc)
+    def calcular_detalle():
 
-    detalle_raw = procesar_bloques(registros, tz_ar, None)
+        registros = obtener_asistencias_mes(empleado_id, inicio_utc, fin_utc)
 
-    detalle = []
+        return [
+            d for d in procesar_bloques(registros, tz_local, None)
+            if bloque_en_rango(d, desde.date(), hasta.date())
+        ]
 
-    for d in detalle_raw:
-        fecha_ingreso = d["ingreso"].date()
-        fecha_salida = d["salida"].date() if d["salida"] else None
+    # meses cerrados: bloques congelados del cierre
+    detalle = detalle_desde_cierres(
+        current_user.empresa_id, empleado_id, desde.date(), hasta.date()
+    )
 
-        if (
-                (desde.date() <= fecha_ingreso < hasta.date()) or
-                (fecha_salida and desde.date() <= fecha_salida < hasta.date())
-        ):
-            detalle.append(d)
+    if detalle is None:
+        detalle = obtener_reporte(
+            current_user.empresa_id,
+            "detalle",
+            (desde.date(), hasta.date(), empleado_id),
+            None,
+            calcular_detalle
+        )
 
     # ==========================================
     # ⏱ TOTAL HORAS EMPLEADO
@@ -334,12 +272,13 @@ def detalle_mensual_empleado(empleado_id):
 
         (
             (d["salida"] - d["ingreso"]).total_seconds()
+            if d["salida"]
+            # ajustes de un mes cerrado
+            else d.get("ajuste", 0)
         )
 
         for d in detalle
 
-        if d["salida"]
-
     )
 
     horas_total = int(total_segundos // 3600)
@@ -366,101 +305,107 @@ def detalle_mensual_empleado(empleado_id):
 @admin_o_supervisor
 def exportar_mensual_excel():
 
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
+    params = parametros_reporte_mensual()
 
-    hoy = datetime.now(tz_ar)
+    resumen = resumen_desde_parametros(params)
 
-    fecha_desde = request.args.get("desde")
-    fecha_hasta = request.args.get("hasta")
+    nombre = params["nombre_archivo"]
 
-    if fecha_desde and fecha_hasta:
-        desde = datetime.strptime(fecha_desde, "%Y-%m-%d").replace(tzinfo=tz_ar)
-        hasta = datetime.strptime(fecha_hasta, "%Y-%m-%d").replace(tzinfo=tz_ar) + timedelta(days=1)
+    ruta = exportar_reporte_mensual_excel(
+        params["empresa_nombre"],
+        nombre,
+        resumen["filas"],
+        total_general=resumen["total_general"]
+    )
 
-        inicio_utc = desde.astimezone(timezone.utc)
-        fin_utc = hasta.astimezone(timezone.utc)
+    return enviar_excel(ruta, f"reporte_{nombre}.xlsx")
 
-        nombre = f"{desde.strftime('%d-%m')}__{hasta.strftime('%d-%m')}"
 
-    else:
-        year = request.args.get('year', hoy.year, type=int)
-        month = request.args.get('month', hoy.month, type=int)
+# =========================================================
+# EXPORTACIÓN MENSUAL EN SEGUNDO PLANO
+# =========================================================
+def estado_exportacion_json(estado):
+
+    datos = {
+        "job_id": estado["job_id"],
+        "estado": estado["estado"],
+        "url_estado": url_for(
+            "reportes.estado_exportacion",
+            job_id=estado["job_id"]
+        )
+    }
 
-        inicio_utc, fin_utc = obtener_rango_mes(year, month, tz_ar)
-        nombre = f"{month}_{year}"
+    if estado["estado"] == ESTADO_LISTO:
+        datos["descarga"] = url_for(
+            "reportes.descargar_exportacion",
+            job_id=estado["job_id"]
+        )
 
-    # 🔥 TRAER DATOS
-    sucursal_id = request.args.get("sucursal_id", type=int)
-    asistencias = obtener_asistencias_mes(None, inicio_utc, fin_utc)
-    if sucursal_id:
-        asistencias = [
-            a for a in asistencias
-            if a.sucursal_id == sucursal_id
-        ]
+    if estado.get("error"):
+        datos["error"] = estado["error"]
 
-    # 🔥 AGRUPAR BIEN (FIX REAL)
-    registros_por_empleado = defaultdict(list)
+    return datos
 
-    for a in asistencias:
-        registros_por_empleado[a.empleado_id].append(a)
 
-    resumen = []
+@reportes_bp.route('/mensual/excel/encolar', methods=['POST'])
+@login_required
+@admin_o_supervisor
+def encolar_mensual_excel():
 
-    for empleado_id, registros in registros_por_empleado.items():
+    """
+    Encola la exportación (mismos query args que
+    /mensual/excel). Pedidos iguales de la misma empresa
+    comparten el trabajo mientras no cambien los datos.
+    """
 
-        empleado = registros[0].empleado
+    params = parametros_reporte_mensual()
 
-        bloques_raw = procesar_bloques(registros, tz_ar, None)
+    estado = encolar_exportacion_mensual(
+        params,
+        version_datos(current_user.empresa_id),
+        current_app.config
+    )
 
-        bloques = []
+    return jsonify(estado_exportacion_json(estado)), 202
 
-        for b in bloques_raw:
 
-            fecha_ingreso = b["ingreso"].astimezone(tz_ar).date()
-            fecha_salida = b["salida"].astimezone(tz_ar).date() if b["salida"] else None
+def trabajo_de_empresa(job_id):
 
-            if fecha_desde and fecha_hasta:
-                if not (
-                    (desde.date() <= fecha_ingreso <= hasta.date()) or
-                    (fecha_salida and desde.date() <= fecha_salida <= hasta.date())
-                ):
-                    continue
+    estado = leer_trabajo(current_app.config["EXPORT_DIR"], job_id)
 
-            bloques.append(b)
+    if not estado or estado["empresa_id"] != current_user.empresa_id:
+        abort(404)
 
-        total_segundos = sum(
-            (b["salida"] - b["ingreso"]).total_seconds()
-            for b in bloques if b["salida"]
-        )
+    return estado
 
-        if bloques:
-            horas = int(total_segundos // 3600)
-            minutos = int((total_segundos % 3600) // 60)
 
-            estado = "OK"
+@reportes_bp.route('/exportaciones/<job_id>')
+@login_required
+@admin_o_supervisor
+def estado_exportacion(job_id):
 
-            if any(b["estado"] == "INCOMPLETO" for b in bloques):
-                estado = "INCOMPLETO"
+    return jsonify(estado_exportacion_json(trabajo_de_empresa(job_id)))
 
-            resumen.append({
-                "empleado": empleado,
-                "empleado_id": empleado.id,
-                "horas": f"{horas:02d}:{minutos:02d}",
-                "dias": len(set(b["fecha"] for b in bloques)),
-                "estado": estado
-            })
 
-    file = exportar_reporte_mensual_excel(
-        current_user.empresa.nombre,
-        nombre,
-        resumen
-    )
+@reportes_bp.route('/exportaciones/<job_id>/descarga')
+@login_required
+@admin_o_supervisor
+def descargar_exportacion(job_id):
 
+    estado = trabajo_de_empresa(job_id)
+
+    if estado["estado"] != ESTADO_LISTO:
+        abort(404)
+
+    _, ruta_archivo = rutas_trabajo(current_app.config["EXPORT_DIR"], job_id)
+
+    # el archivo queda en disco hasta que vence (otros
+    # usuarios pueden descargar el mismo trabajo)
     return send_file(
-        file,
+        ruta_archivo,
         as_attachment=True,
-        download_name=f"reporte_{nombre}.xlsx",
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        download_name=estado["nombre"],
+        mimetype=MIMETYPE_XLSX
     )
 
 
@@ -469,7 +414,7 @@ def exportar_mensual_excel():
 @admin_o_supervisor
 def exportar_detalle_empleado_excel_route(empleado_id):
 
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
+    tz_local = zona_empresa()
     empleado = empleados_empresa().filter_by(id=empleado_id).first_or_404()
 
     fecha_desde = request.args.get("desde")
@@ -478,130 +423,108 @@ def exportar_detalle_empleado_excel_route(empleado_id):
     if not fecha_desde or not fecha_hasta:
         return "Debe seleccionar desde y hasta", 400
 
-    desde = datetime.strptime(fecha_desde, "%Y-%m-%d").replace(tzinfo=tz_ar)
-    hasta = datetime.strptime(fecha_hasta, "%Y-%m-%d").replace(tzinfo=tz_ar) + timedelta(days=1)
+    desde = datetime.strptime(fecha_desde, "%Y-%m-%d").replace(tzinfo=tz_local)
+    hasta = datetime.strptime(fecha_hasta, "%Y-%m-%d").replace(tzinfo=tz_local) + timedelta(days=1)
 
     inicio_utc = desde.astimezone(timezone.utc)
     fin_utc = hasta.astimezone(timezone.utc)
 
-    registros = obtener_asistencias_mes(empleado_id, inicio_utc, fin_utc)
+    def calcular_detalle():
 
-    detalle_base = procesar_bloques(registros, tz_ar, desde, hasta)
+        registros = obtener_asistencias_mes(empleado_id, inicio_utc, fin_utc)
 
-    detalle = []
-    contador = 1
+        return procesar_bloques(registros, tz_local, desde, hasta)
 
-    for d in detalle_base:
-        d["bloque"] = contador
-        detalle.append(d)
-        contador += 1
+    detalle_base = detalle_desde_cierres(
+        current_user.empresa_id, empleado_id, desde.date(), hasta.date()
+    )
 
-    file = exportar_detalle_empleado_excel(
+    if detalle_base is None:
+        detalle_base = obtener_reporte(
+            current_user.empresa_id,
+            "detalle_excel",
+            (desde.date(), hasta.date(), empleado_id),
+            None,
+            calcular_detalle
+        )
+
+    # numerar los bloques a medida que se escriben
+    detalle = (
+        dict(d, bloque=contador)
+        for contador, d in enumerate(detalle_base, 1)
+    )
+
+    ruta = exportar_detalle_empleado_excel(
         current_user.empresa.nombre,
         f"{empleado.apellido}, {empleado.nombre}",
         f"{desde.strftime('%d/%m')} - {hasta.strftime('%d/%m')}",
         detalle
     )
 
-    return send_file(
-        file,
-        as_attachment=True,
-        download_name=f"detalle_{empleado_id}_{desde.strftime('%d%m')}_{hasta.strftime('%d%m')}.xlsx",
-        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    return enviar_excel(
+        ruta,
+        f"detalle_{empleado_id}_{desde.strftime('%d%m')}_{hasta.strftime('%d%m')}.xlsx"
     )
 
 
 # =========================================================
 # REPORTE DIARIO (FIX TOTAL)
 # =========================================================
-@reportes_bp.route('/diario')
-@login_required
-@admin_o_supervisor
-def reporte_diario():
-
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
-
-    fecha = request.args.get("fecha")
-    hoy = datetime.strptime(fecha, "%Y-%m-%d").date() if fecha else datetime.now(tz_ar).date()
-
-    sucursal_id = request.args.get("sucursal_id", type=int)
-
-    inicio_ar = datetime.combine(hoy, datetime.min.time(), tzinfo=tz_ar)
-    fin_ar = inicio_ar + timedelta(days=1)
-
-    inicio_utc = inicio_ar.astimezone(timezone.utc)
-    fin_utc = fin_ar.astimezone(timezone.utc)
-
-    buffer_inicio = inicio_utc - timedelta(hours=12)
-    buffer_fin = fin_utc + timedelta(hours=12)
-
-    query = asistencias_empresa().filter(
-        Asistencia.fecha_hora >= buffer_inicio,
-        Asistencia.fecha_hora < buffer_fin
-    )
-
-    if sucursal_id:
-        query = query.filter(Asistencia.sucursal_id == sucursal_id)
-
-    asistencias = query.order_by(Asistencia.fecha_hora).all()
-
-    registros_por_empleado = defaultdict(list)
-
-    for a in asistencias:
-        fecha_local = a.fecha_hora.astimezone(tz_ar).date()
-
-        if fecha_local != hoy:
-            continue
-
-        # 🔥 asegurar sucursal correcta (doble validación)
-        if sucursal_id and a.sucursal_id != sucursal_id:
-            continue
-
-        registros_por_empleado[a.empleado].append(a)
+def calcular_resumen_diario(empresa_id, fecha, sucursal_id=None):
 
     resumen = []
 
-    for empleado, registros in registros_por_empleado.items():
-
-        bloques = []
-        ingreso = None
-
-        for r in registros:
-            fecha_local = r.fecha_hora.astimezone(tz_ar)
-
-            if r.tipo == "INGRESO":
-                ingreso = fecha_local
-
-            elif r.tipo == "SALIDA" and ingreso:
-                bloques.append((ingreso, fecha_local))
-                ingreso = None
-
-        total_segundos = sum(
-            (salida - ingreso).total_seconds()
-            for ingreso, salida in bloques
-        )
+    # todos los empleados activos: sin fila del rollup, AUSENTE
+    for empleado, dia in resumen_dia_rollup(empresa_id, fecha, sucursal_id):
 
         horas = "00:00"
         estado = "AUSENTE"
 
-        if total_segundos > 0:
-            h = int(total_segundos // 3600)
-            m = int((total_segundos % 3600) // 60)
-            horas = f"{h:02d}:{m:02d}"
+        if dia and dia.segundos > 0:
+            horas = formatear_hhmm(dia.segundos)
             estado = "OK"
 
-        elif ingreso:
+        elif dia and dia.bloque_abierto:
             estado = "INCOMPLETO"
 
         resumen.append({
-            "empleado": empleado,
-            "ingreso": bloques[0][0] if bloques else ingreso,
-            "salida": bloques[-1][1] if bloques else None,
+            "empleado": empleado_resumen(empleado),
+            "ingreso": dia.primer_ingreso if dia else None,
+            "salida": dia.ultima_salida if dia else None,
             "horas": horas,
             "estado": estado,
-            "detalle": f"{len(bloques)} bloque(s)"
+            "detalle": f"{dia.bloques} bloque(s)" if dia else "Sin fichajes"
         })
 
+    resumen.sort(key=lambda x: x["empleado"].apellido)
+
+    return resumen
+
+
+@reportes_bp.route('/diario')
+@login_required
+@admin_o_supervisor
+def reporte_diario():
+
+    tz_local = zona_empresa()
+
+    fecha = request.args.get("fecha")
+    hoy = datetime.strptime(fecha, "%Y-%m-%d").date() if fecha else datetime.now(tz_local).date()
+
+    sucursal_id = request.args.get("sucursal_id", type=int)
+
+    # ==========================================
+    # 📦 EMPLEADOS + SU FILA DEL ROLLUP DEL DÍA
+    # ==========================================
+
+    resumen = obtener_reporte(
+        current_user.empresa_id,
+        "diario",
+        (hoy, hoy + timedelta(days=1)),
+        sucursal_id,
+        lambda: calcular_resumen_diario(current_user.empresa_id, hoy, sucursal_id)
+    )
+
     sucursales = Sucursal.query.filter_by(
         empresa_id=current_user.empresa_id
     ).all()
@@ -621,7 +544,7 @@ def reporte_diario():
 @admin_o_supervisor
 def reporte_diario_detalle(empleado_id):
 
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
+    tz_local = zona_empresa()
 
     fecha = request.args.get("fecha")
 
@@ -630,7 +553,7 @@ def reporte_diario_detalle(empleado_id):
 
     dia = datetime.strptime(fecha, "%Y-%m-%d").date()
 
-    inicio_ar = datetime.combine(dia, datetime.min.time(), tzinfo=tz_ar)
+    inicio_ar = datetime.combine(dia, datetime.min.time(), tzinfo=tz_local)
     fin_ar = inicio_ar + timedelta(days=1)
 
     inicio_utc = inicio_ar.astimezone(timezone.utc)
@@ -655,7 +578,7 @@ def reporte_diario_detalle(empleado_id):
 
     for r in registros:
 
-        fecha_local = r.fecha_hora.astimezone(tz_ar)
+        fecha_local = r.fecha_hora.astimezone(tz_local)
 
         if fecha_local.date() != dia:
             continue
@@ -696,3 +619,139 @@ def reporte_diario_detalle(empleado_id):
         fecha=dia
     )
 
+
+# =========================================================
+# CUMPLIMIENTO DE HORARIOS (EMPLEADOS × DÍAS)
+# =========================================================
+def parametros_cumplimiento():
+
+    """
+    year / month / sucursal_id del request (por defecto el
+    mes actual); un mes o año fuera de rango es un 400.
+    """
+
+    hoy = datetime.now(zona_empresa())
+
+    year = request.args.get("year", hoy.year, type=int)
+    month = request.args.get("month", hoy.month, type=int)
+
+    if not 1 <= month <= 12 or not MINYEAR < year < MAXYEAR:
+        abort(400)
+
+    return (
+        year,
+        month,
+        request.args.get("sucursal_id", type=int)
+    )
+
+
+@reportes_bp.route('/cumplimiento')
+@login_required
+@admin_o_supervisor
+def reporte_cumplimiento():
+
+    year, month, sucursal_id = parametros_cumplimiento()
+
+    matriz = matriz_cumplimiento(
+        current_user.empresa_id,
+        year,
+        month,
+        sucursal_id
+    )
+
+    sucursales = Sucursal.query.filter_by(
+        empresa_id=current_user.empresa_id
+    ).all()
+
+    return render_template(
+        "reporte_cumplimiento.html",
+        matriz=matriz,
+        estados=ESTADOS_CUMPLIMIENTO,
+        year=year,
+        month=month,
+        nombre_mes=f"{MESES_ES[month]} {year}",
+        sucursales=sucursales,
+        sucursal_id=sucursal_id
+    )
+
+
+@reportes_bp.route('/api/cumplimiento')
+@login_required
+@admin_o_supervisor
+def reporte_cumplimiento_api():
+
+    year, month, sucursal_id = parametros_cumplimiento()
+
+    matriz = matriz_cumplimiento(
+        current_user.empresa_id,
+        year,
+        month,
+        sucursal_id
+    )
+
+    return jsonify({
+        "year": year,
+        "month": month,
+        "sucursal_id": sucursal_id,
+        "dias": [d.isoformat() for d in matriz["dias"]],
+        "totales": dict(matriz["totales"]),
+        "empleados": [
+            {
+                "empleado_id": f["empleado"].id,
+                "apellido": f["empleado"].apellido,
+                "nombre": f["empleado"].nombre,
+                "estados": [c["estado"] for c in f["celdas"]],
+                "detalles": [c["detalle"] for c in f["celdas"]],
+                "conteo": dict(f["conteo"])
+            }
+            for f in matriz["filas"]
+        ]
+    })
+
+
+# =========================================================
+# PLAN VS TRABAJADO (HORAS EXTRA / FALTANTES)
+# =========================================================
+@reportes_bp.route('/api/plan_vs_trabajado')
+@login_required
+@admin_o_supervisor
+def plan_vs_trabajado_api():
+
+    """
+    Para liquidación: por empleado y día, segundos
+    planificados, trabajados, solapados, extra, faltantes,
+    llegada tarde y salida anticipada / tardía.
+
+    ?year=&month= fuera de rango → 400 (parametros_cumplimiento).
+    """
+
+    year, month, sucursal_id = parametros_cumplimiento()
+
+    filas = plan_vs_trabajado_mes(
+        current_user.empresa_id,
+        year,
+        month,
+        sucursal_id
+    )
+
+    def redondear(valores):
+        return {campo: int(valores[campo]) for campo in CAMPOS_SUMA}
+
+    return jsonify({
+        "year": year,
+        "month": month,
+        "sucursal_id": sucursal_id,
+        "empleados": [
+            {
+                "empleado_id": f["empleado"].id,
+                "apellido": f["empleado"].apellido,
+                "nombre": f["empleado"].nombre,
+                "totales": redondear(f["totales"]),
+                "dias": [
+                    dict(redondear(d), fecha=d["fecha"].isoformat())
+                    for d in f["dias"]
+                ]
+            }
+            for f in filas
+        ]
+    })
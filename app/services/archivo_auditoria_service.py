@@ -0,0 +1,330 @@
+import gzip
+import json
+import os
+import re
+import unicodedata
+from collections import Counter, namedtuple
+from datetime import datetime, timedelta
+from app.services.auditoria_service import terminos_busqueda
+from app.services.calendario_service import limites_dia, zona
+from app.services.paginacion_service import (
+    POR_PAGINA,
+    codificar_cursor,
+    decodificar_cursor
+)
+from app.services.particiones_auditoria import limites_particion, ruta_archivo
+
+
+# =====================================================
+# LECTURA DE LA AUDITORÍA ARCHIVADA (JSONL.GZ)
+# =====================================================
+#
+# Los meses que `flask auditoria archivar` sacó de la base
+# se leen de <AUDIT_ARCHIVO_DIR>/<empresa_id>/YYYY-MM.jsonl.gz
+# con los mismos filtros y el mismo cursor (fecha, id) que
+# el listado en vivo. Solo se abren los meses del rango.
+
+_RE_ARCHIVO = re.compile(r"^(\d{4})-(\d{2})\.jsonl\.gz$")
+
+# palabras con email / puntos enteros (como terminos_busqueda)
+_RE_PALABRA = re.compile(r"\w+(?:[@.]\w+)*")
+
+UsuarioArchivado = namedtuple("UsuarioArchivado", "id email")
+
+EventoArchivado = namedtuple(
+    "EventoArchivado",
+    "id empresa_id usuario_id usuario accion entidad descripcion ip created_at"
+)
+
+
+def meses_archivados(directorio, empresa_id):
+
+    try:
+        nombres = os.listdir(os.path.join(directorio, str(empresa_id)))
+    except FileNotFoundError:
+        return []
+
+    meses = []
+
+    for nombre in nombres:
+        m = _RE_ARCHIVO.match(nombre)
+        if m:
+            meses.append((int(m.group(1)), int(m.group(2))))
+
+    return sorted(meses)
+
+
+def rango_filtros(tz_nombre, desde=None, hasta=None):
+
+    """
+    Límites UTC de las fechas locales del filtro (hasta
+    inclusive), como en condiciones_auditoria.
+    """
+
+    return (
+        limites_dia(tz_nombre, desde)[0] if desde else None,
+        limites_dia(tz_nombre, hasta)[1] if hasta else None
+    )
+
+
+def meses_en_rango(directorio, empresa_id, inicio=None, fin=None):
+
+    meses = []
+
+    for year, month in meses_archivados(directorio, empresa_id):
+
+        inicio_mes, fin_mes = limites_particion(year, month)
+
+        if (inicio and fin_mes <= inicio) or (fin and inicio_mes >= fin):
+            continue
+
+        meses.append((year, month))
+
+    return meses
+
+
+def normalizar_texto(texto):
+
+    """
+    Minúsculas y sin acentos: "González" → "gonzalez".
+    """
+
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", (texto or "").lower())
+        if not unicodedata.combining(c)
+    )
+
+
+def coincide_texto(evento, terminos):
+
+    """
+    Mismo criterio que buscar_auditoria: cada término es
+    prefijo de alguna palabra de acción, entidad o
+    descripción.
+    """
+
+    contenido = normalizar_texto(
+        f"{evento.accion} {evento.entidad} {evento.descripcion or ''}"
+    )
+    palabras = set(re.findall(r"\w+", contenido)) | set(_RE_PALABRA.findall(contenido))
+
+    return all(
+        any(p.startswith(t) for p in palabras)
+        for t in terminos
+    )
+
+
+def _leer_mes(directorio, empresa_id, year, month):
+
+    with gzip.open(ruta_archivo(directorio, empresa_id, year, month), "rt", encoding="utf-8") as archivo:
+
+        for linea in archivo:
+
+            fila = json.loads(linea)
+
+            yield EventoArchivado(
+                id=fila["id"],
+                empresa_id=fila["empresa_id"],
+                usuario_id=fila["usuario_id"],
+                usuario=(
+                    UsuarioArchivado(fila["usuario_id"], fila["usuario_email"])
+                    if fila["usuario_id"] else None
+                ),
+                accion=fila["accion"],
+                entidad=fila["entidad"],
+                descripcion=fila["descripcion"],
+                ip=fila["ip"],
+                created_at=datetime.fromisoformat(fila["created_at"])
+            )
+
+
+def eventos_archivados(
+    directorio,
+    empresa_id,
+    tz_nombre,
+    entidad=None,
+    accion=None,
+    usuario_id=None,
+    desde=None,
+    hasta=None,
+    meses=None,
+    texto=None
+):
+
+    """
+    Eventos archivados que cumplen los filtros (y el texto
+    buscado, si hay), mes por mes en el orden de `meses`
+    (por defecto: todos los del rango, del más viejo al
+    más nuevo).
+    """
+
+    inicio, fin = rango_filtros(tz_nombre, desde, hasta)
+    terminos = [normalizar_texto(t) for t in terminos_busqueda(texto)]
+
+    if meses is None:
+        meses = meses_en_rango(directorio, empresa_id, inicio, fin)
+
+    for year, month in meses:
+
+        for evento in _leer_mes(directorio, empresa_id, year, month):
+
+            if entidad and evento.entidad != entidad:
+                continue
+            if accion and evento.accion != accion:
+                continue
+            if usuario_id and evento.usuario_id != usuario_id:
+                continue
+            if inicio and evento.created_at < inicio:
+                continue
+            if fin and evento.created_at >= fin:
+                continue
+            if terminos and not coincide_texto(evento, terminos):
+                continue
+
+            yield evento
+
+
+# =====================================================
+# PÁGINA DEL ARCHIVO (MISMO CURSOR QUE EL LISTADO)
+# =====================================================
+def pagina_archivo(
+    directorio,
+    empresa_id,
+    tz_nombre,
+    filtros,
+    antes=None,
+    despues=None,
+    por_pagina=POR_PAGINA,
+    texto=None
+):
+
+    """
+    Igual que pagina_keyset pero sobre los archivos:
+    (filas, cursor_mas_viejas, cursor_mas_nuevas). Con
+    `texto` se recorren los meses buscando los términos
+    (sin índice ni relevancia: del más nuevo al más viejo).
+
+    Los meses no se solapan, así que se recorren desde el
+    cursor hacia afuera y se deja de leer en cuanto el mes
+    completa la página.
+    """
+
+    cursor_antes = decodificar_cursor(antes)
+    cursor_despues = decodificar_cursor(despues)
+
+    hacia_nuevas = bool(cursor_despues and not cursor_antes)
+
+    meses = meses_en_rango(directorio, empresa_id, *rango_filtros(
+        tz_nombre, filtros.get("desde"), filtros.get("hasta")
+    ))
+
+    if not hacia_nuevas:
+        meses.reverse()
+
+    candidatas = []
+
+    for mes in meses:
+
+        for evento in eventos_archivados(
+            directorio, empresa_id, tz_nombre, meses=[mes], texto=texto, **filtros
+        ):
+
+            clave = (evento.created_at, evento.id)
+
+            if hacia_nuevas and clave <= cursor_despues:
+                continue
+            if cursor_antes and clave >= cursor_antes:
+                continue
+
+            candidatas.append(evento)
+
+        if len(candidatas) > por_pagina:
+            break
+
+    candidatas.sort(key=lambda e: (e.created_at, e.id), reverse=not hacia_nuevas)
+    filas = candidatas[:por_pagina]
+
+    if hacia_nuevas:
+        hay_mas_nuevas = len(candidatas) > por_pagina
+        filas.reverse()
+        hay_mas_viejas = True
+    else:
+        hay_mas_viejas = len(candidatas) > por_pagina
+        hay_mas_nuevas = cursor_antes is not None
+
+    if not filas:
+        return [], None, None
+
+    return (
+        filas,
+        codificar_cursor(filas[-1].created_at, filas[-1].id) if hay_mas_viejas else None,
+        codificar_cursor(filas[0].created_at, filas[0].id) if hay_mas_nuevas else None
+    )
+
+
+# =====================================================
+# ESTADÍSTICAS DEL ARCHIVO (SE SUMAN A LAS DE LA BASE)
+# =====================================================
+def _periodo(fecha, tz, agrupar):
+
+    """
+    Mismo corte que date_trunc(timezone(tz, created_at)):
+    fecha local sin zona.
+    """
+
+    local = fecha.astimezone(tz).replace(tzinfo=None)
+
+    if agrupar == "hora":
+        return local.replace(minute=0, second=0, microsecond=0)
+
+    dia = local.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    if agrupar == "semana":
+        return dia - timedelta(days=dia.weekday())
+
+    return dia
+
+
+def sumar_estadisticas_archivo(datos, directorio, empresa_id, tz_nombre, filtros):
+
+    """
+    Agrega a `datos` (resultado de estadisticas_auditoria)
+    los eventos archivados del rango, en una sola lectura.
+    """
+
+    tz = zona(tz_nombre)
+
+    por_accion = Counter({d["accion"]: d["cantidad"] for d in datos["por_accion"]})
+    por_entidad = Counter({d["entidad"]: d["cantidad"] for d in datos["por_entidad"]})
+    por_usuario = Counter({(d["usuario_id"], d["email"]): d["cantidad"] for d in datos["por_usuario"]})
+    serie = Counter({d["periodo"]: d["cantidad"] for d in datos["serie"]})
+
+    for evento in eventos_archivados(directorio, empresa_id, tz_nombre, **filtros):
+
+        por_accion[evento.accion] += 1
+        por_entidad[evento.entidad] += 1
+        por_usuario[(
+            evento.usuario_id,
+            evento.usuario.email if evento.usuario and evento.usuario.email else "-"
+        )] += 1
+        serie[_periodo(evento.created_at, tz, datos["agrupar"]).isoformat()] += 1
+
+    datos["total"] = sum(serie.values())
+    datos["por_accion"] = [
+        {"accion": accion, "cantidad": cantidad}
+        for accion, cantidad in por_accion.most_common()
+    ]
+    datos["por_entidad"] = [
+        {"entidad": entidad, "cantidad": cantidad}
+        for entidad, cantidad in por_entidad.most_common()
+    ]
+    datos["por_usuario"] = [
+        {"usuario_id": usuario_id, "email": email, "cantidad": cantidad}
+        for (usuario_id, email), cantidad in por_usuario.most_common()
+    ]
+    datos["serie"] = [
+        {"periodo": periodo, "cantidad": serie[periodo]}
+        for periodo in sorted(serie)
+    ]
+
+    return datos
@@ -0,0 +1,204 @@
+import re
+from sqlalchemy.orm import joinedload
+from app.models import AuditLog, Usuario, db
+from app.services.calendario_service import limites_dia
+from app.services.paginacion_service import POR_PAGINA
+
+
+# entidades que registra la app (opciones del filtro)
+ENTIDADES_AUDITORIA = [
+    "ASISTENCIA",
+    "CIERRE_MES",
+    "EMPLEADO",
+    "PUESTO",
+    "PUNTUALIDAD",
+    "SISTEMA",
+    "USUARIO"
+]
+
+
+# =====================================================
+# FILTROS DE AUDITORÍA (EN SQL)
+# =====================================================
+def condiciones_auditoria(
+    empresa_id,
+    tz_nombre,
+    entidad=None,
+    accion=None,
+    usuario_id=None,
+    desde=None,
+    hasta=None
+):
+
+    """
+    Condiciones WHERE del listado y de las estadísticas.
+    desde / hasta son fechas locales (hasta inclusive).
+    """
+
+    condiciones = [AuditLog.empresa_id == empresa_id]
+
+    if entidad:
+        condiciones.append(AuditLog.entidad == entidad)
+
+    if accion:
+        condiciones.append(AuditLog.accion == accion)
+
+    if usuario_id:
+        condiciones.append(AuditLog.usuario_id == usuario_id)
+
+    if desde:
+        condiciones.append(AuditLog.created_at >= limites_dia(tz_nombre, desde)[0])
+
+    if hasta:
+        condiciones.append(AuditLog.created_at < limites_dia(tz_nombre, hasta)[1])
+
+    return condiciones
+
+
+# =====================================================
+# ESTADÍSTICAS AGREGADAS (GROUP BY)
+# =====================================================
+AGRUPACIONES = {
+    "hora": "hour",
+    "dia": "day",
+    "semana": "week"
+}
+
+
+def _conteo(columnas, condiciones):
+
+    cantidad = db.func.count().label("cantidad")
+
+    return db.session.execute(
+        db.select(*columnas, cantidad)
+        .where(*condiciones)
+        .group_by(*columnas)
+        .order_by(cantidad.desc())
+    ).all()
+
+
+def estadisticas_auditoria(condiciones, tz_nombre, agrupar="dia"):
+
+    """
+    Cantidad de eventos por acción, entidad, usuario y
+    período (hora / día / semana local), todo resuelto en
+    la base: no se traen filas de AuditLog a Python.
+
+    Usa ix_audit_log_estadisticas (empresa_id, created_at)
+    INCLUDE (accion, entidad, usuario_id): index-only scan
+    del rango.
+    """
+
+    unidad = AGRUPACIONES.get(agrupar, "day")
+
+    periodo = db.func.date_trunc(
+        unidad,
+        db.func.timezone(tz_nombre, AuditLog.created_at)
+    ).label("periodo")
+
+    serie = db.session.execute(
+        db.select(periodo, db.func.count())
+        .where(*condiciones)
+        .group_by(periodo)
+        .order_by(periodo)
+    ).all()
+
+    cantidad = db.func.count().label("cantidad")
+
+    usuarios = db.session.execute(
+        db.select(AuditLog.usuario_id, Usuario.email, cantidad)
+        .outerjoin(Usuario, Usuario.id == AuditLog.usuario_id)
+        .where(*condiciones)
+        .group_by(AuditLog.usuario_id, Usuario.email)
+        .order_by(cantidad.desc())
+    ).all()
+
+    return {
+        "agrupar": agrupar if agrupar in AGRUPACIONES else "dia",
+        "total": sum(n for _, n in serie),
+        "por_accion": [
+            {"accion": accion, "cantidad": cantidad}
+            for accion, cantidad in _conteo([AuditLog.accion], condiciones)
+        ],
+        "por_entidad": [
+            {"entidad": entidad, "cantidad": cantidad}
+            for entidad, cantidad in _conteo([AuditLog.entidad], condiciones)
+        ],
+        "por_usuario": [
+            {"usuario_id": usuario_id, "email": email or "-", "cantidad": cantidad}
+            for usuario_id, email, cantidad in usuarios
+        ],
+        "serie": [
+            {"periodo": p.isoformat(), "cantidad": cantidad}
+            for p, cantidad in serie
+        ]
+    }
+
+
+# =====================================================
+# BÚSQUEDA DE TEXTO COMPLETO (RANKEADA)
+# =====================================================
+#
+# PostgreSQL: columna generada audit_log.busqueda
+# (tsvector 'simple' sin acentos de accion + entidad +
+# descripcion) con índice GIN. Ver migraciones 0010 y
+# 0011.
+
+_RE_TERMINO = re.compile(r"\w+(?:[@.]\w+)*")
+
+MAX_TERMINOS = 8
+
+
+def terminos_busqueda(texto):
+
+    """
+    Palabras del texto buscado (nombres, emails, DNI); se
+    descarta todo lo demás para no armar operadores.
+    """
+
+    return _RE_TERMINO.findall(texto or "")[:MAX_TERMINOS]
+
+
+def buscar_auditoria(condiciones, texto, pagina=1, por_pagina=POR_PAGINA):
+
+    """
+    Eventos que contienen todos los términos (como prefijo:
+    "gonz" encuentra "González"), del más relevante al
+    menos relevante y, a igual relevancia, el más nuevo.
+
+    Devuelve (filas, hay_mas). El GIN resuelve qué filas
+    coinciden; el orden por relevancia se calcula solo
+    sobre esas, filtradas además por empresa y rango.
+    """
+
+    terminos = terminos_busqueda(texto)
+
+    if not terminos:
+        return [], False
+
+    # misma normalización que la columna (m0011): sin
+    # acentos, "gonzalez" encuentra "González"
+    busqueda = db.literal_column("audit_log.busqueda")
+    consulta = db.func.to_tsquery(
+        "simple",
+        db.func.inmutable_unaccent(" & ".join(f"{t}:*" for t in terminos))
+    )
+
+    seleccion = (
+        db.select(AuditLog)
+        .where(*condiciones, busqueda.op("@@")(consulta))
+        .order_by(
+            db.func.ts_rank_cd(busqueda, consulta).desc(),
+            AuditLog.created_at.desc(),
+            AuditLog.id.desc()
+        )
+    )
+
+    filas = db.session.scalars(
+        seleccion
+        .options(joinedload(AuditLog.usuario))
+        .limit(por_pagina + 1)
+        .offset((max(pagina, 1) - 1) * por_pagina)
+    ).all()
+
+    return filas[:por_pagina], len(filas) > por_pagina
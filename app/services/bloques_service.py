@@ -0,0 +1,191 @@
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+from app.models import Asistencia, Empleado, db
+from app.services.calendario_service import zona, limites_dia
+
+
+# =====================================================
+# LECTURA EN STREAMING (CURSOR DEL LADO DEL SERVIDOR)
+# =====================================================
+def iterar_fichajes(
+    empresa_id,
+    inicio_utc,
+    fin_utc,
+    empleado_id=None,
+    sucursal_id=None,
+    lote=2000
+):
+
+    """
+    Fichajes del rango en orden (empleado_id, fecha_hora),
+    leídos de a `lote` filas con yield_per (en PostgreSQL
+    usa un cursor del lado del servidor).
+
+    Solo trae las columnas necesarias para emparejar: la
+    memoria queda acotada al lote, no al largo del rango.
+    sucursal_id filtra por la sucursal del empleado.
+    Igual que obtener_asistencias_mes agrega 12 h de margen
+    a cada lado para no cortar bloques en los bordes.
+    """
+
+    consulta = (
+        db.select(
+            Asistencia.empleado_id,
+            Asistencia.tipo,
+            Asistencia.fecha_hora,
+            Asistencia.actividad
+        )
+        .where(
+            Asistencia.empresa_id == empresa_id,
+            Asistencia.fecha_hora >= inicio_utc - timedelta(hours=12),
+            Asistencia.fecha_hora < fin_utc + timedelta(hours=12),
+            *([Asistencia.empleado_id == empleado_id] if empleado_id else []),
+            *([Asistencia.empleado_id.in_(
+                empleados_sucursal(empresa_id, sucursal_id)
+            )] if sucursal_id else [])
+        )
+        .order_by(
+            Asistencia.empleado_id,
+            Asistencia.fecha_hora,
+            Asistencia.id
+        )
+        .execution_options(yield_per=lote)
+    )
+
+    yield from db.session.execute(consulta)
+
+
+def empleados_sucursal(empresa_id, sucursal_id):
+
+    # subconsulta: el filtro queda del lado de la base
+    return db.select(Empleado.id).where(
+        Empleado.empresa_id == empresa_id,
+        Empleado.sucursal_id == sucursal_id
+    )
+
+
+# =====================================================
+# EMPAREJADO INGRESO → SALIDA (GENERADOR)
+# =====================================================
+def emparejar_bloques(filas, tz_local):
+
+    """
+    Recibe fichajes ordenados por (empleado_id, fecha_hora)
+    y va emitiendo los bloques de a uno, con la misma regla
+    que procesar_bloques: un INGRESO posterior reemplaza al
+    anterior, la SALIDA cierra el bloque y un INGRESO sin
+    SALIDA al final queda como bloque abierto.
+
+    Cada bloque es un dict con empleado_id, fecha, ingreso,
+    salida (o None), segundos y actividad.
+    """
+
+    for empleado_id, registros in groupby(filas, key=lambda r: r.empleado_id):
+
+        ingreso = None
+
+        for r in registros:
+
+            fecha_local = r.fecha_hora.astimezone(tz_local)
+
+            if r.tipo == "INGRESO":
+                ingreso = fecha_local
+
+            elif r.tipo == "SALIDA" and ingreso:
+
+                yield {
+                    "empleado_id": empleado_id,
+                    "fecha": ingreso.date(),
+                    "ingreso": ingreso,
+                    "salida": fecha_local,
+                    "segundos": (fecha_local - ingreso).total_seconds(),
+                    "actividad": r.actividad or "-"
+                }
+
+                ingreso = None
+
+        if ingreso:
+            yield {
+                "empleado_id": empleado_id,
+                "fecha": ingreso.date(),
+                "ingreso": ingreso,
+                "salida": None,
+                "segundos": 0,
+                "actividad": "-"
+            }
+
+
+def bloque_en_rango(bloque, desde, hasta):
+
+    """
+    El bloque entra en el rango de fechas locales
+    [desde, hasta) si su INGRESO cae dentro de él (un
+    bloque es del día de su INGRESO, como en el rollup y
+    en los cierres).
+    """
+
+    return desde <= bloque["ingreso"].date() < hasta
+
+
+# =====================================================
+# TOTALES POR EMPLEADO (INCREMENTALES)
+# =====================================================
+def totales_por_empleado(bloques, desde=None, hasta=None):
+
+    """
+    Agrupa los bloques (ya ordenados por empleado) y emite
+    un total por empleado apenas termina con él:
+
+        {"empleado_id", "segundos", "dias", "incompleto"}
+
+    Solo guarda en memoria los días del empleado actual.
+    """
+
+    if desde and hasta:
+        bloques = (b for b in bloques if bloque_en_rango(b, desde, hasta))
+
+    for empleado_id, grupo in groupby(bloques, key=itemgetter("empleado_id")):
+
+        segundos = 0
+        dias = set()
+        incompleto = False
+
+        for b in grupo:
+
+            segundos += b["segundos"]
+            dias.add(b["fecha"])
+
+            if b["salida"] is None:
+                incompleto = True
+
+        yield {
+            "empleado_id": empleado_id,
+            "segundos": segundos,
+            "dias": len(dias),
+            "incompleto": incompleto
+        }
+
+
+# =====================================================
+# TOTALES DEL REPORTE MENSUAL (MODO STREAMING)
+# =====================================================
+def totales_streaming(empresa_id, tz_nombre, desde, hasta, sucursal_id=None):
+
+    """
+    Totales por empleado del rango local [desde, hasta)
+    leyendo los fichajes en streaming.
+    """
+
+    filas = iterar_fichajes(
+        empresa_id,
+        limites_dia(tz_nombre, desde)[0],
+        limites_dia(tz_nombre, hasta)[0],
+        sucursal_id=sucursal_id
+    )
+
+    return list(totales_por_empleado(
+        emparejar_bloques(filas, zona(tz_nombre)),
+        desde,
+        hasta
+    ))
@@ -0,0 +1,73 @@
+import threading
+import time
+
+
+# =====================================================
+# CACHE EN MEMORIA CON VENCIMIENTO (POR PROCESO)
+# =====================================================
+class CacheTTL:
+
+    """
+    Cache simple clave → valor con TTL, segura entre threads.
+
+    Las claves son tuplas cuyo primer elemento es el
+    empresa_id, así se puede invalidar todo lo de una
+    empresa de una sola vez.
+    """
+
+    def __init__(self, ttl=30, max_items=1024):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+
+        with self._lock:
+            item = self._datos.get(clave)
+
+            if not item:
+                return None
+
+            vence, valor = item
+
+            if vence < time.monotonic():
+                self._datos.pop(clave, None)
+                return None
+
+            return valor
+
+    def guardar(self, clave, valor, ttl=None):
+
+        vence = time.monotonic() + (ttl if ttl is not None else self.ttl)
+
+        with self._lock:
+
+            if len(self._datos) >= self.max_items:
+                self._purgar()
+
+            self._datos[clave] = (vence, valor)
+
+    def invalidar_empresa(self, empresa_id):
+
+        with self._lock:
+            for clave in [c for c in self._datos if c[0] == empresa_id]:
+                self._datos.pop(clave, None)
+
+    def limpiar(self):
+
+        with self._lock:
+            self._datos.clear()
+
+    def _purgar(self):
+
+        # primero los vencidos; si no alcanza, los más viejos
+        ahora = time.monotonic()
+
+        for clave in [c for c, (v, _) in self._datos.items() if v < ahora]:
+            self._datos.pop(clave, None)
+
+        if len(self._datos) >= self.max_items:
+            orden = sorted(self._datos, key=lambda c: self._datos[c][0])
+            for clave in orden[:len(orden) // 2]:
+                self._datos.pop(clave, None)
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone, time
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from flask import g, has_app_context
+
+
+TZ_DEFAULT = "America/Argentina/Buenos_Aires"
+
+# zonas ofrecidas en la configuración de la empresa
+ZONAS_DISPONIBLES = [
+    ("America/Argentina/Buenos_Aires", "Argentina"),
+    ("America/Santiago", "Chile"),
+    ("America/Montevideo", "Uruguay"),
+    ("America/Asuncion", "Paraguay"),
+    ("America/Sao_Paulo", "Brasil (São Paulo)"),
+    ("America/Lima", "Perú"),
+    ("America/Bogota", "Colombia"),
+    ("America/Mexico_City", "México"),
+]
+
+
+# =====================================================
+# ZONAS (MEMOIZADAS)
+# =====================================================
+@lru_cache(maxsize=None)
+def zona(nombre=None):
+
+    """
+    ZoneInfo memoizado por nombre (uno por proceso).
+    Un nombre inválido cae en la zona por defecto.
+    """
+
+    try:
+        return ZoneInfo(nombre or TZ_DEFAULT)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(TZ_DEFAULT)
+
+
+def nombre_zona_empresa(empresa_id=None):
+
+    """
+    Zona horaria de la empresa. Usa g.empresa (cargada en
+    cada request) y si no, la busca en la base.
+    """
+
+    from app.models import Empresa, db
+
+    if has_app_context():
+
+        empresa = g.get("empresa")
+
+        if empresa is not None and (empresa_id is None or empresa.id == empresa_id):
+            return empresa.zona_horaria or TZ_DEFAULT
+
+    if empresa_id is None:
+        return TZ_DEFAULT
+
+    return db.session.query(Empresa.zona_horaria).filter(
+        Empresa.id == empresa_id
+    ).scalar() or TZ_DEFAULT
+
+
+def zona_empresa(empresa_id=None):
+    return zona(nombre_zona_empresa(empresa_id))
+
+
+# =====================================================
+# LÍMITES DE DÍA Y MES (CACHEADOS POR ZONA + FECHA)
+# =====================================================
+@lru_cache(maxsize=8192)
+def limites_dia(tz_nombre, fecha):
+
+    """
+    (inicio_utc, fin_utc) del día local `fecha`.
+    """
+
+    tz = zona(tz_nombre)
+
+    inicio = datetime.combine(fecha, time.min, tzinfo=tz)
+    fin = datetime.combine(fecha + timedelta(days=1), time.min, tzinfo=tz)
+
+    return inicio.astimezone(timezone.utc), fin.astimezone(timezone.utc)
+
+
+@lru_cache(maxsize=1024)
+def limites_mes(tz_nombre, year, month):
+
+    """
+    (inicio_utc, fin_utc) del mes local.
+    """
+
+    tz = zona(tz_nombre)
+
+    inicio = datetime(year, month, 1, tzinfo=tz)
+
+    if month == 12:
+        fin = datetime(year + 1, 1, 1, tzinfo=tz)
+    else:
+        fin = datetime(year, month + 1, 1, tzinfo=tz)
+
+    return inicio.astimezone(timezone.utc), fin.astimezone(timezone.utc)
+
+
+def limites_rango(tz_nombre, desde, hasta):
+
+    """
+    (inicio_utc, fin_utc) de las fechas locales
+    desde..hasta (hasta exclusivo).
+    """
+
+    return limites_dia(tz_nombre, desde)[0], limites_dia(tz_nombre, hasta)[0]
+
+
+def ahora_local(tz_nombre=None):
+    return datetime.now(zona(tz_nombre))
@@ -0,0 +1,614 @@
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from sqlalchemy.exc import IntegrityError
+from app.models import (
+    AjusteCierre,
+    Asistencia,
+    CierreMes,
+    CierreMesBloque,
+    CierreMesEmpleado,
+    Empleado,
+    db
+)
+from app.services.calendario_service import (
+    nombre_zona_empresa,
+    zona,
+    limites_mes,
+    ahora_local
+)
+from app.services.bloques_service import iterar_fichajes, emparejar_bloques
+from app.services.horas_service import formatear_hhmm
+from app.services.reporte_cache_service import EmpleadoResumen
+from app.services.version_datos_service import incrementar_version_datos
+
+
+# =====================================================
+# CIERRE DE MES
+# =====================================================
+#
+# Un mes cerrado queda congelado en cierre_mes_* (totales
+# por empleado, bloques y cumplimiento de cada día). Los
+# reportes de ese mes leen del cierre: O(empleados) en
+# vez de recorrer los fichajes. Los fichajes del mes ya
+# no se editan; las correcciones son AjusteCierre.
+
+def primer_dia_mes_siguiente(fecha):
+    return (fecha.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def meses_del_rango(desde, hasta):
+
+    """
+    (year, month) de cada mes que toca el rango de
+    fechas locales [desde, hasta).
+    """
+
+    meses = []
+    mes = desde.replace(day=1)
+
+    while mes < hasta:
+        meses.append((mes.year, mes.month))
+        mes = primer_dia_mes_siguiente(mes)
+
+    return meses
+
+
+def cierre_del_mes(empresa_id, year, month):
+
+    return CierreMes.query.filter_by(
+        empresa_id=empresa_id,
+        year=year,
+        month=month
+    ).first()
+
+
+def cierres_del_rango(empresa_id, desde, hasta):
+
+    """
+    Cierres de todos los meses del rango, o None si
+    alguno de esos meses sigue abierto.
+    """
+
+    meses = meses_del_rango(desde, hasta)
+
+    if not meses:
+        return None
+
+    cierres = CierreMes.query.filter(
+        CierreMes.empresa_id == empresa_id,
+        db.tuple_(CierreMes.year, CierreMes.month).in_(meses)
+    ).all()
+
+    if len(cierres) != len(meses):
+        return None
+
+    return cierres
+
+
+def periodo_cerrado(empresa_id, *fechas_hora):
+
+    """
+    Cierre del mes local de alguna de las fechas_hora
+    (UTC) o None si todas caen en meses abiertos.
+    """
+
+    tz = zona(nombre_zona_empresa(empresa_id))
+
+    meses = {
+        (f.astimezone(tz).year, f.astimezone(tz).month)
+        for f in fechas_hora
+        if f
+    }
+
+    if not meses:
+        return None
+
+    return CierreMes.query.filter(
+        CierreMes.empresa_id == empresa_id,
+        db.tuple_(CierreMes.year, CierreMes.month).in_(meses)
+    ).first()
+
+
+def ingreso_anterior(empresa_id, empleado_id, fecha_hora, excluir_id=None):
+
+    """
+    fecha_hora del fichaje anterior del empleado si es un
+    INGRESO (el bloque que un fichaje en fecha_hora cierra,
+    reabre o acorta), o None.
+    """
+
+    consulta = Asistencia.query.filter(
+        Asistencia.empresa_id == empresa_id,
+        Asistencia.empleado_id == empleado_id,
+        Asistencia.fecha_hora < fecha_hora
+    )
+
+    if excluir_id:
+        consulta = consulta.filter(Asistencia.id != excluir_id)
+
+    anterior = consulta.order_by(
+        Asistencia.fecha_hora.desc(),
+        Asistencia.id.desc()
+    ).first()
+
+    if anterior and anterior.tipo == "INGRESO":
+        return anterior.fecha_hora
+
+    return None
+
+
+def periodo_cerrado_fichaje(empresa_id, empleado_id, *fechas_hora, excluir_id=None):
+
+    """
+    Como periodo_cerrado, para un alta, edición o baja de
+    fichajes del empleado: además del mes de cada fecha
+    mira el del INGRESO que el cambio empareja. Una SALIDA
+    del mes abierto que cierra un INGRESO de un mes
+    cerrado cambiaría ese mes.
+
+    excluir_id: el fichaje que se edita o se borra.
+    """
+
+    ingresos = [
+        ingreso_anterior(empresa_id, empleado_id, f, excluir_id)
+        for f in fechas_hora
+        if f
+    ]
+
+    return periodo_cerrado(empresa_id, *fechas_hora, *ingresos)
+
+
+# =====================================================
+# CERRAR UN MES
+# =====================================================
+def completar_bloque(empresa_id, bloque, tz):
+
+    """
+    Bloque abierto al final de la lectura: con el fichaje
+    siguiente del empleado queda cerrado (SALIDA), se
+    descarta (otro INGRESO lo reemplaza) o sigue abierto.
+    """
+
+    siguiente = (
+        Asistencia.query
+        .filter(
+            Asistencia.empresa_id == empresa_id,
+            Asistencia.empleado_id == bloque["empleado_id"],
+            Asistencia.fecha_hora > bloque["ingreso"]
+        )
+        .order_by(Asistencia.fecha_hora, Asistencia.id)
+        .first()
+    )
+
+    if siguiente is None:
+        return bloque
+
+    if siguiente.tipo != "SALIDA":
+        return None
+
+    salida = siguiente.fecha_hora.astimezone(tz)
+
+    return dict(
+        bloque,
+        salida=salida,
+        segundos=(salida - bloque["ingreso"]).total_seconds(),
+        actividad=siguiente.actividad or "-"
+    )
+
+
+def cerrar_mes(empresa_id, year, month, cumplimiento, usuario_id=None):
+
+    """
+    Congela el mes local year/month de la empresa.
+
+    cumplimiento: matriz del mes (matriz_cumplimiento),
+    se guarda el estado de cada día por empleado.
+
+    Solo se cierran meses terminados, sin jornadas
+    abiertas y una sola vez (índice único por empresa y
+    período).
+    """
+
+    tz_nombre = nombre_zona_empresa(empresa_id)
+    tz = zona(tz_nombre)
+
+    desde = date(year, month, 1)
+    hasta = primer_dia_mes_siguiente(desde)
+
+    if hasta > ahora_local(tz_nombre).date():
+        raise ValueError("El mes todavía no terminó")
+
+    if cierre_del_mes(empresa_id, year, month):
+        raise ValueError("El mes ya está cerrado")
+
+    inicio_utc, fin_utc = limites_mes(tz_nombre, year, month)
+
+    # ==========================================
+    # BLOQUES DEL MES (DÍA DEL INGRESO)
+    # ==========================================
+
+    bloques = []
+    abiertos = []
+
+    for b in emparejar_bloques(iterar_fichajes(empresa_id, inicio_utc, fin_utc), tz):
+
+        if not (desde <= b["fecha"] < hasta):
+            continue
+
+        if b["salida"] is None:
+
+            # la SALIDA puede caer después del margen de
+            # lectura (turno noche largo): se busca en la base
+            b = completar_bloque(empresa_id, b, tz)
+
+            if b is None:
+                continue
+
+            if b["salida"] is None:
+                abiertos.append(b)
+                continue
+
+        bloques.append(b)
+
+    # con un bloque abierto las horas entrarían después,
+    # con el mes ya congelado
+    if abiertos:
+        raise ValueError(
+            f"Hay {len(abiertos)} jornada(s) abierta(s) con ingreso en el mes: "
+            f"registrá las salidas antes de cerrarlo"
+        )
+
+    totales = defaultdict(lambda: {"segundos": 0, "dias": set(), "incompleto": False})
+
+    for b in bloques:
+
+        total = totales[b["empleado_id"]]
+        total["segundos"] += int(b["segundos"])
+        total["dias"].add(b["fecha"])
+
+    celdas = {
+        f["empleado"].id: {
+            "celdas": [[c["estado"], c["detalle"]] for c in f["celdas"]],
+            "conteo": dict(f["conteo"])
+        }
+        for f in cumplimiento["filas"]
+    }
+
+    ids = set(totales) | set(celdas)
+
+    empleados = Empleado.query.filter(
+        Empleado.empresa_id == empresa_id,
+        Empleado.id.in_(ids)
+    ).all() if ids else []
+
+    # ==========================================
+    # SNAPSHOT
+    # ==========================================
+
+    cierre = CierreMes(
+        empresa_id=empresa_id,
+        year=year,
+        month=month,
+        zona_horaria=tz_nombre,
+        total_segundos=sum(t["segundos"] for t in totales.values()),
+        usuario_id=usuario_id
+    )
+
+    db.session.add(cierre)
+
+    try:
+        db.session.flush()
+    except IntegrityError:
+        # otro proceso cerró el mismo mes
+        db.session.rollback()
+        raise ValueError("El mes ya está cerrado")
+
+    for e in empleados:
+
+        total = totales.get(e.id)
+
+        db.session.add(CierreMesEmpleado(
+            cierre_id=cierre.id,
+            empresa_id=empresa_id,
+            empleado_id=e.id,
+            apellido=e.apellido,
+            nombre=e.nombre,
+            sucursal_id=e.sucursal_id,
+            segundos=total["segundos"] if total else 0,
+            dias=len(total["dias"]) if total else 0,
+            incompleto=total["incompleto"] if total else False,
+            cumplimiento=celdas.get(e.id)
+        ))
+
+    if bloques:
+        db.session.execute(
+            db.insert(CierreMesBloque),
+            [
+                {
+                    "cierre_id": cierre.id,
+                    "empleado_id": b["empleado_id"],
+                    "fecha": b["fecha"],
+                    "ingreso": b["ingreso"],
+                    "salida": b["salida"],
+                    "segundos": int(b["segundos"]),
+                    "actividad": b["actividad"]
+                }
+                for b in bloques
+            ]
+        )
+
+    # exportaciones / ETags del mes pasan a leer del cierre
+    incrementar_version_datos(empresa_id)
+
+    db.session.commit()
+
+    return cierre
+
+
+# =====================================================
+# AJUSTES SOBRE UN MES CERRADO
+# =====================================================
+def registrar_ajuste(cierre, empleado_id, segundos, motivo, usuario_id=None):
+
+    ajuste = AjusteCierre(
+        cierre_id=cierre.id,
+        empresa_id=cierre.empresa_id,
+        empleado_id=empleado_id,
+        segundos=segundos,
+        motivo=motivo,
+        usuario_id=usuario_id
+    )
+
+    db.session.add(ajuste)
+    incrementar_version_datos(cierre.empresa_id)
+    db.session.commit()
+
+    return ajuste
+
+
+def ajustes_por_empleado(cierre_ids):
+
+    return dict(
+        db.session.execute(
+            db.select(
+                AjusteCierre.empleado_id,
+                db.func.sum(AjusteCierre.segundos)
+            )
+            .where(AjusteCierre.cierre_id.in_(cierre_ids))
+            .group_by(AjusteCierre.empleado_id)
+        ).all()
+    )
+
+
+# =====================================================
+# LECTURA DE REPORTES DESDE EL CIERRE
+# =====================================================
+def _filas_cierre(cierre_ids, desde, hasta, sucursal_id, meses_completos):
+
+    """
+    (empleado_id, apellido, nombre, segundos, días,
+    incompleto) por empleado. Con meses completos sale de
+    cierre_mes_empleado (más los ajustes); si el rango
+    corta un mes, de los bloques congelados.
+    """
+
+    filtro_sucursal = (
+        [CierreMesEmpleado.sucursal_id == sucursal_id] if sucursal_id else []
+    )
+
+    if meses_completos:
+
+        consulta = (
+            db.select(
+                CierreMesEmpleado.empleado_id,
+                db.func.max(CierreMesEmpleado.apellido),
+                db.func.max(CierreMesEmpleado.nombre),
+                db.func.sum(CierreMesEmpleado.segundos),
+                db.func.sum(CierreMesEmpleado.dias),
+                db.func.max(db.case((CierreMesEmpleado.incompleto, 1), else_=0))
+            )
+            .where(CierreMesEmpleado.cierre_id.in_(cierre_ids), *filtro_sucursal)
+            .group_by(CierreMesEmpleado.empleado_id)
+        )
+
+        ajustes = ajustes_por_empleado(cierre_ids)
+
+        return [
+            (empleado_id, apellido, nombre, segundos + (ajustes.get(empleado_id) or 0), dias, incompleto)
+            for empleado_id, apellido, nombre, segundos, dias, incompleto
+            in db.session.execute(consulta)
+        ]
+
+    consulta = (
+        db.select(
+            CierreMesBloque.empleado_id,
+            db.func.max(CierreMesEmpleado.apellido),
+            db.func.max(CierreMesEmpleado.nombre),
+            db.func.sum(CierreMesBloque.segundos),
+            db.func.count(db.distinct(CierreMesBloque.fecha)),
+            db.func.max(db.case((CierreMesBloque.salida.is_(None), 1), else_=0))
+        )
+        .join(
+            CierreMesEmpleado,
+            db.and_(
+                CierreMesEmpleado.cierre_id == CierreMesBloque.cierre_id,
+                CierreMesEmpleado.empleado_id == CierreMesBloque.empleado_id
+            )
+        )
+        .where(
+            CierreMesBloque.cierre_id.in_(cierre_ids),
+            CierreMesBloque.fecha >= desde,
+            CierreMesBloque.fecha < hasta,
+            *filtro_sucursal
+        )
+        .group_by(CierreMesBloque.empleado_id)
+    )
+
+    return list(db.session.execute(consulta))
+
+
+def resumen_desde_cierres(empresa_id, desde, hasta, sucursal_id=None):
+
+    """
+    Mismo formato que calcular_resumen_mensual, leyendo
+    solo de los cierres. None si algún mes del rango
+    [desde, hasta) no está cerrado.
+    """
+
+    cierres = cierres_del_rango(empresa_id, desde, hasta)
+
+    if cierres is None:
+        return None
+
+    filas = []
+    total_segundos = 0
+
+    for empleado_id, apellido, nombre, segundos, dias, incompleto in _filas_cierre(
+        [c.id for c in cierres],
+        desde,
+        hasta,
+        sucursal_id,
+        desde.day == 1 and hasta.day == 1
+    ):
+
+        if not segundos:
+            continue
+
+        total_segundos += segundos
+
+        filas.append({
+            "empleado": EmpleadoResumen(empleado_id, nombre, apellido),
+            "empleado_id": empleado_id,
+            "segundos": int(segundos),
+            "horas": formatear_hhmm(segundos),
+            "dias": int(dias),
+            "estado": "INCOMPLETO" if incompleto else "OK"
+        })
+
+    filas.sort(key=lambda x: x["empleado"].apellido)
+
+    return {
+        "filas": filas,
+        "total_segundos": int(total_segundos),
+        "total_general": formatear_hhmm(total_segundos)
+    }
+
+
+def detalle_desde_cierres(empresa_id, empleado_id, desde, hasta):
+
+    """
+    Bloques congelados del empleado en [desde, hasta), con
+    el formato de procesar_bloques, más los ajustes del
+    cierre (estado AJUSTE, segundos en "ajuste") si el
+    rango son meses completos. None si algún mes del
+    rango no está cerrado.
+    """
+
+    cierres = cierres_del_rango(empresa_id, desde, hasta)
+
+    if cierres is None:
+        return None
+
+    tz = zona(cierres[0].zona_horaria)
+
+    detalle = []
+
+    for b in (
+        CierreMesBloque.query
+        .filter(
+            CierreMesBloque.cierre_id.in_([c.id for c in cierres]),
+            CierreMesBloque.empleado_id == empleado_id,
+            CierreMesBloque.fecha >= desde,
+            CierreMesBloque.fecha < hasta
+        )
+        .order_by(CierreMesBloque.ingreso)
+    ):
+
+        ingreso = b.ingreso.astimezone(tz)
+        salida = b.salida.astimezone(tz) if b.salida else None
+
+        detalle.append({
+            "fecha": b.fecha,
+            "ingreso": ingreso,
+            "salida": salida,
+            "horas": formatear_hhmm(b.segundos) if salida else "00:00",
+            "estado": "OK" if salida else "INCOMPLETO",
+            "actividad": b.actividad
+        })
+
+    # con meses completos el resumen suma los ajustes: acá
+    # van como filas, al final de su mes
+    if desde.day == 1 and hasta.day == 1:
+
+        meses = {c.id: date(c.year, c.month, 1) for c in cierres}
+
+        for a in (
+            AjusteCierre.query
+            .filter(
+                AjusteCierre.cierre_id.in_(meses),
+                AjusteCierre.empleado_id == empleado_id
+            )
+            .order_by(AjusteCierre.created_at, AjusteCierre.id)
+        ):
+
+            signo = "-" if a.segundos < 0 else "+"
+
+            detalle.append({
+                "fecha": primer_dia_mes_siguiente(meses[a.cierre_id]) - timedelta(days=1),
+                "ingreso": None,
+                "salida": None,
+                "horas": f"{signo}{formatear_hhmm(abs(a.segundos))}",
+                "estado": "AJUSTE",
+                "actividad": a.motivo,
+                "ajuste": a.segundos
+            })
+
+        detalle.sort(key=lambda d: d["fecha"])
+
+    return detalle
+
+
+def matriz_desde_cierre(empresa_id, year, month, sucursal_id=None):
+
+    """
+    Matriz de cumplimiento congelada (mismo formato que
+    matriz_cumplimiento) o None si el mes está abierto.
+    """
+
+    cierre = cierre_del_mes(empresa_id, year, month)
+
+    if not cierre:
+        return None
+
+    desde = date(year, month, 1)
+    dias = [
+        desde + timedelta(days=i)
+        for i in range((primer_dia_mes_siguiente(desde) - desde).days)
+    ]
+
+    consulta = CierreMesEmpleado.query.filter(
+        CierreMesEmpleado.cierre_id == cierre.id,
+        CierreMesEmpleado.cumplimiento.isnot(None)
+    )
+
+    if sucursal_id:
+        consulta = consulta.filter(CierreMesEmpleado.sucursal_id == sucursal_id)
+
+    filas = []
+    totales = Counter()
+
+    for e in consulta.order_by(CierreMesEmpleado.apellido, CierreMesEmpleado.nombre):
+
+        conteo = Counter(e.cumplimiento["conteo"])
+        totales.update(conteo)
+
+        filas.append({
+            "empleado": EmpleadoResumen(e.empleado_id, e.nombre, e.apellido),
+            "celdas": [
+                {"estado": estado, "detalle": detalle}
+                for estado, detalle in e.cumplimiento["celdas"]
+            ],
+            "conteo": conteo
+        })
+
+    return {"dias": dias, "filas": filas, "totales": totales}
@@ -0,0 +1,159 @@
+from datetime import timedelta
+import numpy as np
+from app.models import Asistencia, db
+from app.services.calendario_service import limites_dia
+from app.services.bloques_service import empleados_sucursal
+
+
+# =====================================================
+# TOTALES POR EMPLEADO EN MODO COLUMNAR (NUMPY)
+# =====================================================
+def cargar_columnas(empresa_id, inicio_utc, fin_utc, sucursal_id=None):
+
+    """
+    Trae solo (empleado_id, es_ingreso, epoch) del rango
+    como arrays, ordenados por (empleado_id, fecha_hora, id).
+    Sin objetos ORM ni conversiones de zona por fila.
+    sucursal_id filtra por la sucursal del empleado.
+    """
+
+    consulta = (
+        db.select(
+            Asistencia.empleado_id,
+            Asistencia.tipo == "INGRESO",
+            db.func.extract("epoch", Asistencia.fecha_hora)
+        )
+        .where(
+            Asistencia.empresa_id == empresa_id,
+            Asistencia.fecha_hora >= inicio_utc - timedelta(hours=12),
+            Asistencia.fecha_hora < fin_utc + timedelta(hours=12),
+            *([Asistencia.empleado_id.in_(
+                empleados_sucursal(empresa_id, sucursal_id)
+            )] if sucursal_id else [])
+        )
+        .order_by(
+            Asistencia.empleado_id,
+            Asistencia.fecha_hora,
+            Asistencia.id
+        )
+    )
+
+    filas = db.session.execute(consulta).all()
+
+    if not filas:
+        return (
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=bool),
+            np.empty(0, dtype=np.float64)
+        )
+
+    empleado, ingreso, epoch = zip(*filas)
+
+    return (
+        np.asarray(empleado, dtype=np.int64),
+        np.asarray(ingreso, dtype=bool),
+        np.asarray(epoch, dtype=np.float64)
+    )
+
+
+def totales_columnares(empresa_id, tz_nombre, desde, hasta, sucursal_id=None):
+
+    """
+    Mismo resultado que totales_por_empleado y que el
+    rollup (bloques cuyo INGRESO cae en el rango de fechas
+    locales [desde, hasta)), pero emparejando con
+    operaciones vectorizadas:
+
+    - un bloque es un INGRESO cuyo siguiente fichaje del
+      mismo empleado es una SALIDA (regla de LEAD());
+    - un INGRESO que es el último fichaje del empleado es
+      un bloque abierto;
+    - el día local sale de buscar el epoch entre los
+      inicios de día de la zona (respeta cambios de hora).
+    """
+
+    inicio_utc = limites_dia(tz_nombre, desde)[0]
+    fin_utc = limites_dia(tz_nombre, hasta)[0]
+
+    empleado, ingreso, epoch = cargar_columnas(
+        empresa_id, inicio_utc, fin_utc, sucursal_id
+    )
+
+    if not len(empleado):
+        return []
+
+    # ==========================================
+    # EMPAREJADO (FICHAJE i CONTRA i + 1)
+    # ==========================================
+
+    mismo_siguiente = np.append(empleado[1:] == empleado[:-1], False)
+    salida_siguiente = np.append(~ingreso[1:], False)
+
+    cerrado = ingreso & mismo_siguiente & salida_siguiente
+    abierto = ingreso & ~mismo_siguiente
+
+    idx_cerrado = np.flatnonzero(cerrado)
+    idx_abierto = np.flatnonzero(abierto)
+
+    # ==========================================
+    # DÍA LOCAL DE CADA INGRESO
+    # ==========================================
+
+    # inicios de día en UTC con un día de margen a cada lado
+    dias = [desde + timedelta(days=i) for i in range(-1, (hasta - desde).days + 2)]
+    inicios = np.array(
+        [limites_dia(tz_nombre, d)[0].timestamp() for d in dias]
+    )
+
+    def dia_local(valores):
+        return np.searchsorted(inicios, valores, side="right") - 1
+
+    # índices de `dias` que caen en [desde, hasta)
+    primero, ultimo = 1, len(dias) - 2
+
+    def en_rango(indices):
+        return (indices >= primero) & (indices < ultimo)
+
+    dia_ingreso_c = dia_local(epoch[idx_cerrado])
+    dia_abierto = dia_local(epoch[idx_abierto])
+
+    # el bloque es del día local de su INGRESO
+    ok_c = en_rango(dia_ingreso_c)
+    ok_a = en_rango(dia_abierto)
+
+    idx_cerrado, dia_ingreso_c = idx_cerrado[ok_c], dia_ingreso_c[ok_c]
+    idx_abierto, dia_abierto = idx_abierto[ok_a], dia_abierto[ok_a]
+
+    # ==========================================
+    # REDUCCIONES POR EMPLEADO
+    # ==========================================
+
+    ids, grupo = np.unique(empleado, return_inverse=True)
+
+    segundos = np.bincount(
+        grupo[idx_cerrado],
+        weights=epoch[idx_cerrado + 1] - epoch[idx_cerrado],
+        minlength=len(ids)
+    )
+
+    incompleto = np.bincount(grupo[idx_abierto], minlength=len(ids)) > 0
+
+    # días distintos: pares (empleado, día) únicos
+    pares = np.unique(np.concatenate([
+        grupo[idx_cerrado] * len(dias) + dia_ingreso_c,
+        grupo[idx_abierto] * len(dias) + dia_abierto
+    ]))
+
+    cantidad_dias = np.bincount(pares // len(dias), minlength=len(ids))
+
+    con_bloques = cantidad_dias > 0
+
+    return [
+        {
+            "empleado_id": int(ids[i]),
+            "segundos": float(segundos[i]),
+            "dias": int(cantidad_dias[i]),
+            "incompleto": bool(incompleto[i])
+        }
+        for i in np.flatnonzero(con_bloques)
+    ]
@@ -0,0 +1,251 @@
+import calendar
+from collections import Counter
+from datetime import date, datetime, time, timedelta
+from sqlalchemy.orm import selectinload
+from app.models import Asistencia, Empleado, HorarioEmpleado, db
+from app.services.calendario_service import (
+    nombre_zona_empresa,
+    zona,
+    limites_mes
+)
+from app.services.reporte_cache_service import empleado_resumen
+from app.services.cierre_service import matriz_desde_cierre
+
+
+ESTADOS_CUMPLIMIENTO = (
+    "OK", "TARDE", "AUSENTE", "EXTRA", "FRANCO", "LICENCIA", "SIN_PLAN"
+)
+
+
+# =====================================================
+# CLASIFICACIÓN DE UN DÍA
+# =====================================================
+def fin_turno(fecha, horario, tz):
+
+    """
+    Fin del turno planificado del día (hora local). Un
+    bloque que termina antes de empezar cruza la
+    medianoche y termina al día siguiente. None si el
+    plan no tiene horas.
+    """
+
+    tramos = (
+        [(b.hora_inicio, b.hora_fin) for b in horario.bloques]
+        if horario.bloques
+        else [(horario.hora_inicio, horario.hora_fin)]
+    )
+
+    fines = [
+        datetime.combine(
+            fecha + timedelta(days=1) if inicio and fin <= inicio else fecha,
+            fin,
+            tzinfo=tz
+        )
+        for inicio, fin in tramos
+        if fin
+    ]
+
+    return max(fines) if fines else None
+
+
+def clasificar_dia(fecha, horario, primer_ingreso, tz, tolerancia=0, ahora=None):
+
+    """
+    Estado de un empleado en un día, con la misma lógica
+    que evaluar_dia pero sobre datos ya cargados:
+
+    - horario: HorarioEmpleado (bloques precargados) o None
+    - primer_ingreso: primer INGRESO del día (hora local)
+    - ahora: hora local actual; sin fichaje, un día que
+      no terminó su turno queda pendiente (estado None),
+      no AUSENTE
+
+    A diferencia de evaluar_dia, TARDE respeta la
+    tolerancia del empleado (igual que el aviso de
+    llegada tarde) y FERIADO se trata como FRANCO.
+    """
+
+    if not horario:
+        return {"estado": "SIN_PLAN", "detalle": "-"}
+
+    if horario.tipo in ("FRANCO", "FERIADO"):
+
+        if primer_ingreso:
+            return {"estado": "EXTRA", "detalle": "Día libre"}
+
+        return {"estado": "FRANCO", "detalle": "-"}
+
+    if horario.tipo == "LICENCIA":
+        return {"estado": "LICENCIA", "detalle": "-"}
+
+    if horario.tipo != "TRABAJA":
+        return {"estado": "SIN_PLAN", "detalle": horario.tipo}
+
+    if not primer_ingreso:
+
+        # ausente recién cuando terminó el turno (sin horas
+        # planificadas, al terminar el día); un turno noche
+        # de ayer puede seguir en curso
+        if ahora and fecha >= ahora.date() - timedelta(days=1):
+
+            fin = fin_turno(fecha, horario, tz) or datetime.combine(
+                fecha + timedelta(days=1), time.min, tzinfo=tz
+            )
+
+            if ahora < fin:
+                return {"estado": None, "detalle": "Pendiente"}
+
+        return {"estado": "AUSENTE", "detalle": "No fichó"}
+
+    if horario.bloques:
+        hora_turno = min(b.hora_inicio for b in horario.bloques)
+    else:
+        # compatibilidad vieja temporal
+        hora_turno = horario.hora_inicio
+
+    if hora_turno:
+
+        turno_dt = datetime.combine(fecha, hora_turno, tzinfo=tz)
+        limite = turno_dt + timedelta(minutes=tolerancia)
+
+        if primer_ingreso > limite:
+            minutos_tarde = int((primer_ingreso - turno_dt).total_seconds() // 60)
+
+            return {
+                "estado": "TARDE",
+                "detalle": f"{minutos_tarde} min tarde"
+            }
+
+    return {"estado": "OK", "detalle": "En horario"}
+
+
+# =====================================================
+# MATRIZ EMPLEADOS × DÍAS DEL MES
+# =====================================================
+def matriz_cumplimiento(empresa_id, year, month, sucursal_id=None):
+
+    """
+    Estado de cada empleado activo en cada día del mes.
+    Cantidad de consultas constante: empleados, horarios,
+    bloques (selectinload) y fichajes del mes.
+
+        {
+          "dias": [date, ...],
+          "filas": [{"empleado", "celdas": [...], "conteo"}],
+          "totales": Counter por estado
+        }
+
+    Un mes cerrado se lee del cierre.
+    """
+
+    cerrada = matriz_desde_cierre(empresa_id, year, month, sucursal_id)
+
+    if cerrada is not None:
+        return cerrada
+
+    tz_nombre = nombre_zona_empresa(empresa_id)
+    tz = zona(tz_nombre)
+    ahora = datetime.now(tz)
+
+    dias = [
+        date(year, month, d)
+        for d in range(1, calendar.monthrange(year, month)[1] + 1)
+    ]
+
+    inicio_utc, fin_utc = limites_mes(tz_nombre, year, month)
+
+    # 1) empleados
+    empleados_query = Empleado.query.filter(
+        Empleado.empresa_id == empresa_id,
+        Empleado.activo.is_(True)
+    )
+
+    if sucursal_id:
+        empleados_query = empleados_query.filter(
+            Empleado.sucursal_id == sucursal_id
+        )
+
+    empleados = empleados_query.order_by(
+        Empleado.apellido,
+        Empleado.nombre
+    ).all()
+
+    if not empleados:
+        return {"dias": dias, "filas": [], "totales": Counter()}
+
+    ids = db.select(Empleado.id).where(
+        Empleado.empresa_id == empresa_id,
+        *([Empleado.sucursal_id == sucursal_id] if sucursal_id else [])
+    )
+
+    # 2) horarios + 3) bloques
+    horarios = {
+        (h.empleado_id, h.fecha): h
+        for h in (
+            HorarioEmpleado.query
+            .options(selectinload(HorarioEmpleado.bloques))
+            .filter(
+                HorarioEmpleado.empleado_id.in_(ids),
+                HorarioEmpleado.fecha >= dias[0],
+                HorarioEmpleado.fecha <= dias[-1]
+            )
+        )
+    }
+
+    # 4) primer ingreso de cada empleado por día local
+    primeros = {}
+
+    for empleado_id, fecha_hora in db.session.execute(
+        db.select(Asistencia.empleado_id, Asistencia.fecha_hora)
+        .where(
+            Asistencia.empresa_id == empresa_id,
+            Asistencia.tipo == "INGRESO",
+            Asistencia.fecha_hora >= inicio_utc,
+            Asistencia.fecha_hora < fin_utc,
+            Asistencia.empleado_id.in_(ids)
+        )
+        .order_by(Asistencia.empleado_id, Asistencia.fecha_hora)
+    ):
+
+        local = fecha_hora.astimezone(tz)
+        primeros.setdefault((empleado_id, local.date()), local)
+
+    # ==========================================
+    # ARMAR LA MATRIZ
+    # ==========================================
+
+    filas = []
+    totales = Counter()
+
+    for emp in empleados:
+
+        tolerancia = emp.tolerancia_minutos or 0
+        celdas = []
+        conteo = Counter()
+
+        for dia in dias:
+
+            celda = clasificar_dia(
+                dia,
+                horarios.get((emp.id, dia)),
+                primeros.get((emp.id, dia)),
+                tz,
+                tolerancia,
+                ahora
+            )
+
+            celdas.append(celda)
+
+            # un día que todavía no terminó no es ausencia
+            if celda["estado"]:
+                conteo[celda["estado"]] += 1
+
+        totales.update(conteo)
+
+        filas.append({
+            "empleado": empleado_resumen(emp),
+            "celdas": celdas,
+            "conteo": conteo
+        })
+
+    return {"dias": dias, "filas": filas, "totales": totales}
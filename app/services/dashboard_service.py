@@ -0,0 +1,310 @@
+import time
+from flask import current_app
+from app.models import Empleado, Asistencia, Sucursal
+from app.services.cache_service import CacheTTL
+from app.services.bloques_service import empleados_sucursal
+from app.services.calendario_service import (
+    nombre_zona_empresa,
+    ahora_local,
+    zona,
+    limites_dia
+)
+from app.services.horarios_service import calcular_pendientes_ingreso
+from app.services.puntualidad_service import alertas_del_dia
+from app.services.horas_service import formatear_hhmm, serie_por_dia
+from app.services.rollup_service import horas_por_dia_rollup
+from app.services.version_datos_service import version_datos
+from app.services.presencia_service import (
+    obtener_ultimos_registros,
+    contar_trabajando
+)
+
+
+# snapshot del dashboard por (empresa_id, sucursal_id)
+_cache_dashboard = CacheTTL(ttl=30)
+
+
+# =====================================================
+# SNAPSHOT CACHEADO
+# =====================================================
+def obtener_snapshot_dashboard(empresa_id, sucursal_id=None):
+
+    """
+    Devuelve las variables del dashboard para la empresa
+    (y opcionalmente una sucursal), desde la cache si
+    todavía no venció o no hubo fichajes nuevos.
+    """
+
+    # la versión de datos invalida también la cache de
+    # otros procesos, que no reciben invalidar_dashboard()
+    clave = (empresa_id, sucursal_id, version_datos(empresa_id))
+
+    snapshot = _cache_dashboard.obtener(clave)
+
+    if snapshot is None:
+        snapshot = construir_snapshot_dashboard(empresa_id, sucursal_id)
+
+        _cache_dashboard.guardar(
+            clave,
+            snapshot,
+            ttl=current_app.config.get("DASHBOARD_CACHE_TTL", 30)
+        )
+
+    return snapshot
+
+
+def invalidar_dashboard(empresa_id):
+
+    _cache_dashboard.invalidar_empresa(empresa_id)
+
+
+def etag_dashboard(empresa_id, sucursal_id=None):
+
+    """
+    ETag del dashboard: versión de datos de la empresa más
+    la ventana de TTL actual (pendientes y horas cambian
+    con el paso del tiempo aunque no haya fichajes).
+    """
+
+    ttl = max(current_app.config.get("DASHBOARD_CACHE_TTL", 30), 1)
+    ventana = int(time.time() // ttl)
+
+    return (
+        f"dash-{empresa_id}-{sucursal_id or 0}-"
+        f"{version_datos(empresa_id)}-{ventana}"
+    )
+
+
+def snapshot_a_json(snapshot):
+
+    """
+    Snapshot con fechas en ISO y sucursales como lista,
+    listo para jsonify.
+    """
+
+    return {
+        "fecha_hoy": snapshot["fecha_hoy"].isoformat(),
+        "totales": {
+            "empleados": snapshot["total_empleados"],
+            "fichajes_hoy": snapshot["asistencias_hoy"],
+            "trabajando": snapshot["trabajando"],
+            "pendientes": len(snapshot["pendientes"]),
+            "llegadas_tarde": len(snapshot["alertas_tarde"]),
+            "horas_mes": snapshot["horas_mes"]
+        },
+        "grafico": {
+            "labels": snapshot["chart_labels"],
+            "data": snapshot["chart_data"]
+        },
+        "empleados_estado": snapshot["empleados_estado"],
+        "pendientes": snapshot["pendientes"],
+        "alertas_tarde": [
+            {
+                "descripcion": a["descripcion"],
+                "created_at": a["created_at"].isoformat()
+            }
+            for a in snapshot["alertas_tarde"]
+        ],
+        "sucursales": [
+            dict(s, id=sucursal_id)
+            for sucursal_id, s in snapshot["sucursales_data"].items()
+        ]
+    }
+
+
+# =====================================================
+# CÁLCULO COMPLETO DEL DASHBOARD
+# =====================================================
+def construir_snapshot_dashboard(empresa_id, sucursal_id=None):
+
+    """
+    Calcula todas las variables del dashboard de
+    administración. Devuelve solo datos planos (sin
+    objetos ORM) para poder reutilizarlos entre requests.
+
+    sucursal_id filtra en todas las secciones por la
+    sucursal del empleado (igual que los reportes), no
+    por la del fichaje.
+    """
+
+    tz_nombre = nombre_zona_empresa(empresa_id)
+    tz_local = zona(tz_nombre)
+
+    ahora = ahora_local(tz_nombre)
+    hoy = ahora.date()
+    inicio_dia, fin_dia = limites_dia(tz_nombre, hoy)
+
+    empleados_query = Empleado.query.filter_by(empresa_id=empresa_id)
+
+    if sucursal_id:
+        empleados_query = empleados_query.filter_by(sucursal_id=sucursal_id)
+
+    empleados = empleados_query.all()
+    empleados_activos = [e for e in empleados if e.activo]
+
+    # 👥 empleados activos
+    total_empleados = len(empleados_activos)
+
+    # 🕒 asistencias hoy
+    asistencias_hoy = Asistencia.query.filter(
+        Asistencia.empresa_id == empresa_id,
+        Asistencia.fecha_hora >= inicio_dia,
+        Asistencia.fecha_hora < fin_dia,
+        *([Asistencia.empleado_id.in_(
+            empleados_sucursal(empresa_id, sucursal_id)
+        )] if sucursal_id else [])
+    ).count()
+
+    # ==========================================
+    # ESTADO ACTUAL DEL PERSONAL
+    # ==========================================
+
+    # último fichaje de cada empleado (una sola consulta)
+    registro_dict = obtener_ultimos_registros(empresa_id)
+
+    if sucursal_id:
+        ids = {e.id for e in empleados}
+        registro_dict = {
+            k: v for k, v in registro_dict.items()
+            if k in ids
+        }
+
+    # 👷 empleados trabajando ahora
+    trabajando = contar_trabajando(registro_dict)
+
+    # ⏱ horas del mes
+    primer_dia_mes = hoy.replace(day=1)
+
+    # rollup diario: una fila por empleado y día
+    horas_empresa = horas_por_dia_rollup(
+        empresa_id,
+        primer_dia_mes,
+        sucursal_id=sucursal_id
+    )
+
+    horas_mes = formatear_hhmm(horas_empresa["total"])
+
+    # ==========================================
+    # ⛔ EMPLEADOS PENDIENTES DE INGRESO
+    # ==========================================
+
+    pendientes = calcular_pendientes_ingreso(
+        empresa_id,
+        empleados,
+        ahora
+    )
+
+    # ==========================================
+    # 📈 HORAS POR DÍA (GRÁFICO)
+    # ==========================================
+
+    labels, data = serie_por_dia(horas_empresa["por_dia"])
+
+    # ==========================================
+    # ESTADO GENERAL
+    # ==========================================
+
+    empleados_estado = []
+
+    for emp in empleados_activos:
+
+        registro = registro_dict.get(emp.id)
+
+        if registro:
+
+            estado = "ingreso" if registro.tipo == "INGRESO" else "salida"
+
+            hora_local = registro.fecha_hora.astimezone(tz_local)
+
+            empleados_estado.append({
+                "nombre": f"{emp.apellido} {emp.nombre}",
+                "estado": estado,
+                "hora": hora_local.strftime("%H:%M")
+            })
+
+        else:
+
+            empleados_estado.append({
+                "nombre": f"{emp.apellido} {emp.nombre}",
+                "estado": "sin_registro",
+                "hora": None
+            })
+
+    orden_prioridad = {
+        "ingreso": 0,
+        "sin_registro": 1,
+        "salida": 2
+    }
+
+    empleados_estado.sort(key=lambda x: orden_prioridad[x["estado"]])
+
+    # ==========================================
+    # 👷 LISTA DE QUIENES ESTÁN TRABAJANDO
+    # ==========================================
+
+    empleados_trabajando = [
+        emp for emp in empleados_estado
+        if emp["estado"] == "ingreso"
+    ]
+
+    # ==========================================
+    # ⚠ LLEGADAS TARDE HOY
+    # ==========================================
+
+    alertas_tarde = alertas_del_dia(empresa_id, hoy, sucursal_id)
+
+    # ==========================================
+    # 📍 EMPLEADOS POR SUCURSAL (KIOSCO)
+    # ==========================================
+
+    # dónde ficharon los empleados (de la sucursal elegida,
+    # si hay filtro): puede ser otra sucursal
+    sucursales_query = Sucursal.query.filter_by(
+        empresa_id=empresa_id,
+        activa=True
+    )
+
+    sucursales_data = {s.id: {
+        "nombre": s.nombre,
+        "empleados": []
+    } for s in sucursales_query.all()}
+
+    # Usamos los últimos registros (ya calculados arriba)
+    for emp in empleados_activos:
+
+        registro = registro_dict.get(emp.id)
+
+        if not registro or not registro.sucursal_id:
+            continue
+
+        estado = "ACTIVO" if registro.tipo == "INGRESO" else "FUERA"
+
+        hora_local = registro.fecha_hora.astimezone(tz_local)
+
+        if registro.sucursal_id in sucursales_data:
+            sucursales_data[registro.sucursal_id]["empleados"].append({
+                "nombre": f"{emp.apellido} {emp.nombre}",
+                "estado": estado,
+                "hora": hora_local.strftime("%H:%M")
+            })
+
+    if sucursal_id:
+        sucursales_data = {
+            k: v for k, v in sucursales_data.items()
+            if k == sucursal_id or v["empleados"]
+        }
+
+    return {
+        "total_empleados": total_empleados,
+        "asistencias_hoy": asistencias_hoy,
+        "trabajando": trabajando,
+        "horas_mes": horas_mes,
+        "chart_labels": labels,
+        "chart_data": data,
+        "fecha_hoy": hoy,
+        "empleados_estado": empleados_estado,
+        "empleados_trabajando": empleados_trabajando,
+        "alertas_tarde": alertas_tarde,
+        "pendientes": pendientes,
+        "sucursales_data": sucursales_data
+    }
@@ -0,0 +1,49 @@
+from app.models import db
+from app.audit import registrar_eventos_diferidos
+from app.services.dashboard_service import invalidar_dashboard
+from app.services.reporte_cache_service import invalidar_reportes
+from app.services.version_datos_service import incrementar_version_datos
+from app.services.rollup_service import actualizar_rollup
+from app.services.presencia_service import evento_presencia
+from app.services.presencia_hub import despachar_evento, publicar_presencia
+
+
+# =====================================================
+# CAMBIOS EN FICHAJES
+# =====================================================
+def notificar_cambio_asistencia(empresa_id, empleado_id=None, fechas_hora=()):
+
+    """
+    Punto único para confirmar un alta, edición o baja de
+    Asistencia: se llama con el cambio ya hecho (flush) y
+    sin commitear. Rollup, versión de datos, NOTIFY de
+    presencia y alerta de llegada tarde van en la misma
+    transacción: un solo commit por fichaje.
+
+    fechas_hora: fecha_hora del fichaje (y la anterior
+    si fue una edición) para recalcular el rollup diario.
+    """
+
+    evento = None
+    por_notify = False
+
+    if empleado_id:
+        actualizar_rollup(empresa_id, empleado_id, fechas_hora)
+
+        # tablero en vivo (SSE / long-poll) de todos los procesos
+        evento = evento_presencia(empresa_id, empleado_id)
+        por_notify = publicar_presencia(empresa_id, evento)
+
+    # caches / ETags de la empresa quedan viejos en todos los procesos
+    incrementar_version_datos(empresa_id)
+
+    db.session.commit()
+
+    # auditoría que solo vale si el fichaje quedó guardado
+    registrar_eventos_diferidos()
+
+    invalidar_dashboard(empresa_id)
+    invalidar_reportes(empresa_id)
+
+    if evento and not por_notify:
+        despachar_evento(empresa_id, evento)
@@ -1,77 +1,190 @@
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
+from openpyxl.styles import Font, Alignment, PatternFill, NamedStyle
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.utils import get_column_letter
-from io import BytesIO
 from openpyxl.drawing.image import Image
+from functools import lru_cache
+from io import BytesIO
+from flask import send_file
 import os
-#------------------------------------------------
-#REPORTE MENSUAL
-#------------------------------------------------
-def exportar_reporte_mensual_excel(
-        empresa_nombre,
-        nombre_mes,
-        resumen
-):
-    #== == == == == == == == == == == == =
-    # LOGO
-    # =========================
+import tempfile
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Reporte mensual"
 
-    # =========================
-    # LOGO
-    # =========================
+MIMETYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+# ------------------------------------------------
+# LOGO (SE LEE UNA VEZ POR PROCESO)
+# ------------------------------------------------
+@lru_cache(maxsize=1)
+def logo_bytes():
 
     logo_path = os.path.join(
-        os.getcwd(),
-        "app",
+        os.path.dirname(os.path.dirname(__file__)),
         "static",
         "img",
         "logocorpo.png"
     )
 
-    if os.path.exists(logo_path):
-        logo = Image(logo_path)
-        logo.height = 80
-        logo.width = 220
-        ws.add_image(logo, "A1")
-    ws.title = "Reporte mensual"
+    if not os.path.exists(logo_path):
+        return None
 
-    # =========================
-    # ESTILOS
-    # =========================
+    with open(logo_path, "rb") as f:
+        return f.read()
+
+
+def agregar_logo(ws, celda="A1"):
+
+    datos = logo_bytes()
+
+    if not datos:
+        return
+
+    logo = Image(BytesIO(datos))
+    logo.height = 80
+    logo.width = 220
+    ws.add_image(logo, celda)
 
-    titulo_font = Font(size=18, bold=True)
-    header_font = Font(bold=True)
+
+# ------------------------------------------------
+# ESTILOS CON NOMBRE (UNO POR LIBRO)
+# ------------------------------------------------
+def registrar_estilos(wb):
 
     center = Alignment(horizontal="center", vertical="center")
 
-    header_fill = PatternFill(
-        start_color="1F4E78",
-        end_color="1F4E78",
-        fill_type="solid"
+    wb.add_named_style(NamedStyle(
+        name="titulo",
+        font=Font(size=18, bold=True)
+    ))
+
+    wb.add_named_style(NamedStyle(
+        name="encabezado",
+        font=Font(bold=True, color="FFFFFF"),
+        fill=PatternFill(
+            start_color="1F4E78",
+            end_color="1F4E78",
+            fill_type="solid"
+        ),
+        alignment=center
+    ))
+
+    wb.add_named_style(NamedStyle(
+        name="estado_ok",
+        fill=PatternFill(start_color="D4EDDA", end_color="D4EDDA", fill_type="solid")
+    ))
+
+    wb.add_named_style(NamedStyle(
+        name="estado_incompleto",
+        fill=PatternFill(start_color="FFF3CD", end_color="FFF3CD", fill_type="solid")
+    ))
+
+
+def celda(ws, valor, estilo=None):
+
+    cell = WriteOnlyCell(ws, value=valor)
+
+    if estilo:
+        cell.style = estilo
+
+    return cell
+
+
+def nuevo_libro(titulo_hoja, widths):
+
+    """
+    Libro write-only: las filas se van volcando a disco
+    a medida que se agregan, sin mantener la hoja en RAM.
+    """
+
+    wb = Workbook(write_only=True)
+    registrar_estilos(wb)
+
+    ws = wb.create_sheet(titulo_hoja)
+
+    # en write-only los anchos van antes de la primera fila
+    for i, w in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(i)].width = w
+
+    return wb, ws
+
+
+def guardar_temporal(wb, ruta=None):
+
+    if ruta:
+        wb.save(ruta)
+        return ruta
+
+    archivo = tempfile.NamedTemporaryFile(
+        prefix="reporte_",
+        suffix=".xlsx",
+        delete=False
     )
+    archivo.close()
+
+    wb.save(archivo.name)
+
+    return archivo.name
+
+
+def enviar_excel(ruta, download_name):
+
+    """
+    Envía el archivo desde disco en bloques (sin cargarlo
+    entero en memoria) y lo borra al cerrar la respuesta.
+    """
+
+    response = send_file(
+        ruta,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype=MIMETYPE_XLSX
+    )
+
+    def borrar():
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+    response.call_on_close(borrar)
+
+    return response
+
+
+#------------------------------------------------
+#REPORTE MENSUAL
+#------------------------------------------------
+def exportar_reporte_mensual_excel(
+        empresa_nombre,
+        nombre_mes,
+        resumen,
+        ruta=None,
+        total_general=None
+):
+
+    """
+    Genera el reporte mensual en `ruta` (o en un archivo
+    temporal) y devuelve la ruta (usar con enviar_excel).
+    """
 
-    header_font_white = Font(bold=True, color="FFFFFF")
+    wb, ws = nuevo_libro("Reporte mensual", [35, 20, 20, 15])
 
     # =========================
-    # TITULO
+    # LOGO
     # =========================
 
-    ws.merge_cells("A3:D3")
-    ws["A3"] = "Reporte mensual de asistencia"
-    ws["A3"].font = titulo_font
-    ws["A3"].alignment = center
+    agregar_logo(ws)
 
-    ws.merge_cells("A2:D2")
-    ws["A2"] = empresa_nombre
-    ws["A2"].alignment = center
+    # =========================
+    # TITULO (DEBAJO DEL LOGO)
+    # =========================
 
-    ws.merge_cells("A3:D3")
-    ws["A3"] = nombre_mes
-    ws["A3"].alignment = center
+    for _ in range(4):
+        ws.append([])
+
+    ws.append([celda(ws, "Reporte mensual de asistencia", "titulo")])
+    ws.append([f"{empresa_nombre} - {nombre_mes}"])
 
     # =========================
     # ENCABEZADOS
@@ -84,77 +197,51 @@ def exportar_reporte_mensual_excel(
         "Estado"
     ]
 
-    row_start = 7
-
-    for col, header in enumerate(headers, 1):
-
-        cell = ws.cell(row=row_start, column=col)
-
-        cell.value = header
-        cell.font = header_font_white
-        cell.fill = header_fill
-        cell.alignment = center
+    ws.append([celda(ws, h, "encabezado") for h in headers])
 
     # =========================
     # DATOS
     # =========================
 
-    row = row_start + 1
+    total_empleados = 0
+    total_horas = 0
+    total_minutos = 0
 
     for r in resumen:
 
-        ws.cell(row=row, column=1).value = \
-            f"{r['empleado'].apellido}, {r['empleado'].nombre}"
-
-        ws.cell(row=row, column=2).value = r["dias"]
-
-        ws.cell(row=row, column=3).value = r["horas"]
-
-        estado_cell = ws.cell(row=row, column=4)
-        estado_cell.value = r["estado"]
-
-        if r["estado"] == "INCOMPLETO":
-            estado_cell.fill = PatternFill(start_color="FFF3CD", end_color="FFF3CD", fill_type="solid")
-        else:
-            estado_cell.fill = PatternFill(start_color="D4EDDA", end_color="D4EDDA", fill_type="solid")
+        estilo = (
+            "estado_incompleto"
+            if r["estado"] == "INCOMPLETO"
+            else "estado_ok"
+        )
 
-        row += 1
+        ws.append([
+            f"{r['empleado'].apellido}, {r['empleado'].nombre}",
+            r["dias"],
+            r["horas"],
+            celda(ws, r["estado"], estilo)
+        ])
 
-    # =========================
-    # TOTALES
-    # =========================
-    ws.cell(row=row + 1, column=1).value = "Total empleados"
-    ws.cell(row=row + 1, column=2).value = len(resumen)
-    total_horas = 0
-    total_minutos = 0
-    for r in resumen:
         h, m = r["horas"].split(":")
         total_horas += int(h)
         total_minutos += int(m)
-    extra_horas = total_minutos // 60
-    total_horas += extra_horas
-    total_minutos = total_minutos % 60
-    ws.cell(row=row + 2, column=1).value = "Total horas"
-    ws.cell(row=row + 2, column=2).value = f"{total_horas:02d}:{total_minutos:02d}"
+        total_empleados += 1
 
     # =========================
-    # AJUSTAR COLUMNAS
+    # TOTALES
     # =========================
 
-    widths = [35, 20, 20, 15]
-
-    for i, w in enumerate(widths, 1):
-        ws.column_dimensions[get_column_letter(i)].width = w
-
-    # =========================
-    # GUARDAR EN MEMORIA
-    # =========================
+    total_horas += total_minutos // 60
+    total_minutos = total_minutos % 60
 
-    file = BytesIO()
-    wb.save(file)
-    file.seek(0)
+    ws.append([])
+    ws.append(["Total empleados", total_empleados])
+    ws.append([
+        "Total horas",
+        total_general or f"{total_horas:02d}:{total_minutos:02d}"
+    ])
 
-    return file
+    return guardar_temporal(wb, ruta)
 
 #------------------------------------------------
 #REPORTE DETALLE POR EMPLEADO
@@ -166,38 +253,19 @@ def exportar_detalle_empleado_excel(
         detalle
 ):
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Detalle mensual"
+    """
+    Detalle de bloques de un empleado. `detalle` puede ser
+    un generador: se escribe fila por fila.
+    """
 
-    titulo_font = Font(size=18, bold=True)
-    header_font = Font(bold=True, color="FFFFFF")
-
-    center = Alignment(horizontal="center", vertical="center")
-
-    header_fill = PatternFill(
-        start_color="1F4E78",
-        end_color="1F4E78",
-        fill_type="solid"
-    )
+    wb, ws = nuevo_libro("Detalle mensual", [12, 10, 12, 12, 12, 12, 20])
 
     # TITULO
-    ws.merge_cells("A1:G1")
-    ws["A1"] = "Detalle mensual de asistencia"
-    ws["A1"].font = titulo_font
-    ws["A1"].alignment = center
-
-    ws.merge_cells("A2:G2")
-    ws["A2"] = empresa_nombre
-    ws["A2"].alignment = center
-
-    ws.merge_cells("A3:G3")
-    ws["A3"] = f"Empleado: {empleado_nombre}"
-    ws["A3"].alignment = center
-
-    ws.merge_cells("A4:G4")
-    ws["A4"] = nombre_mes
-    ws["A4"].alignment = center
+    ws.append([celda(ws, "Detalle mensual de asistencia", "titulo")])
+    ws.append([empresa_nombre])
+    ws.append([f"Empleado: {empleado_nombre}"])
+    ws.append([nombre_mes])
+    ws.append([])
 
     headers = [
         "Fecha",
@@ -209,47 +277,18 @@ def exportar_detalle_empleado_excel(
         "Actividad"
     ]
 
-    row_start = 6
-
-    for col, header in enumerate(headers, 1):
-
-        cell = ws.cell(row=row_start, column=col)
-
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = center
-
-    row = row_start + 1
+    ws.append([celda(ws, h, "encabezado") for h in headers])
 
     for d in detalle:
 
-        ws.cell(row=row, column=1).value = d["fecha"].strftime("%d/%m")
-        ws.cell(row=row, column=2).value = d["bloque"]
-
-        ws.cell(row=row, column=3).value = (
-            d["ingreso"].strftime("%H:%M")
-            if d["ingreso"] else "-"
-        )
-
-        ws.cell(row=row, column=4).value = (
-            d["salida"].strftime("%H:%M")
-            if d["salida"] else "-"
-        )
-
-        ws.cell(row=row, column=5).value = d["horas"]
-        ws.cell(row=row, column=6).value = d["estado"]
-        ws.cell(row=row, column=7).value = d["actividad"]
-
-        row += 1
-
-    widths = [12,10,12,12,12,12,20]
-
-    for i, w in enumerate(widths, 1):
-        ws.column_dimensions[get_column_letter(i)].width = w
-
-    file = BytesIO()
-    wb.save(file)
-    file.seek(0)
-
-    return file
\ No newline at end of file
+        ws.append([
+            d["fecha"].strftime("%d/%m"),
+            d["bloque"],
+            d["ingreso"].strftime("%H:%M") if d["ingreso"] else "-",
+            d["salida"].strftime("%H:%M") if d["salida"] else "-",
+            d["horas"],
+            d["estado"],
+            d["actividad"]
+        ])
+
+    return guardar_temporal(wb)
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+# =====================================================
+# EXPORTACIONES EN SEGUNDO PLANO
+# =====================================================
+#
+# Cada trabajo vive en disco, en EXPORT_DIR:
+#
+#   <job_id>.json   estado (pendiente / listo / error)
+#   <job_id>.xlsx   archivo generado
+#
+# El job_id sale de (empresa, rango, sucursal, versión de
+# datos), así dos pedidos iguales caen en el mismo trabajo
+# aunque lleguen a workers distintos de gunicorn: el
+# primero crea el .json con O_EXCL y encola, el resto
+# solo consulta el estado.
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_LISTO = "listo"
+ESTADO_ERROR = "error"
+
+# un trabajo pendiente más viejo que esto se da por caído
+TIMEOUT_PENDIENTE = 15 * 60
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool(max_workers):
+
+    """
+    Pool de procesos (uno por worker de gunicorn), creado
+    recién cuando se pide la primera exportación. Usa
+    spawn: el proceso padre tiene threads (gthread, NOTIFY)
+    y no es seguro hacer fork.
+    """
+
+    global _pool
+
+    with _pool_lock:
+
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        return _pool
+
+
+def clave_trabajo(params, version):
+
+    partes = [
+        params["empresa_id"],
+        params["desde"],
+        params["hasta"],
+        params["sucursal_id"],
+        params["modo"],
+        version
+    ]
+
+    return hashlib.sha1(
+        "|".join(str(p) for p in partes).encode()
+    ).hexdigest()[:24]
+
+
+def rutas_trabajo(directorio, job_id):
+
+    return (
+        os.path.join(directorio, f"{job_id}.json"),
+        os.path.join(directorio, f"{job_id}.xlsx")
+    )
+
+
+def _escribir_estado(ruta, estado):
+
+    # escritura atómica: nunca se lee un json a medias
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+
+    with open(temporal, "w") as f:
+        json.dump(estado, f)
+
+    os.replace(temporal, ruta)
+
+
+def leer_trabajo(directorio, job_id):
+
+    if not job_id.isalnum():
+        return None
+
+    ruta_estado, _ = rutas_trabajo(directorio, job_id)
+
+    try:
+        with open(ruta_estado) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# =====================================================
+# ENCOLAR (DESDE EL REQUEST)
+# =====================================================
+def encolar_exportacion_mensual(params, version, config):
+
+    """
+    Devuelve el estado del trabajo para estos parámetros,
+    encolándolo solo si no existe uno vigente.
+    """
+
+    directorio = config["EXPORT_DIR"]
+    os.makedirs(directorio, exist_ok=True)
+
+    purgar_vencidos(directorio)
+
+    job_id = clave_trabajo(params, version)
+    ruta_estado, ruta_archivo = rutas_trabajo(directorio, job_id)
+
+    estado = leer_trabajo(directorio, job_id)
+
+    if estado and not _caido(estado):
+        return estado
+
+    if estado:
+        # error o pendiente colgado → reintentar
+        try:
+            os.remove(ruta_estado)
+        except OSError:
+            pass
+
+    ahora = time.time()
+
+    estado = {
+        "job_id": job_id,
+        "empresa_id": params["empresa_id"],
+        "estado": ESTADO_PENDIENTE,
+        "nombre": f"reporte_{params['nombre_archivo']}.xlsx",
+        "creado": ahora,
+        "vence": ahora + config["EXPORT_TTL"]
+    }
+
+    try:
+        fd = os.open(ruta_estado, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # otro request (u otro worker) ganó la carrera
+        return leer_trabajo(directorio, job_id) or estado
+
+    with os.fdopen(fd, "w") as f:
+        json.dump(estado, f)
+
+    try:
+        obtener_pool(config["EXPORT_WORKERS"]).submit(
+            generar_exportacion_mensual,
+            params,
+            ruta_estado,
+            ruta_archivo
+        )
+    except Exception as e:
+        _escribir_estado(ruta_estado, dict(estado, estado=ESTADO_ERROR, error=str(e)))
+        return leer_trabajo(directorio, job_id)
+
+    return estado
+
+
+def _caido(estado):
+
+    if estado["estado"] == ESTADO_ERROR:
+        return True
+
+    if estado["estado"] == ESTADO_LISTO:
+        return estado["vence"] < time.time()
+
+    return estado["creado"] + TIMEOUT_PENDIENTE < time.time()
+
+
+def purgar_vencidos(directorio):
+
+    """
+    Borra archivos y estados vencidos. Se llama al encolar,
+    así no hace falta un proceso aparte de limpieza.
+    """
+
+    ahora = time.time()
+
+    for nombre in os.listdir(directorio):
+
+        if not nombre.endswith(".json"):
+            continue
+
+        estado = leer_trabajo(directorio, nombre[:-5])
+
+        if not estado or estado.get("vence", ahora) >= ahora:
+            continue
+
+        for ruta in rutas_trabajo(directorio, estado["job_id"]):
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+
+
+# =====================================================
+# GENERAR (EN EL PROCESO DEL POOL)
+# =====================================================
+_app = None
+
+
+def _app_proceso():
+
+    # una app por proceso del pool (conexiones propias)
+    global _app
+
+    if _app is None:
+        from app import create_app
+        _app = create_app()
+
+    return _app
+
+
+def generar_exportacion_mensual(params, ruta_estado, ruta_archivo):
+
+    from app.services.reporte_mensual_service import resumen_mensual
+    from app.services.excel_export import exportar_reporte_mensual_excel
+
+    with open(ruta_estado) as f:
+        estado = json.load(f)
+
+    try:
+        with _app_proceso().app_context():
+
+            resumen = resumen_mensual(
+                params["empresa_id"],
+                params["tz_nombre"],
+                params["desde"],
+                params["hasta"],
+                params["sucursal_id"],
+                params["modo"]
+            )
+
+            temporal = f"{ruta_archivo}.tmp"
+
+            exportar_reporte_mensual_excel(
+                params["empresa_nombre"],
+                params["nombre_archivo"],
+                resumen["filas"],
+                ruta=temporal,
+                total_general=resumen["total_general"]
+            )
+
+            os.replace(temporal, ruta_archivo)
+
+        terminado = time.time()
+
+        _escribir_estado(ruta_estado, dict(
+            estado,
+            estado=ESTADO_LISTO,
+            terminado=terminado,
+            vence=terminado + (estado["vence"] - estado["creado"])
+        ))
+
+    except Exception as e:
+        print("ERROR EXPORTACION:", e)
+
+        _escribir_estado(ruta_estado, dict(
+            estado,
+            estado=ESTADO_ERROR,
+            error=str(e)
+        ))
@@ -1,11 +1,17 @@
 from datetime import datetime, timedelta
-from app.models import HorarioEmpleado
-from zoneinfo import ZoneInfo
+from sqlalchemy.orm import selectinload
+from app.models import HorarioEmpleado, Asistencia, db
+from app.services.calendario_service import (
+    nombre_zona_empresa,
+    zona,
+    zona_empresa,
+    limites_dia
+)
 
 
 
 def obtener_turno_dia(empleado, fecha):
-    tz = ZoneInfo("America/Argentina/Buenos_Aires")
+    tz = zona_empresa(empleado.empresa_id)
 
     fecha_local = fecha.astimezone(tz).date()
 
@@ -40,42 +46,159 @@ def obtener_turno_dia(empleado, fecha):
 
             db.session.refresh(horario)
 
-        bloques = sorted(
-            horario.bloques,
-            key=lambda b: b.hora_inicio
+        return armar_turno(horario)
+
+    # fallback al turno fijo del empleado
+
+    return None
+
+
+def armar_turno(horario):
+
+    """
+    Arma el dict de turno a partir de un HorarioEmpleado
+    (con sus bloques ya cargados).
+    """
+
+    bloques = sorted(
+        horario.bloques,
+        key=lambda b: b.hora_inicio
+    )
+
+    inicio = None
+    fin = None
+
+    if bloques:
+        inicio = bloques[0].hora_inicio
+        fin = bloques[-1].hora_fin
+
+    else:
+        # compatibilidad vieja temporal
+        inicio = horario.hora_inicio
+        fin = horario.hora_fin
+
+    return {
+        "tipo": horario.tipo,
+        "inicio": inicio,
+        "fin": fin,
+        "bloques": bloques
+    }
+
+
+def obtener_turnos_dia_empresa(empleados, fecha_local):
+
+    """
+    Turnos del día para un conjunto de empleados.
+
+    Devuelve {empleado_id: turno} cargando los horarios
+    y sus bloques en dos consultas (sin migrar ni
+    commitear: los horarios viejos sin bloques se
+    resuelven con hora_inicio / hora_fin).
+    """
+
+    empleados_ids = [e.id for e in empleados]
+
+    if not empleados_ids:
+        return {}
+
+    horarios = (
+        HorarioEmpleado.query
+        .options(selectinload(HorarioEmpleado.bloques))
+        .filter(
+            HorarioEmpleado.empleado_id.in_(empleados_ids),
+            HorarioEmpleado.fecha == fecha_local
         )
+        .all()
+    )
 
-        inicio = None
-        fin = None
+    return {
+        h.empleado_id: armar_turno(h)
+        for h in horarios
+    }
 
-        if bloques:
-            inicio = bloques[0].hora_inicio
-            fin = bloques[-1].hora_fin
 
-        else:
-            # compatibilidad vieja temporal
-            inicio = horario.hora_inicio
-            fin = horario.hora_fin
+def calcular_pendientes_ingreso(empresa_id, empleados, ahora):
 
-        return {
-            "tipo": horario.tipo,
-            "inicio": inicio,
-            "fin": fin,
-            "bloques": bloques
-        }
+    """
+    Empleados que deberían haber ingresado hoy
+    (turno + tolerancia vencidos) y todavía no ficharon.
 
-    # fallback al turno fijo del empleado
+    Cantidad de consultas constante: horarios del día,
+    bloques e ingresos del día de toda la empresa.
+    """
 
-    return None
+    tz_nombre = nombre_zona_empresa(empresa_id)
+    tz = zona(tz_nombre)
 
-def evaluar_llegada_tarde(
+    ahora_local = ahora.astimezone(tz)
+    hoy = ahora_local.date()
+
+    turnos = obtener_turnos_dia_empresa(empleados, hoy)
+
+    if not turnos:
+        return []
+
+    inicio_dia, fin_dia = limites_dia(tz_nombre, hoy)
+
+    ingresaron = {
+        empleado_id
+        for (empleado_id,) in (
+            db.session.query(Asistencia.empleado_id)
+            .filter(
+                Asistencia.empresa_id == empresa_id,
+                Asistencia.tipo == "INGRESO",
+                Asistencia.fecha_hora >= inicio_dia,
+                Asistencia.fecha_hora < fin_dia
+            )
+            .distinct()
+        )
+    }
+
+    pendientes = []
+
+    for emp in empleados:
+
+        turno = turnos.get(emp.id)
+
+        # no trabaja hoy → ignorar
+        if not turno or turno["tipo"] != "TRABAJA":
+            continue
+
+        # sin horario → ignorar
+        if not turno["inicio"]:
+            continue
+
+        turno_dt = datetime.combine(hoy, turno["inicio"], tzinfo=tz)
+
+        tolerancia = emp.tolerancia_minutos or 0
+        limite = turno_dt + timedelta(minutes=tolerancia)
+
+        # todavía no debería haber llegado → ignorar
+        if ahora_local <= limite:
+            continue
+
+        # si ya ingresó → no es pendiente
+        if emp.id in ingresaron:
+            continue
+
+        pendientes.append({
+            "nombre": f"{emp.apellido} {emp.nombre}",
+            "hora": turno["inicio"].strftime("%H:%M")
+        })
+
+    return pendientes
+
+def calcular_llegada_tarde(
     empleado,
     fecha_hora
 ):
 
-    tz = ZoneInfo(
-        "America/Argentina/Buenos_Aires"
-    )
+    """
+    (inicio del primer bloque, minutos tarde) si el
+    ingreso supera inicio + tolerancia; si no, None.
+    """
+
+    tz = zona_empresa(empleado.empresa_id)
 
     fecha_hora = fecha_hora.astimezone(tz)
 
@@ -85,15 +208,15 @@ def evaluar_llegada_tarde(
     )
 
     if not turno:
-        return False
+        return None
 
     if turno["tipo"] != "TRABAJA":
-        return False
+        return None
 
     bloques = turno.get("bloques", [])
 
     if not bloques:
-        return False
+        return None
 
     tolerancia = (
         empleado.tolerancia_minutos or 0
@@ -120,4 +243,17 @@ def evaluar_llegada_tarde(
         minutes=tolerancia
     )
 
-    return fecha_hora > limite
\ No newline at end of file
+    if fecha_hora <= limite:
+        return None
+
+    minutos_tarde = int((fecha_hora - turno_dt).total_seconds() // 60)
+
+    return primer_bloque.hora_inicio, minutos_tarde
+
+
+def evaluar_llegada_tarde(
+    empleado,
+    fecha_hora
+):
+
+    return calcular_llegada_tarde(empleado, fecha_hora) is not None
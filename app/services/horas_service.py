@@ -0,0 +1,25 @@
+# =====================================================
+# FORMATO DE HORAS
+# =====================================================
+def formatear_hhmm(total_segundos):
+
+    horas = int(total_segundos // 3600)
+    minutos = int((total_segundos % 3600) // 60)
+
+    return f"{horas:02d}:{minutos:02d}"
+
+
+def serie_por_dia(por_dia):
+
+    """
+    Labels (dd/mm) y horas por día para el gráfico.
+    """
+
+    labels = []
+    data = []
+
+    for dia in sorted(por_dia.keys()):
+        labels.append(dia.strftime("%d/%m"))
+        data.append(round(por_dia[dia] / 3600, 2))
+
+    return labels, data
@@ -0,0 +1,140 @@
+import re
+import threading
+import time
+from collections import Counter
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# =====================================================
+# CONTADOR DE CONSULTAS Y DETECTOR DE N+1 (OPT-IN)
+# =====================================================
+#
+# SQL_INSTRUMENTACION:
+#   "off"    → nada (por defecto)
+#   "header" → solo requests con X-Debug-SQL: 1
+#   "on"     → todos los requests
+#
+# Por request se registran cantidad de sentencias, tiempo
+# total en la base y la "forma" de cada sentencia (SQL sin
+# literales ni listas de IN). Una misma forma repetida
+# SQL_N1_UMBRAL veces o más es un N+1 probable: se informa
+# en el log y en el header X-SQL-Stats.
+
+_listeners_lock = threading.Lock()
+_listeners_instalados = False
+
+_RE_LITERALES = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_RE_LISTA_IN = re.compile(r"IN\s*\((?:[^()]*)\)", re.IGNORECASE)
+_RE_PARAMS = re.compile(r"%\(\w+\)s|\?|:\w+")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+def forma_sentencia(sql):
+
+    forma = _RE_LISTA_IN.sub("IN (...)", sql)
+    forma = _RE_PARAMS.sub("?", forma)
+    forma = _RE_LITERALES.sub("?", forma)
+
+    return _RE_ESPACIOS.sub(" ", forma).strip()
+
+
+def _estado():
+
+    if not has_request_context():
+        return None
+
+    return g.get("_sql_stats")
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+
+    if _estado() is not None:
+        conn.info.setdefault("_sql_inicio", []).append(time.perf_counter())
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+
+    stats = _estado()
+
+    if stats is None:
+        return
+
+    inicios = conn.info.get("_sql_inicio")
+    duracion = time.perf_counter() - inicios.pop() if inicios else 0
+
+    stats["consultas"] += 1
+    stats["segundos"] += duracion
+    stats["formas"][forma_sentencia(statement)] += 1
+
+
+def _instalar_listeners():
+
+    global _listeners_instalados
+
+    with _listeners_lock:
+
+        if _listeners_instalados:
+            return
+
+        event.listen(Engine, "before_cursor_execute", _antes)
+        event.listen(Engine, "after_cursor_execute", _despues)
+
+        _listeners_instalados = True
+
+
+def instalar_instrumentacion_sql(app):
+
+    modo = app.config.get("SQL_INSTRUMENTACION", "off")
+
+    if modo not in ("header", "on"):
+        return
+
+    _instalar_listeners()
+
+    @app.before_request
+    def iniciar_stats_sql():
+
+        if modo == "header" and request.headers.get("X-Debug-SQL") != "1":
+            return
+
+        g._sql_stats = {
+            "consultas": 0,
+            "segundos": 0.0,
+            "formas": Counter()
+        }
+
+    @app.after_request
+    def informar_stats_sql(response):
+
+        stats = g.pop("_sql_stats", None)
+
+        if stats is None:
+            return response
+
+        umbral = app.config.get("SQL_N1_UMBRAL", 5)
+
+        repetidas = [
+            (forma, veces)
+            for forma, veces in stats["formas"].most_common()
+            if veces >= umbral
+        ]
+
+        response.headers["X-SQL-Stats"] = (
+            f"consultas={stats['consultas']}; "
+            f"ms={stats['segundos'] * 1000:.1f}; "
+            f"n1={len(repetidas)}"
+        )
+
+        if repetidas:
+            app.logger.warning(
+                "N+1 probable en %s %s (%d consultas, %.1f ms): %s",
+                request.method,
+                request.path,
+                stats["consultas"],
+                stats["segundos"] * 1000,
+                "; ".join(f"{veces}x {forma[:200]}" for forma, veces in repetidas)
+            )
+
+        return response
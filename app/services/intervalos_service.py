@@ -0,0 +1,241 @@
+import calendar
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import selectinload
+from app.models import Empleado, HorarioEmpleado, db
+from app.services.calendario_service import nombre_zona_empresa, zona, limites_mes
+from app.services.bloques_service import iterar_fichajes, emparejar_bloques, empleados_sucursal
+from app.services.reporte_cache_service import empleado_resumen
+
+
+# =====================================================
+# INTERVALOS (INICIO, FIN) ORDENADOS
+# =====================================================
+def unir_intervalos(intervalos):
+
+    """
+    Ordena y fusiona intervalos solapados o contiguos,
+    así cada lista queda disjunta antes del barrido.
+    """
+
+    unidos = []
+
+    for inicio, fin in sorted(intervalos):
+
+        if fin <= inicio:
+            continue
+
+        if unidos and inicio <= unidos[-1][1]:
+            if fin > unidos[-1][1]:
+                unidos[-1] = (unidos[-1][0], fin)
+        else:
+            unidos.append((inicio, fin))
+
+    return unidos
+
+
+def intervalos_planificados(horario, tz):
+
+    """
+    Bloques del HorarioEmpleado como datetimes locales.
+    Un bloque que termina antes de empezar cruza la
+    medianoche (turno noche).
+    """
+
+    if not horario or horario.tipo != "TRABAJA":
+        return []
+
+    bloques = [(b.hora_inicio, b.hora_fin) for b in horario.bloques]
+
+    if not bloques and horario.hora_inicio and horario.hora_fin:
+        # compatibilidad vieja temporal
+        bloques = [(horario.hora_inicio, horario.hora_fin)]
+
+    intervalos = []
+
+    for hora_inicio, hora_fin in bloques:
+
+        inicio = datetime.combine(horario.fecha, hora_inicio, tzinfo=tz)
+        fin = datetime.combine(horario.fecha, hora_fin, tzinfo=tz)
+
+        if fin <= inicio:
+            fin += timedelta(days=1)
+
+        intervalos.append((inicio, fin))
+
+    return unir_intervalos(intervalos)
+
+
+# =====================================================
+# BARRIDO PLAN VS TRABAJADO (LINEAL)
+# =====================================================
+def comparar_intervalos(planificados, trabajados):
+
+    """
+    Compara dos listas disjuntas y ordenadas con dos
+    punteros (O(n + m), nunca par contra par):
+
+    - solapado: segundos trabajados dentro del plan
+    - extra: trabajados fuera del plan
+    - faltante: planificados sin trabajar
+    - salida_anticipada / salida_tardia: segundos entre
+      el fin del plan y la última salida del día
+    - llegada_tarde: segundos entre el inicio del plan y
+      el primer ingreso (si llegó después)
+    """
+
+    solapado = 0.0
+    i = j = 0
+
+    while i < len(planificados) and j < len(trabajados):
+
+        p_inicio, p_fin = planificados[i]
+        t_inicio, t_fin = trabajados[j]
+
+        inicio = max(p_inicio, t_inicio)
+        fin = min(p_fin, t_fin)
+
+        if fin > inicio:
+            solapado += (fin - inicio).total_seconds()
+
+        # avanza el que termina primero
+        if p_fin <= t_fin:
+            i += 1
+        else:
+            j += 1
+
+    total_plan = sum((fin - inicio).total_seconds() for inicio, fin in planificados)
+    total_trabajado = sum((fin - inicio).total_seconds() for inicio, fin in trabajados)
+
+    resultado = {
+        "planificado": total_plan,
+        "trabajado": total_trabajado,
+        "solapado": solapado,
+        "extra": total_trabajado - solapado,
+        "faltante": total_plan - solapado,
+        "llegada_tarde": 0.0,
+        "salida_anticipada": 0.0,
+        "salida_tardia": 0.0
+    }
+
+    if planificados and trabajados:
+
+        plan_inicio, plan_fin = planificados[0][0], planificados[-1][1]
+        primer_ingreso, ultima_salida = trabajados[0][0], trabajados[-1][1]
+
+        if primer_ingreso > plan_inicio:
+            resultado["llegada_tarde"] = (primer_ingreso - plan_inicio).total_seconds()
+
+        if ultima_salida < plan_fin:
+            resultado["salida_anticipada"] = (plan_fin - ultima_salida).total_seconds()
+        else:
+            resultado["salida_tardia"] = (ultima_salida - plan_fin).total_seconds()
+
+    return resultado
+
+
+# =====================================================
+# MES COMPLETO DE UNA EMPRESA
+# =====================================================
+CAMPOS_SUMA = (
+    "planificado", "trabajado", "solapado", "extra", "faltante",
+    "llegada_tarde", "salida_anticipada", "salida_tardia"
+)
+
+
+def plan_vs_trabajado_mes(empresa_id, year, month, sucursal_id=None):
+
+    """
+    Plan contra trabajado por empleado y día del mes, más
+    los totales por empleado. El bloque trabajado cuenta
+    para el día local de su ingreso; los bloques abiertos
+    (sin salida) no suman.
+
+    Consultas: empleados, horarios + bloques y fichajes
+    del mes (en streaming).
+    """
+
+    if not 1 <= month <= 12:
+        raise ValueError(f"Mes inválido: {month}")
+
+    tz_nombre = nombre_zona_empresa(empresa_id)
+    tz = zona(tz_nombre)
+
+    inicio_utc, fin_utc = limites_mes(tz_nombre, year, month)
+    primer_dia = date(year, month, 1)
+    ultimo_dia = date(year, month, calendar.monthrange(year, month)[1])
+
+    empleados_query = Empleado.query.filter(Empleado.empresa_id == empresa_id)
+
+    if sucursal_id:
+        empleados_query = empleados_query.filter(Empleado.sucursal_id == sucursal_id)
+
+    empleados = {e.id: e for e in empleados_query}
+
+    ids = (
+        empleados_sucursal(empresa_id, sucursal_id)
+        if sucursal_id
+        else db.select(Empleado.id).where(Empleado.empresa_id == empresa_id)
+    )
+
+    # plan por (empleado, día)
+    plan = {
+        (h.empleado_id, h.fecha): intervalos_planificados(h, tz)
+        for h in (
+            HorarioEmpleado.query
+            .options(selectinload(HorarioEmpleado.bloques))
+            .filter(
+                HorarioEmpleado.empleado_id.in_(ids),
+                HorarioEmpleado.fecha >= primer_dia,
+                HorarioEmpleado.fecha <= ultimo_dia
+            )
+        )
+    }
+
+    # trabajado por (empleado, día del ingreso)
+    trabajado = defaultdict(list)
+
+    for b in emparejar_bloques(
+        iterar_fichajes(empresa_id, inicio_utc, fin_utc, sucursal_id=sucursal_id),
+        tz
+    ):
+
+        if b["salida"] and primer_dia <= b["fecha"] <= ultimo_dia:
+            trabajado[(b["empleado_id"], b["fecha"])].append(
+                (b["ingreso"], b["salida"])
+            )
+
+    # ==========================================
+    # COMPARAR CADA (EMPLEADO, DÍA)
+    # ==========================================
+
+    por_empleado = defaultdict(list)
+
+    for empleado_id, fecha in sorted(set(plan) | set(trabajado)):
+
+        if empleado_id not in empleados:
+            continue
+
+        resultado = comparar_intervalos(
+            plan.get((empleado_id, fecha), []),
+            unir_intervalos(trabajado.get((empleado_id, fecha), []))
+        )
+
+        por_empleado[empleado_id].append(dict(resultado, fecha=fecha))
+
+    filas = []
+
+    for empleado_id, dias in por_empleado.items():
+
+        filas.append({
+            "empleado": empleado_resumen(empleados[empleado_id]),
+            "dias": dias,
+            "totales": {
+                campo: sum(d[campo] for d in dias)
+                for campo in CAMPOS_SUMA
+            }
+        })
+
+    filas.sort(key=lambda f: (f["empleado"].apellido, f["empleado"].nombre))
+
+    return filas
@@ -0,0 +1,97 @@
+from datetime import datetime
+from app.models import db
+
+
+# =====================================================
+# PAGINACIÓN POR CLAVE (KEYSET / SEEK)
+# =====================================================
+#
+# Listados ordenados por (fecha, id) descendente. En vez
+# de OFFSET cada página pide "los N anteriores a (fecha,
+# id)", así el costo no depende de cuán atrás se navegue
+# y los índices (empresa_id, ..., fecha) cortan el rango.
+#
+# Cursor en la URL: "<fecha ISO>_<id>".
+
+POR_PAGINA = 50
+
+
+def codificar_cursor(fecha, id_):
+    return f"{fecha.isoformat()}_{id_}"
+
+
+def decodificar_cursor(texto):
+
+    if not texto:
+        return None
+
+    try:
+        fecha, id_ = texto.rsplit("_", 1)
+        return datetime.fromisoformat(fecha), int(id_)
+    except ValueError:
+        return None
+
+
+def pagina_keyset(consulta, col_fecha, col_id, antes=None, despues=None, por_pagina=POR_PAGINA):
+
+    """
+    Una página de `consulta` (ya filtrada), de la más
+    nueva a la más vieja.
+
+    - antes: cursor → filas más viejas que él
+    - despues: cursor → filas más nuevas (página previa)
+
+    Devuelve (filas, cursor_mas_viejas, cursor_mas_nuevas);
+    un cursor es None si no hay más filas en ese sentido.
+    """
+
+    clave = db.tuple_(col_fecha, col_id)
+
+    cursor_antes = decodificar_cursor(antes)
+    cursor_despues = decodificar_cursor(despues)
+
+    if cursor_despues and not cursor_antes:
+
+        # página previa: se recorre hacia adelante y se invierte
+        filas = (
+            consulta
+            .filter(clave > db.tuple_(*cursor_despues))
+            .order_by(col_fecha.asc(), col_id.asc())
+            .limit(por_pagina + 1)
+            .all()
+        )
+
+        hay_mas_nuevas = len(filas) > por_pagina
+        filas = list(reversed(filas[:por_pagina]))
+        hay_mas_viejas = True
+
+    else:
+
+        if cursor_antes:
+            consulta = consulta.filter(clave < db.tuple_(*cursor_antes))
+
+        filas = (
+            consulta
+            .order_by(col_fecha.desc(), col_id.desc())
+            .limit(por_pagina + 1)
+            .all()
+        )
+
+        hay_mas_viejas = len(filas) > por_pagina
+        filas = filas[:por_pagina]
+        hay_mas_nuevas = cursor_antes is not None
+
+    if not filas:
+        return [], None, None
+
+    def cursor(fila):
+        return codificar_cursor(
+            getattr(fila, col_fecha.key),
+            getattr(fila, col_id.key)
+        )
+
+    return (
+        filas,
+        cursor(filas[-1]) if hay_mas_viejas else None,
+        cursor(filas[0]) if hay_mas_nuevas else None
+    )
@@ -0,0 +1,316 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timezone
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import text
+from app.models import db
+
+
+# =====================================================
+# AUDIT_LOG PARTICIONADA POR MES (POSTGRESQL)
+# =====================================================
+#
+# audit_log es una tabla particionada por rango de
+# created_at (migración 0009): una partición por mes UTC
+# (audit_log_pYYYYMM) más audit_log_pdefault.
+#
+# `flask auditoria archivar` exporta las particiones más
+# viejas que AUDIT_RETENCION_MESES a JSONL comprimido
+# (un archivo por empresa y mes) y las elimina: la tabla
+# caliente queda chica y la auditoría lee ambos lados.
+
+PREFIJO = "audit_log_p"
+DEFAULT = "audit_log_pdefault"
+
+_RE_PARTICION = re.compile(r"^audit_log_p(\d{4})(\d{2})$")
+
+COLUMNAS = "id, empresa_id, usuario_id, accion, entidad, descripcion, ip, created_at"
+
+auditoria_cli = AppGroup(
+    "auditoria",
+    help="Particiones y archivo de audit_log."
+)
+
+
+def nombre_particion(year, month):
+    return f"{PREFIJO}{year:04d}{month:02d}"
+
+
+def mes_siguiente(year, month):
+    return (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def sumar_meses(year, month, meses):
+
+    total = year * 12 + (month - 1) + meses
+    return total // 12, total % 12 + 1
+
+
+def limites_particion(year, month):
+
+    inicio = datetime(year, month, 1, tzinfo=timezone.utc)
+    fin = datetime(*mes_siguiente(year, month), 1, tzinfo=timezone.utc)
+
+    return inicio, fin
+
+
+def es_particionada(conn):
+
+    if conn.dialect.name != "postgresql":
+        return False
+
+    return conn.execute(text(
+        "SELECT relkind FROM pg_class WHERE relname = 'audit_log'"
+    )).scalar() == "p"
+
+
+def particiones_existentes(conn):
+
+    """
+    (year, month) de las particiones mensuales, en orden.
+    """
+
+    nombres = conn.execute(text(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'audit_log'
+        """
+    )).scalars()
+
+    meses = []
+
+    for nombre in nombres:
+        m = _RE_PARTICION.match(nombre)
+        if m:
+            meses.append((int(m.group(1)), int(m.group(2))))
+
+    return sorted(meses)
+
+
+def crear_particion(conn, year, month):
+
+    """
+    Crea la partición del mes. Si ya entraron filas de ese
+    mes en la partición default, se mueven antes de
+    adjuntarla (si no, ATTACH falla).
+    """
+
+    nombre = nombre_particion(year, month)
+    inicio, fin = limites_particion(year, month)
+
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {nombre} "
+        f"(LIKE audit_log INCLUDING DEFAULTS INCLUDING GENERATED)"
+    ))
+
+    conn.execute(
+        text(
+            f"""
+            WITH movidas AS (
+                DELETE FROM {DEFAULT}
+                WHERE created_at >= :inicio AND created_at < :fin
+                RETURNING {COLUMNAS}
+            )
+            INSERT INTO {nombre} ({COLUMNAS})
+            SELECT {COLUMNAS} FROM movidas
+            """
+        ),
+        {"inicio": inicio, "fin": fin}
+    )
+
+    conn.execute(
+        text(
+            f"ALTER TABLE audit_log ATTACH PARTITION {nombre} "
+            f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fin.isoformat()}')"
+        )
+    )
+
+
+def asegurar_particiones(conn, meses_adelante=3, desde=None):
+
+    """
+    Particiones desde `desde` (o el mes actual) hasta
+    meses_adelante meses después del actual.
+    """
+
+    hoy = datetime.now(timezone.utc)
+    existentes = set(particiones_existentes(conn))
+
+    mes = desde or (hoy.year, hoy.month)
+    ultimo = sumar_meses(hoy.year, hoy.month, meses_adelante)
+
+    creadas = []
+
+    while mes <= ultimo:
+
+        if mes not in existentes:
+            crear_particion(conn, *mes)
+            creadas.append(mes)
+
+        mes = mes_siguiente(*mes)
+
+    return creadas
+
+
+# =====================================================
+# ARCHIVO COMPRIMIDO (JSONL.GZ POR EMPRESA Y MES)
+# =====================================================
+def ruta_archivo(directorio, empresa_id, year, month):
+    return os.path.join(directorio, str(empresa_id), f"{year:04d}-{month:02d}.jsonl.gz")
+
+
+def exportar_particion(conn, directorio, year, month):
+
+    """
+    Escribe un archivo por empresa con los eventos de la
+    partición, leyendo en streaming. Cada archivo se
+    escribe en .tmp y se renombra al final: re-ejecutar
+    tras un corte simplemente lo vuelve a generar.
+    """
+
+    filas = conn.execute(text(
+        f"""
+        SELECT a.id, a.empresa_id, a.usuario_id, u.email, a.accion,
+               a.entidad, a.descripcion, a.ip, a.created_at
+        FROM {nombre_particion(year, month)} a
+        LEFT JOIN usuario u ON u.id = a.usuario_id
+        ORDER BY a.empresa_id, a.created_at, a.id
+        """
+    ).execution_options(stream_results=True, yield_per=2000))
+
+    empresa_actual = None
+    archivo = None
+    temporal = None
+    cantidad = 0
+
+    def cerrar():
+        if archivo:
+            archivo.close()
+            os.replace(temporal, temporal[:-len(".tmp")])
+
+    try:
+
+        for fila in filas:
+
+            if fila.empresa_id != empresa_actual:
+
+                cerrar()
+
+                empresa_actual = fila.empresa_id
+                destino = ruta_archivo(directorio, empresa_actual, year, month)
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+
+                temporal = destino + ".tmp"
+                archivo = gzip.open(temporal, "wt", encoding="utf-8")
+
+            archivo.write(json.dumps({
+                "id": fila.id,
+                "empresa_id": fila.empresa_id,
+                "usuario_id": fila.usuario_id,
+                "usuario_email": fila.email,
+                "accion": fila.accion,
+                "entidad": fila.entidad,
+                "descripcion": fila.descripcion,
+                "ip": fila.ip,
+                "created_at": fila.created_at.isoformat()
+            }, ensure_ascii=False) + "\n")
+
+            cantidad += 1
+
+        cerrar()
+        archivo = None
+
+    finally:
+        if archivo:
+            archivo.close()
+
+    return cantidad
+
+
+def archivar_particiones(directorio, retencion_meses):
+
+    """
+    Exporta y elimina las particiones con todo su mes
+    fuera de la retención. Cada partición en su propia
+    transacción (exportar → DETACH → DROP).
+    """
+
+    hoy = datetime.now(timezone.utc)
+    limite = sumar_meses(hoy.year, hoy.month, -retencion_meses)
+
+    with db.engine.begin() as conn:
+
+        if not es_particionada(conn):
+            return []
+
+        viejas = [m for m in particiones_existentes(conn) if m < limite]
+
+    archivadas = []
+
+    for year, month in viejas:
+
+        with db.engine.begin() as conn:
+
+            cantidad = exportar_particion(conn, directorio, year, month)
+
+            nombre = nombre_particion(year, month)
+            conn.execute(text(f"ALTER TABLE audit_log DETACH PARTITION {nombre}"))
+            conn.execute(text(f"DROP TABLE {nombre}"))
+
+        archivadas.append((year, month, cantidad))
+
+    return archivadas
+
+
+# =====================================================
+# COMANDOS CLI
+# =====================================================
+@auditoria_cli.command("particiones")
+@click.option("--meses", default=3, help="Meses a crear por adelantado.")
+def particiones_command(meses):
+
+    """Crea las particiones mensuales que falten."""
+
+    with db.engine.begin() as conn:
+
+        if not es_particionada(conn):
+            click.echo("audit_log no está particionada (solo PostgreSQL).")
+            return
+
+        creadas = asegurar_particiones(conn, meses)
+
+    for year, month in creadas:
+        click.echo(f"✔ {nombre_particion(year, month)}")
+
+    if not creadas:
+        click.echo("Particiones al día.")
+
+
+@auditoria_cli.command("archivar")
+@click.option("--meses", default=None, type=int, help="Meses de retención en la tabla.")
+def archivar_command(meses):
+
+    """Exporta a JSONL.gz y elimina las particiones viejas."""
+
+    directorio = current_app.config["AUDIT_ARCHIVO_DIR"]
+    retencion = meses or current_app.config["AUDIT_RETENCION_MESES"]
+
+    archivadas = archivar_particiones(directorio, retencion)
+
+    for year, month, cantidad in archivadas:
+        click.echo(f"✔ {year:04d}-{month:02d}: {cantidad} eventos → {directorio}")
+
+    if not archivadas:
+        click.echo("Nada para archivar.")
+
+    # de paso, las particiones de los próximos meses
+    with db.engine.begin() as conn:
+        if es_particionada(conn):
+            asegurar_particiones(conn)
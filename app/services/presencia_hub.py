@@ -0,0 +1,286 @@
+import json
+import queue
+import select
+import threading
+import time
+from collections import defaultdict, deque
+from sqlalchemy import text
+from app.models import db
+
+
+CANAL_PRESENCIA = "presencia"
+
+
+# =====================================================
+# HUB EN MEMORIA (UNA LISTA DE SUSCRIPTORES POR EMPRESA)
+# =====================================================
+class HubPresencia:
+
+    """
+    Fan-out en proceso de cambios de presencia.
+
+    - suscribir() devuelve una Queue que recibe los
+      eventos de la empresa (para SSE).
+    - Cada evento lleva una secuencia (epoch en ms de
+      cuando se publicó, igual en todos los procesos) y
+      se guarda en un buffer corto por empresa, así el
+      long-poll puede pedir "lo que pasó desde N".
+    """
+
+    def __init__(self, tam_buffer=200):
+        self._suscriptores = defaultdict(set)
+        self._buffer = defaultdict(lambda: deque(maxlen=tam_buffer))
+        self._ultima = defaultdict(int)
+        self._cond = threading.Condition()
+
+    def suscribir(self, empresa_id):
+
+        cola = queue.Queue(maxsize=500)
+
+        with self._cond:
+            self._suscriptores[empresa_id].add(cola)
+
+        return cola
+
+    def desuscribir(self, empresa_id, cola):
+
+        with self._cond:
+            self._suscriptores[empresa_id].discard(cola)
+
+            if not self._suscriptores[empresa_id]:
+                self._suscriptores.pop(empresa_id, None)
+
+    def publicar(self, empresa_id, evento):
+
+        with self._cond:
+
+            seq = max(
+                evento.get("seq") or ahora_ms(),
+                self._ultima[empresa_id] + 1
+            )
+            self._ultima[empresa_id] = seq
+
+            evento = dict(evento, seq=seq)
+
+            self._buffer[empresa_id].append(evento)
+
+            for cola in list(self._suscriptores.get(empresa_id, ())):
+                try:
+                    cola.put_nowait(evento)
+                except queue.Full:
+                    # cliente que no consume: se lo descarta y
+                    # se avisa a su stream para que termine y
+                    # libere el cupo
+                    self._suscriptores[empresa_id].discard(cola)
+                    cerrar_cola(cola)
+
+            self._cond.notify_all()
+
+    def esperar_desde(self, empresa_id, desde, timeout=25, sucursal_id=None):
+
+        """
+        Long-poll: devuelve (eventos, seq) con los eventos
+        seq > desde (de la sucursal, si se pide), esperando
+        hasta timeout segundos si no hay ninguno.
+
+        seq es la última secuencia vista aunque sus eventos
+        fueran de otra sucursal: el cliente avanza el cursor
+        y no vuelve a recibir lo que ya se descartó.
+        """
+
+        limite = time.monotonic() + timeout
+
+        with self._cond:
+
+            while True:
+
+                nuevos = [
+                    e for e in self._buffer.get(empresa_id, ())
+                    if e["seq"] > desde
+                ]
+
+                if nuevos:
+                    desde = nuevos[-1]["seq"]
+
+                eventos = [
+                    e for e in nuevos
+                    if not sucursal_id or e.get("sucursal_id") == sucursal_id
+                ]
+
+                restante = limite - time.monotonic()
+
+                if eventos or restante <= 0:
+                    return eventos, desde
+
+                self._cond.wait(restante)
+
+
+hub = HubPresencia()
+
+# último elemento de la cola de un suscriptor descartado
+CERRADA = object()
+
+
+def cerrar_cola(cola):
+
+    """
+    Vacía la cola y deja solo CERRADA: el stream que la
+    lee termina en vez de quedar esperando para siempre.
+    """
+
+    try:
+        while True:
+            cola.get_nowait()
+    except queue.Empty:
+        pass
+
+    try:
+        cola.put_nowait(CERRADA)
+    except queue.Full:
+        pass
+
+
+def ahora_ms():
+    return int(time.time() * 1000)
+
+
+# =====================================================
+# PUBLICAR (DESDE EL HOOK DE FICHAJES)
+# =====================================================
+def publicar_presencia(empresa_id, evento):
+
+    """
+    Se llama dentro de la transacción del fichaje, antes
+    del commit. En PostgreSQL el evento viaja por NOTIFY
+    (transaccional: sale con el commit, o no sale si hay
+    rollback) y llega a los suscriptores de todos los
+    procesos. Devuelve False en otros motores: el que
+    llama lo despacha en este proceso tras el commit.
+    """
+
+    if db.engine.dialect.name != "postgresql":
+        return False
+
+    payload = json.dumps(
+        dict(evento, empresa_id=empresa_id, seq=ahora_ms())
+    )
+
+    db.session.execute(
+        text("SELECT pg_notify(:canal, :payload)"),
+        {"canal": CANAL_PRESENCIA, "payload": payload}
+    )
+
+    return True
+
+
+def despachar_evento(empresa_id, evento):
+
+    from app.services.dashboard_service import invalidar_dashboard
+
+    # el snapshot del dashboard de este proceso queda viejo
+    invalidar_dashboard(empresa_id)
+
+    hub.publicar(empresa_id, evento)
+
+
+# =====================================================
+# LISTENER POSTGRES (UN THREAD POR PROCESO)
+# =====================================================
+_listener_lock = threading.Lock()
+_listener_thread = None
+
+
+def iniciar_listener(app):
+
+    """
+    Arranca (una sola vez por proceso) el thread que
+    escucha NOTIFY presencia y reparte al hub local.
+    """
+
+    global _listener_thread
+
+    with _listener_lock:
+
+        if _listener_thread and _listener_thread.is_alive():
+            return
+
+        with app.app_context():
+            if db.engine.dialect.name != "postgresql":
+                return
+
+        _listener_thread = threading.Thread(
+            target=_escuchar,
+            args=(app,),
+            name="presencia-listener",
+            daemon=True
+        )
+        _listener_thread.start()
+
+
+def _devolver_conexion(raw):
+
+    """
+    Deja la conexión como la encontró (sin LISTEN y fuera de
+    autocommit) antes de devolverla al pool; si está rota o
+    no se puede limpiar, se descarta.
+    """
+
+    conexion = raw.driver_connection
+
+    try:
+        if conexion.closed:
+            raise ConnectionError("conexión cerrada")
+
+        conexion.autocommit = True
+        conexion.cursor().execute("UNLISTEN *")
+        conexion.autocommit = False
+        raw.close()
+
+    except Exception:
+        try:
+            raw.invalidate()
+        except Exception:
+            pass
+
+
+def _escuchar(app):
+
+    while True:
+
+        raw = None
+
+        try:
+            with app.app_context():
+                raw = db.engine.raw_connection()
+
+            conexion = raw.driver_connection
+
+            # el hook "connect" (SET TIME ZONE) deja abierta una
+            # transacción: sin cerrarla no se puede pasar a autocommit
+            conexion.rollback()
+            conexion.autocommit = True
+
+            cursor = conexion.cursor()
+            cursor.execute(f"LISTEN {CANAL_PRESENCIA}")
+
+            while True:
+
+                if select.select([conexion], [], [], 30) == ([], [], []):
+                    continue
+
+                conexion.poll()
+
+                while conexion.notifies:
+
+                    aviso = conexion.notifies.pop(0)
+                    evento = json.loads(aviso.payload)
+
+                    despachar_evento(evento.pop("empresa_id"), evento)
+
+        except Exception as e:
+            print("ERROR LISTENER PRESENCIA:", e)
+
+            if raw is not None:
+                _devolver_conexion(raw)
+
+            time.sleep(5)
@@ -0,0 +1,138 @@
+from sqlalchemy import func
+from app.models import Asistencia, Empleado, db
+from app.services.calendario_service import zona_empresa
+
+
+# =====================================================
+# ÚLTIMO FICHAJE DE CADA EMPLEADO (UNA SOLA CONSULTA)
+# =====================================================
+def obtener_ultimos_registros(empresa_id):
+
+    """
+    Devuelve {empleado_id: Asistencia} con el último
+    fichaje de cada empleado de la empresa.
+
+    Resuelve el estado actual (INGRESO / SALIDA) de
+    todo el personal en una sola consulta, en lugar
+    de una consulta por empleado.
+    """
+
+    subquery = (
+        db.session.query(
+            Asistencia.empleado_id,
+            func.max(Asistencia.fecha_hora).label("ultima_fecha")
+        )
+        .filter(
+            Asistencia.empresa_id == empresa_id
+        )
+        .group_by(Asistencia.empleado_id)
+        .subquery()
+    )
+
+    ultimos_registros = (
+        db.session.query(Asistencia)
+        .join(
+            subquery,
+            (Asistencia.empleado_id == subquery.c.empleado_id) &
+            (Asistencia.fecha_hora == subquery.c.ultima_fecha)
+        )
+        .filter(
+            Asistencia.empresa_id == empresa_id
+        )
+        .all()
+    )
+
+    return {r.empleado_id: r for r in ultimos_registros}
+
+
+def contar_trabajando(registro_dict):
+
+    """
+    Cantidad de empleados cuyo último fichaje es un INGRESO.
+    """
+
+    return sum(
+        1 for r in registro_dict.values()
+        if r.tipo == "INGRESO"
+    )
+
+
+def evento_presencia(empresa_id, empleado_id):
+
+    """
+    Estado actual de un empleado listo para publicar
+    (a partir de su último fichaje).
+    """
+
+    tz_local = zona_empresa(empresa_id)
+
+    empleado = db.session.get(Empleado, empleado_id)
+
+    ultima = (
+        Asistencia.query
+        .filter_by(empresa_id=empresa_id, empleado_id=empleado_id)
+        .order_by(Asistencia.fecha_hora.desc())
+        .first()
+    )
+
+    evento = {
+        "empleado_id": empleado_id,
+        "nombre": f"{empleado.apellido} {empleado.nombre}" if empleado else "",
+        "estado": "sin_registro",
+        "hora": None,
+        "sucursal_id": empleado.sucursal_id if empleado else None
+    }
+
+    if ultima:
+        evento.update({
+            "estado": "ingreso" if ultima.tipo == "INGRESO" else "salida",
+            "hora": ultima.fecha_hora.astimezone(tz_local).strftime("%H:%M"),
+            "sucursal_id": ultima.sucursal_id
+        })
+
+    return evento
+
+
+def estado_presencia(empresa_id, sucursal_id=None):
+
+    """
+    Foto completa de presencia de los empleados activos
+    (estado inicial del tablero en vivo).
+    """
+
+    tz_local = zona_empresa(empresa_id)
+
+    registro_dict = obtener_ultimos_registros(empresa_id)
+
+    empleados = Empleado.query.filter_by(
+        empresa_id=empresa_id,
+        activo=True
+    ).all()
+
+    estado = []
+
+    for emp in empleados:
+
+        registro = registro_dict.get(emp.id)
+
+        item = {
+            "empleado_id": emp.id,
+            "nombre": f"{emp.apellido} {emp.nombre}",
+            "estado": "sin_registro",
+            "hora": None,
+            "sucursal_id": emp.sucursal_id
+        }
+
+        if registro:
+            item.update({
+                "estado": "ingreso" if registro.tipo == "INGRESO" else "salida",
+                "hora": registro.fecha_hora.astimezone(tz_local).strftime("%H:%M"),
+                "sucursal_id": registro.sucursal_id
+            })
+
+        if sucursal_id and item["sucursal_id"] != sucursal_id:
+            continue
+
+        estado.append(item)
+
+    return estado
@@ -0,0 +1,94 @@
+from sqlalchemy.dialects.postgresql import insert
+from app.models import AlertaPuntualidad, Empleado, db
+from app.audit import registrar_evento_diferido
+from app.services.calendario_service import zona_empresa
+from app.services.horarios_service import calcular_llegada_tarde
+
+
+# =====================================================
+# ALERTA DE LLEGADA TARDE (UNA POR EMPLEADO Y DÍA)
+# =====================================================
+def registrar_llegada_tarde(empleado, fecha_hora):
+
+    """
+    Si el ingreso es tarde guarda la alerta del día local.
+    El dedupe lo hace el índice único (empresa, empleado,
+    fecha) con ON CONFLICT DO NOTHING: sin buscar antes
+    en la auditoría. Devuelve True si la alerta es nueva.
+
+    No commitea: va en la transacción del fichaje, que
+    confirma notificar_cambio_asistencia.
+    """
+
+    tardanza = calcular_llegada_tarde(empleado, fecha_hora)
+
+    if not tardanza:
+        return False
+
+    turno_inicio, minutos_tarde = tardanza
+    fecha_local = fecha_hora.astimezone(zona_empresa(empleado.empresa_id))
+
+    resultado = db.session.execute(
+        insert(AlertaPuntualidad)
+        .values(
+            empresa_id=empleado.empresa_id,
+            empleado_id=empleado.id,
+            fecha=fecha_local.date(),
+            ingreso=fecha_hora,
+            turno_inicio=turno_inicio,
+            minutos_tarde=minutos_tarde
+        )
+        .on_conflict_do_nothing(
+            index_elements=["empresa_id", "empleado_id", "fecha"]
+        )
+    )
+
+    if not resultado.rowcount:
+        return False
+
+    registrar_evento_diferido(
+        accion="ALERTA",
+        entidad="PUNTUALIDAD",
+        descripcion=(
+            f"Llegada tarde: "
+            f"{empleado.apellido}, {empleado.nombre} "
+            f"(Ingreso {fecha_local.strftime('%H:%M')}, "
+            f"Turno {turno_inicio.strftime('%H:%M')})"
+        )
+    )
+
+    return True
+
+
+def alertas_del_dia(empresa_id, fecha, sucursal_id=None):
+
+    """
+    Llegadas tarde del día local (lectura por índice
+    empresa_id, fecha), la más reciente primero.
+    """
+
+    consulta = (
+        db.session.query(AlertaPuntualidad, Empleado.apellido, Empleado.nombre)
+        .join(Empleado, Empleado.id == AlertaPuntualidad.empleado_id)
+        .filter(
+            AlertaPuntualidad.empresa_id == empresa_id,
+            AlertaPuntualidad.fecha == fecha
+        )
+    )
+
+    if sucursal_id:
+        consulta = consulta.filter(Empleado.sucursal_id == sucursal_id)
+
+    return [
+        {
+            "empleado_id": a.empleado_id,
+            "descripcion": (
+                f"Llegada tarde: {apellido}, {nombre} "
+                f"({a.minutos_tarde} min, turno {a.turno_inicio.strftime('%H:%M')})"
+            ),
+            "minutos_tarde": a.minutos_tarde,
+            "turno_inicio": a.turno_inicio,
+            "created_at": a.ingreso
+        }
+        for a, apellido, nombre in consulta.order_by(AlertaPuntualidad.ingreso.desc())
+    ]
@@ -0,0 +1,90 @@
+import threading
+from collections import namedtuple
+from datetime import date, datetime
+from flask import current_app
+from app.services.cache_service import CacheTTL
+from app.services.version_datos_service import version_datos
+from app.services.calendario_service import ahora_local, nombre_zona_empresa
+
+
+# datos mínimos del empleado que usan los reportes
+# (sin objetos ORM: la cache se comparte entre requests)
+EmpleadoResumen = namedtuple("EmpleadoResumen", "id nombre apellido")
+
+
+def empleado_resumen(empleado):
+    return EmpleadoResumen(empleado.id, empleado.nombre, empleado.apellido)
+
+
+# resultados por (empresa, tipo, rango, sucursal, versión)
+_cache_reportes = CacheTTL(ttl=300, max_items=512)
+
+# un lock por clave en cálculo: pedidos iguales esperan
+# al primero en lugar de recalcular
+_calculando = {}
+_calculando_lock = threading.Lock()
+
+
+# =====================================================
+# REPORTE CACHEADO POR VERSIÓN DE DATOS
+# =====================================================
+def obtener_reporte(empresa_id, tipo, rango, sucursal_id, calcular):
+
+    """
+    Devuelve el resultado de calcular() para esta clave,
+    desde la cache si la versión de datos de la empresa no
+    cambió. Cualquier alta, edición o baja de fichajes
+    incrementa la versión: las entradas viejas dejan de
+    usarse en todos los procesos.
+
+    `rango` es una tupla hashable: (desde, hasta exclusivo)
+    y, si hace falta, empleado o modo. Los períodos ya
+    cerrados se guardan más tiempo.
+    """
+
+    clave = (empresa_id, tipo, rango, sucursal_id, version_datos(empresa_id))
+
+    resultado = _cache_reportes.obtener(clave)
+
+    if resultado is not None:
+        return resultado
+
+    with _calculando_lock:
+        lock = _calculando.setdefault(clave, threading.Lock())
+
+    try:
+        with lock:
+
+            resultado = _cache_reportes.obtener(clave)
+
+            if resultado is None:
+                resultado = calcular()
+                _cache_reportes.guardar(clave, resultado, ttl=_ttl(empresa_id, rango))
+
+    finally:
+        with _calculando_lock:
+            _calculando.pop(clave, None)
+
+    return resultado
+
+
+def _ttl(empresa_id, rango):
+
+    config = current_app.config
+
+    fechas = [
+        v.date() if isinstance(v, datetime) else v
+        for v in rango
+        if isinstance(v, date)
+    ]
+    hoy = ahora_local(nombre_zona_empresa(empresa_id)).date()
+
+    if fechas and max(fechas) <= hoy:
+        return config.get("REPORTE_CACHE_TTL_CERRADO", 3600)
+
+    return config.get("REPORTE_CACHE_TTL", 300)
+
+
+def invalidar_reportes(empresa_id):
+
+    _cache_reportes.invalidar_empresa(empresa_id)
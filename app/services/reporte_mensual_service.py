@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta
+from app.models import Empleado
+from app.services.calendario_service import zona, limites_dia
+from app.services.horas_service import formatear_hhmm
+from app.services.rollup_service import resumen_mensual_rollup
+from app.services.columnar_service import totales_columnares
+from app.services.bloques_service import totales_streaming
+from app.services.cierre_service import resumen_desde_cierres
+from app.services.reporte_cache_service import obtener_reporte, empleado_resumen
+
+
+MODOS_REPORTE = ("rollup", "columnar", "streaming")
+
+
+# =====================================================
+# RANGO DEL REPORTE
+# =====================================================
+def rango_reporte_mensual(tz_nombre, fecha_desde=None, fecha_hasta=None, year=None, month=None):
+
+    """
+    Rango del reporte en fechas locales [desde, hasta):
+
+    - desde/hasta (YYYY-MM-DD, hasta inclusive), o
+    - year/month, o
+    - el mes actual de la empresa.
+    """
+
+    hoy = datetime.now(zona(tz_nombre)).date()
+
+    if fecha_desde and fecha_hasta:
+
+        desde = datetime.strptime(fecha_desde, "%Y-%m-%d").date()
+        hasta = datetime.strptime(fecha_hasta, "%Y-%m-%d").date() + timedelta(days=1)
+
+        nombre_archivo = f"{desde.strftime('%d-%m')}__{hasta.strftime('%d-%m')}"
+
+    else:
+
+        year = year or hoy.year
+        month = month or hoy.month
+
+        desde = hoy.replace(year=year, month=month, day=1)
+        hasta = (desde + timedelta(days=32)).replace(day=1)
+
+        nombre_archivo = f"{month}_{year}"
+
+    return {
+        "desde": desde,
+        "hasta": hasta,
+        "inicio_utc": limites_dia(tz_nombre, desde)[0],
+        "fin_utc": limites_dia(tz_nombre, hasta)[0],
+        "nombre_mes": f"{desde.strftime('%d/%m')} - {hasta.strftime('%d/%m')}",
+        "nombre_archivo": nombre_archivo
+    }
+
+
+# =====================================================
+# MOTOR DEL RESUMEN MENSUAL
+# =====================================================
+def _totales_por_modo(empresa_id, tz_nombre, desde, hasta, sucursal_id, modo):
+
+    """
+    (empleado_id, segundos, días, incompleto) según el modo
+    de cálculo. En los tres el filtro de sucursal (la del
+    empleado) se resuelve en la consulta.
+    """
+
+    if modo == "columnar":
+        totales = totales_columnares(
+            empresa_id, tz_nombre, desde, hasta, sucursal_id
+        )
+
+    elif modo == "streaming":
+        totales = totales_streaming(
+            empresa_id, tz_nombre, desde, hasta, sucursal_id
+        )
+
+    else:
+        return [
+            (empleado.id, segundos, dias, incompleto, empleado)
+            for empleado, segundos, dias, incompleto in resumen_mensual_rollup(
+                empresa_id, desde, hasta, sucursal_id
+            )
+        ]
+
+    empleados = {
+        e.id: e
+        for e in Empleado.query.filter(
+            Empleado.empresa_id == empresa_id,
+            Empleado.id.in_([t["empleado_id"] for t in totales])
+        )
+    }
+
+    return [
+        (t["empleado_id"], t["segundos"], t["dias"], t["incompleto"], empleados[t["empleado_id"]])
+        for t in totales
+        if t["empleado_id"] in empleados
+    ]
+
+
+def calcular_resumen_mensual(empresa_id, tz_nombre, desde, hasta, sucursal_id=None, modo="rollup"):
+
+    filas = []
+    total_segundos = 0
+
+    for empleado_id, segundos, dias, incompleto, empleado in _totales_por_modo(
+        empresa_id, tz_nombre, desde, hasta, sucursal_id, modo
+    ):
+
+        if not segundos:
+            continue
+
+        total_segundos += segundos
+
+        filas.append({
+            "empleado": empleado_resumen(empleado),
+            "empleado_id": empleado_id,
+            "segundos": int(segundos),
+            "horas": formatear_hhmm(segundos),
+            "dias": dias,
+            "estado": "INCOMPLETO" if incompleto else "OK"
+        })
+
+    filas.sort(key=lambda x: x["empleado"].apellido)
+
+    return {
+        "filas": filas,
+        "total_segundos": int(total_segundos),
+        "total_general": formatear_hhmm(total_segundos)
+    }
+
+
+def resumen_mensual(empresa_id, tz_nombre, desde, hasta, sucursal_id=None, modo="rollup"):
+
+    """
+    Resumen mensual único para HTML, Excel y JSON:
+
+        {"filas": [...], "total_segundos", "total_general"}
+
+    Los meses cerrados salen del cierre; el resto se
+    cachea por versión de datos de la empresa.
+    """
+
+    cerrado = resumen_desde_cierres(empresa_id, desde, hasta, sucursal_id)
+
+    if cerrado is not None:
+        return cerrado
+
+    if modo not in MODOS_REPORTE:
+        modo = "rollup"
+
+    return obtener_reporte(
+        empresa_id,
+        "mensual",
+        (desde, hasta, modo),
+        sucursal_id,
+        lambda: calcular_resumen_mensual(
+            empresa_id, tz_nombre, desde, hasta, sucursal_id, modo
+        )
+    )
+
+
+def resumen_mensual_json(resumen, rango, sucursal_id=None):
+
+    return {
+        "desde": rango["desde"].isoformat(),
+        "hasta": (rango["hasta"] - timedelta(days=1)).isoformat(),
+        "sucursal_id": sucursal_id,
+        "total_segundos": resumen["total_segundos"],
+        "total_general": resumen["total_general"],
+        "empleados": [
+            {
+                "empleado_id": f["empleado_id"],
+                "apellido": f["empleado"].apellido,
+                "nombre": f["empleado"].nombre,
+                "segundos": f["segundos"],
+                "horas": f["horas"],
+                "dias": f["dias"],
+                "estado": f["estado"]
+            }
+            for f in resumen["filas"]
+        ]
+    }
@@ -0,0 +1,328 @@
+from collections import defaultdict
+from datetime import timezone
+from sqlalchemy import text, func
+from app.models import Asistencia, AsistenciaDiaria, Empleado, db
+from app.services.bloques_service import empleados_sucursal
+from app.services.calendario_service import (
+    zona,
+    limites_dia,
+    nombre_zona_empresa
+)
+
+
+# =====================================================
+# RECONSTRUIR ROLLUP (EMPAREJADO EN LA BASE)
+# =====================================================
+#
+# Empareja INGRESO → SALIDA con LEAD() igual que
+# procesar_bloques: un INGRESO seguido de otro INGRESO
+# se descarta, un INGRESO sin fichaje siguiente queda
+# como bloque abierto.
+
+SQL_RECONSTRUIR = """
+INSERT INTO asistencia_diaria (
+    empresa_id, empleado_id, fecha,
+    segundos, bloques,
+    primer_ingreso, ultima_salida,
+    bloque_abierto, sucursal_id
+)
+SELECT
+    empresa_id,
+    empleado_id,
+    fecha,
+    COALESCE(SUM(EXTRACT(EPOCH FROM salida - ingreso)), 0)::integer,
+    COUNT(salida),
+    MIN(ingreso),
+    MAX(salida),
+    BOOL_OR(salida IS NULL),
+    (ARRAY_AGG(sucursal_id ORDER BY ingreso))[1]
+FROM (
+    SELECT
+        empresa_id,
+        empleado_id,
+        sucursal_id,
+        fecha_hora AS ingreso,
+        CASE WHEN tipo_siguiente = 'SALIDA' THEN fecha_siguiente END AS salida,
+        CAST(timezone(:tz, fecha_hora) AS DATE) AS fecha
+    FROM (
+        SELECT
+            empresa_id,
+            empleado_id,
+            sucursal_id,
+            tipo,
+            fecha_hora,
+            LEAD(tipo) OVER w AS tipo_siguiente,
+            LEAD(fecha_hora) OVER w AS fecha_siguiente
+        FROM asistencia
+        WHERE empresa_id = :empresa_id
+          AND (CAST(:empleado_id AS INTEGER) IS NULL OR empleado_id = :empleado_id)
+          AND (CAST(:carga_desde AS TIMESTAMPTZ) IS NULL OR fecha_hora >= :carga_desde)
+          AND (
+              CAST(:carga_hasta AS TIMESTAMPTZ) IS NULL
+              OR fecha_hora < :carga_hasta
+              -- más el primer fichaje posterior de cada empleado:
+              -- el que cierra (o no) el último bloque del rango
+              OR id IN (
+                  SELECT DISTINCT ON (empleado_id) id
+                  FROM asistencia
+                  WHERE empresa_id = :empresa_id
+                    AND (CAST(:empleado_id AS INTEGER) IS NULL OR empleado_id = :empleado_id)
+                    AND fecha_hora >= :carga_hasta
+                  ORDER BY empleado_id, fecha_hora, id
+              )
+          )
+        WINDOW w AS (PARTITION BY empleado_id ORDER BY fecha_hora, id)
+    ) f
+    WHERE tipo = 'INGRESO'
+      AND (tipo_siguiente IS NULL OR tipo_siguiente = 'SALIDA')
+) b
+WHERE (CAST(:desde AS DATE) IS NULL OR fecha >= :desde)
+  AND (CAST(:hasta AS DATE) IS NULL OR fecha <= :hasta)
+GROUP BY empresa_id, empleado_id, fecha
+"""
+
+
+def reconstruir_rollup(
+    empresa_id,
+    desde=None,
+    hasta=None,
+    empleado_id=None,
+    tz_nombre=None,
+    conn=None
+):
+
+    """
+    Recalcula asistencia_diaria para la empresa (y opcional
+    empleado) entre las fechas locales desde..hasta inclusive.
+    Sin fechas reconstruye todo el historial.
+
+    No commitea: corre en la transacción de la sesión
+    (o en la conexión recibida, p. ej. desde una migración).
+    """
+
+    if tz_nombre is None:
+        tz_nombre = nombre_zona_empresa(empresa_id)
+
+    # los bloques se fechan por su INGRESO y LEAD() mira
+    # hacia adelante: se cargan los fichajes del rango y,
+    # por empleado, el primero después (ver SQL_RECONSTRUIR)
+    carga_desde = limites_dia(tz_nombre, desde)[0] if desde else None
+    carga_hasta = limites_dia(tz_nombre, hasta)[1] if hasta else None
+
+    ejecutar = conn.execute if conn is not None else db.session.execute
+
+    borrar = db.delete(AsistenciaDiaria).where(
+        AsistenciaDiaria.empresa_id == empresa_id
+    )
+
+    if empleado_id:
+        borrar = borrar.where(AsistenciaDiaria.empleado_id == empleado_id)
+
+    if desde:
+        borrar = borrar.where(AsistenciaDiaria.fecha >= desde)
+
+    if hasta:
+        borrar = borrar.where(AsistenciaDiaria.fecha <= hasta)
+
+    ejecutar(borrar)
+
+    ejecutar(
+        text(SQL_RECONSTRUIR),
+        {
+            "tz": tz_nombre,
+            "empresa_id": empresa_id,
+            "empleado_id": empleado_id,
+            "carga_desde": carga_desde,
+            "carga_hasta": carga_hasta,
+            "desde": desde,
+            "hasta": hasta
+        }
+    )
+
+
+# =====================================================
+# MANTENIMIENTO INCREMENTAL
+# =====================================================
+def rango_afectado(empresa_id, empleado_id, fechas_hora, tz_nombre):
+
+    """
+    Días locales (desde, hasta) cuyo rollup puede cambiar
+    al tocar fichajes en esas fechas_hora: desde el día del
+    fichaje anterior del empleado (su INGRESO puede quedar
+    cerrado o abierto por el cambio, aunque sea de hace
+    varios días) hasta el día del último fichaje tocado.
+    """
+
+    tz = zona(tz_nombre)
+
+    momentos = [
+        fh if fh.tzinfo else fh.replace(tzinfo=timezone.utc)
+        for fh in fechas_hora
+        if fh is not None
+    ]
+
+    if not momentos:
+        return None
+
+    primero = min(momentos)
+
+    anterior = db.session.query(func.max(Asistencia.fecha_hora)).filter(
+        Asistencia.empresa_id == empresa_id,
+        Asistencia.empleado_id == empleado_id,
+        Asistencia.fecha_hora < primero
+    ).scalar()
+
+    return (
+        (anterior or primero).astimezone(tz).date(),
+        max(momentos).astimezone(tz).date()
+    )
+
+
+def actualizar_rollup(empresa_id, empleado_id, fechas_hora):
+
+    """
+    Recalcula los días afectados por un alta, edición
+    (fecha vieja y nueva) o baja de un fichaje.
+    No commitea.
+    """
+
+    tz_nombre = nombre_zona_empresa(empresa_id)
+
+    # serializa recálculos concurrentes del mismo empleado
+    db.session.query(Empleado.id).filter(
+        Empleado.id == empleado_id
+    ).with_for_update().first()
+
+    rango = rango_afectado(empresa_id, empleado_id, fechas_hora, tz_nombre)
+
+    if not rango:
+        return
+
+    reconstruir_rollup(
+        empresa_id,
+        desde=rango[0],
+        hasta=rango[1],
+        empleado_id=empleado_id,
+        tz_nombre=tz_nombre
+    )
+
+
+# =====================================================
+# LECTURAS
+# =====================================================
+def horas_por_dia_rollup(
+    empresa_id,
+    desde,
+    hasta=None,
+    empleado_id=None,
+    sucursal_id=None
+):
+
+    """
+    Totales de horas leyendo el rollup (fechas locales,
+    hasta exclusivo):
+
+        {
+            "total": segundos,
+            "por_dia": {fecha: segundos},
+            "por_empleado": {empleado_id: segundos}
+        }
+    """
+
+    query = db.session.query(
+        AsistenciaDiaria.empleado_id,
+        AsistenciaDiaria.fecha,
+        AsistenciaDiaria.segundos
+    ).filter(
+        AsistenciaDiaria.empresa_id == empresa_id,
+        AsistenciaDiaria.fecha >= desde
+    )
+
+    if hasta is not None:
+        query = query.filter(AsistenciaDiaria.fecha < hasta)
+
+    if empleado_id is not None:
+        query = query.filter(AsistenciaDiaria.empleado_id == empleado_id)
+
+    if sucursal_id is not None:
+        # sucursal del empleado (igual que los reportes)
+        query = query.filter(AsistenciaDiaria.empleado_id.in_(
+            empleados_sucursal(empresa_id, sucursal_id)
+        ))
+
+    por_dia = defaultdict(float)
+    por_empleado = defaultdict(float)
+
+    for emp_id, fecha, seg in query:
+        por_dia[fecha] += seg
+        por_empleado[emp_id] += seg
+
+    return {
+        "total": sum(por_empleado.values()),
+        "por_dia": dict(por_dia),
+        "por_empleado": dict(por_empleado)
+    }
+
+
+def resumen_mensual_rollup(empresa_id, desde, hasta, sucursal_id=None):
+
+    """
+    Resumen por empleado entre fechas locales (hasta
+    exclusivo): [(Empleado, segundos, dias, incompleto)].
+    """
+
+    query = (
+        db.session.query(
+            Empleado,
+            func.sum(AsistenciaDiaria.segundos),
+            func.count(AsistenciaDiaria.id),
+            func.bool_or(AsistenciaDiaria.bloque_abierto)
+        )
+        .join(Empleado, Empleado.id == AsistenciaDiaria.empleado_id)
+        .filter(
+            AsistenciaDiaria.empresa_id == empresa_id,
+            AsistenciaDiaria.fecha >= desde,
+            AsistenciaDiaria.fecha < hasta
+        )
+    )
+
+    if sucursal_id:
+        query = query.filter(Empleado.sucursal_id == sucursal_id)
+
+    return (
+        query
+        .group_by(Empleado.id)
+        .order_by(Empleado.apellido)
+        .all()
+    )
+
+
+def resumen_dia_rollup(empresa_id, fecha, sucursal_id=None):
+
+    """
+    Empleados activos (de la sucursal, si hay filtro) con
+    su fila del rollup del día local, o None si no
+    ficharon: [(Empleado, AsistenciaDiaria | None)]. Un
+    empleado dado de baja aparece solo si fichó ese día.
+    """
+
+    query = (
+        db.session.query(Empleado, AsistenciaDiaria)
+        .outerjoin(
+            AsistenciaDiaria,
+            db.and_(
+                AsistenciaDiaria.empleado_id == Empleado.id,
+                AsistenciaDiaria.empresa_id == empresa_id,
+                AsistenciaDiaria.fecha == fecha
+            )
+        )
+        .filter(
+            Empleado.empresa_id == empresa_id,
+            db.or_(Empleado.activo.is_(True), AsistenciaDiaria.id.isnot(None))
+        )
+    )
+
+    if sucursal_id:
+        query = query.filter(Empleado.sucursal_id == sucursal_id)
+
+    return query.all()
@@ -0,0 +1,41 @@
+from flask import g
+from app.models import Empresa, db
+
+
+# =====================================================
+# VERSIÓN DE DATOS POR EMPRESA
+# =====================================================
+#
+# empresa.version_datos cambia con cada alta / edición /
+# baja de fichajes. Sirve de clave para caches y ETags:
+# es la misma en todos los procesos.
+
+def incrementar_version_datos(empresa_id):
+
+    """
+    Suma 1 a la versión de la empresa.
+    No commitea: va en la transacción del cambio.
+    """
+
+    db.session.execute(
+        db.update(Empresa)
+        .where(Empresa.id == empresa_id)
+        .values(version_datos=Empresa.version_datos + 1)
+    )
+
+
+def version_datos(empresa_id):
+
+    """
+    Versión actual; reutiliza g.empresa (ya cargada en
+    cada request) cuando corresponde a la misma empresa.
+    """
+
+    empresa = g.get("empresa")
+
+    if empresa is not None and empresa.id == empresa_id:
+        return empresa.version_datos or 0
+
+    return db.session.query(Empresa.version_datos).filter(
+        Empresa.id == empresa_id
+    ).scalar() or 0
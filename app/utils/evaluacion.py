@@ -1,9 +1,9 @@
 from datetime import datetime
-from zoneinfo import ZoneInfo
+from app.services.calendario_service import zona_empresa
 
 def evaluar_dia(empleado, fecha, horario, asistencias):
 
-    tz_ar = ZoneInfo("America/Argentina/Buenos_Aires")
+    tz_local = zona_empresa(empleado.empresa_id)
 
     ingreso = None
     salida = None
@@ -13,10 +13,10 @@ def evaluar_dia(empleado, fecha, horario, asistencias):
 
     for a in asistencias:
         if a.tipo == "INGRESO" and not ingreso:
-            ingreso = a.fecha_hora.astimezone(tz_ar)
+            ingreso = a.fecha_hora.astimezone(tz_local)
 
         elif a.tipo == "SALIDA":
-            salida = a.fecha_hora.astimezone(tz_ar)
+            salida = a.fecha_hora.astimezone(tz_local)
 
     # =========================
     # SIN PLANIFICACIÓN
@@ -79,7 +79,7 @@ def evaluar_dia(empleado, fecha, horario, asistencias):
             turno_dt = datetime.combine(
                 fecha,
                 hora_turno,
-                tzinfo=tz_ar
+                tzinfo=tz_local
             )
 
             if ingreso_dt > turno_dt:
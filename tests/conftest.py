@@ -0,0 +1,116 @@
+import os
+import pytest
+from sqlalchemy import text
+from app.models import Asistencia, Empleado, Empresa, Sucursal, db
+from tests.utilidades import TZ
+
+
+# =====================================================
+# BASE DE PRUEBAS (POSTGRESQL)
+# =====================================================
+#
+# Las pruebas que usan la base necesitan TEST_DATABASE_URL
+# apuntando a un PostgreSQL descartable: se le aplican las
+# migraciones y cada prueba vacía las tablas al terminar.
+# Sin la variable esas pruebas se saltean; las de lógica
+# pura corren igual.
+
+URL_PRUEBAS = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture(scope="session")
+def app():
+
+    if not URL_PRUEBAS:
+        pytest.skip("TEST_DATABASE_URL no configurada (PostgreSQL de pruebas)")
+
+    os.environ["DATABASE_URL"] = URL_PRUEBAS
+    os.environ["AUDIT_MODO"] = "sync"
+
+    from app import create_app
+    from app.migraciones import aplicar_migraciones
+
+    aplicacion = create_app()
+    aplicacion.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+
+    with aplicacion.app_context():
+        aplicar_migraciones()
+
+    return aplicacion
+
+
+@pytest.fixture
+def sesion(app):
+
+    with app.app_context():
+
+        yield db.session
+
+        db.session.rollback()
+
+        # empresa arrastra al resto de las tablas por FK
+        db.session.execute(text("TRUNCATE empresa RESTART IDENTITY CASCADE"))
+        db.session.commit()
+
+
+@pytest.fixture
+def empresa(sesion):
+
+    empresa = Empresa(nombre="Empresa de prueba", zona_horaria=TZ)
+    sesion.add(empresa)
+    sesion.commit()
+
+    return empresa
+
+
+@pytest.fixture
+def sucursal(sesion, empresa):
+
+    sucursal = Sucursal(empresa_id=empresa.id, nombre="Central", activa=True)
+    sesion.add(sucursal)
+    sesion.commit()
+
+    return sucursal
+
+
+@pytest.fixture
+def empleado(sesion, empresa, sucursal):
+
+    empleado = Empleado(
+        empresa_id=empresa.id,
+        sucursal_id=sucursal.id,
+        dni="30111222",
+        apellido="González",
+        nombre="Ana",
+        activo=True
+    )
+    sesion.add(empleado)
+    sesion.commit()
+
+    return empleado
+
+
+@pytest.fixture
+def fichar(sesion):
+
+    """
+    fichar(empleado, tipo, fecha_hora) → Asistencia
+    (commiteada, sin pasar por el rollup).
+    """
+
+    def _fichar(empleado, tipo, fecha_hora, actividad=None):
+
+        asistencia = Asistencia(
+            empresa_id=empleado.empresa_id,
+            empleado_id=empleado.id,
+            sucursal_id=empleado.sucursal_id,
+            tipo=tipo,
+            actividad=actividad,
+            fecha_hora=fecha_hora
+        )
+        sesion.add(asistencia)
+        sesion.commit()
+
+        return asistencia
+
+    return _fichar
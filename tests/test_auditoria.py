@@ -0,0 +1,180 @@
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.models import AuditLog, db
+from app.services.archivo_auditoria_service import (
+    EventoArchivado,
+    coincide_texto,
+    normalizar_texto,
+    pagina_archivo
+)
+from app.services.auditoria_service import buscar_auditoria, terminos_busqueda
+from app.services.particiones_auditoria import (
+    crear_particion,
+    es_particionada,
+    limites_particion,
+    nombre_particion,
+    sumar_meses
+)
+from tests.utilidades import TZ
+
+
+def evento(descripcion, accion="CREAR", entidad="EMPLEADO"):
+    return EventoArchivado(
+        id=1, empresa_id=1, usuario_id=None, usuario=None, accion=accion,
+        entidad=entidad, descripcion=descripcion, ip=None,
+        created_at=datetime(2025, 1, 10, tzinfo=timezone.utc)
+    )
+
+
+# =====================================================
+# BÚSQUEDA (TÉRMINOS Y ARCHIVO)
+# =====================================================
+def test_terminos_descartan_operadores():
+
+    assert terminos_busqueda("  González, ana@x.com 30111222 & | !*") == [
+        "González", "ana@x.com", "30111222"
+    ]
+    assert terminos_busqueda(None) == []
+
+
+def test_archivo_busca_sin_acentos_y_por_prefijo():
+
+    descripcion = "Empleado creado: González, Ana - DNI 30111222"
+
+    assert normalizar_texto("González ÁVILA") == "gonzalez avila"
+    assert coincide_texto(evento(descripcion), ["gonz", "3011"])
+    assert coincide_texto(evento(descripcion), ["crear", "emple"])
+    assert not coincide_texto(evento(descripcion), ["perez"])
+
+
+def escribir_mes(directorio, empresa_id, year, month, eventos):
+
+    ruta = os.path.join(directorio, str(empresa_id), f"{year:04d}-{month:02d}.jsonl.gz")
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+
+    with gzip.open(ruta, "wt", encoding="utf-8") as archivo:
+        for id_, dia, descripcion in eventos:
+            archivo.write(json.dumps({
+                "id": id_,
+                "empresa_id": empresa_id,
+                "usuario_id": None,
+                "usuario_email": None,
+                "accion": "CREAR",
+                "entidad": "EMPLEADO",
+                "descripcion": descripcion,
+                "ip": None,
+                "created_at": datetime(year, month, dia, 12, tzinfo=timezone.utc).isoformat()
+            }) + "\n")
+
+
+def test_archivo_pagina_entre_meses_con_el_mismo_cursor(tmp_path):
+
+    directorio = str(tmp_path)
+
+    escribir_mes(directorio, 1, 2025, 1, [(1, 5, "Pérez"), (2, 10, "González"), (3, 20, "Pérez")])
+    escribir_mes(directorio, 1, 2025, 2, [(4, 5, "González"), (5, 10, "Pérez"), (6, 20, "Pérez")])
+
+    filas, mas_viejas, mas_nuevas = pagina_archivo(directorio, 1, TZ, {}, por_pagina=4)
+
+    assert [f.id for f in filas] == [6, 5, 4, 3]
+    assert mas_nuevas is None
+
+    filas, mas_viejas, mas_nuevas = pagina_archivo(directorio, 1, TZ, {}, antes=mas_viejas, por_pagina=4)
+
+    assert [f.id for f in filas] == [2, 1]
+    assert mas_viejas is None
+
+    filas, _, _ = pagina_archivo(directorio, 1, TZ, {}, despues=mas_nuevas, por_pagina=4)
+
+    assert [f.id for f in filas] == [6, 5, 4, 3]
+
+    filas, _, _ = pagina_archivo(directorio, 1, TZ, {}, texto="gonzalez", por_pagina=4)
+
+    assert [f.id for f in filas] == [4, 2]
+
+
+def test_archivo_inexistente_es_pagina_vacia(tmp_path):
+
+    assert pagina_archivo(str(tmp_path), 99, TZ, {}) == ([], None, None)
+
+
+# =====================================================
+# PARTICIONES POR MES
+# =====================================================
+def test_meses_de_particion():
+
+    assert sumar_meses(2025, 11, 3) == (2026, 2)
+    assert sumar_meses(2026, 1, -1) == (2025, 12)
+    assert nombre_particion(2025, 3) == "audit_log_p202503"
+    assert limites_particion(2025, 12) == (
+        datetime(2025, 12, 1, tzinfo=timezone.utc),
+        datetime(2026, 1, 1, tzinfo=timezone.utc)
+    )
+
+
+def test_crear_particion_mueve_las_filas_de_la_default(sesion, empresa):
+
+    momento = datetime(2031, 5, 10, 12, tzinfo=timezone.utc)
+    particion = nombre_particion(2031, 5)
+
+    sesion.add(AuditLog(
+        empresa_id=empresa.id, accion="CREAR", entidad="EMPLEADO", created_at=momento
+    ))
+    sesion.commit()
+
+    try:
+
+        with db.engine.begin() as conn:
+
+            assert es_particionada(conn)
+
+            crear_particion(conn, 2031, 5)
+
+            assert conn.execute(text(f"SELECT count(*) FROM {particion}")).scalar() == 1
+            assert conn.execute(text(
+                "SELECT count(*) FROM audit_log_pdefault WHERE created_at = :m"
+            ), {"m": momento}).scalar() == 0
+
+        assert AuditLog.query.filter_by(empresa_id=empresa.id).count() == 1
+
+    finally:
+
+        sesion.rollback()
+
+        with db.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {particion}"))
+
+
+# =====================================================
+# BÚSQUEDA EN LA BASE (tsvector + unaccent)
+# =====================================================
+def test_buscar_auditoria_sin_acentos_y_por_relevancia(sesion, empresa):
+
+    for descripcion in [
+        "Empleado creado: González, Ana - DNI 30111222",
+        "Empleado editado: González, Ana (González)",
+        "Empleado creado: Pérez, Juan - DNI 30999888"
+    ]:
+        sesion.add(AuditLog(
+            empresa_id=empresa.id, accion="CREAR", entidad="EMPLEADO", descripcion=descripcion
+        ))
+
+    sesion.commit()
+
+    condiciones = [AuditLog.empresa_id == empresa.id]
+
+    filas, hay_mas = buscar_auditoria(condiciones, "gonzalez")
+
+    assert len(filas) == 2
+    assert not hay_mas
+    # más apariciones del término: más relevante
+    assert filas[0].descripcion.startswith("Empleado editado")
+
+    filas, _ = buscar_auditoria(condiciones, "perez 3099")
+
+    assert [f.descripcion for f in filas] == ["Empleado creado: Pérez, Juan - DNI 30999888"]
+
+    assert buscar_auditoria(condiciones, "& |") == ([], False)
@@ -0,0 +1,111 @@
+from datetime import date
+from app.services.bloques_service import (
+    bloque_en_rango,
+    emparejar_bloques,
+    totales_por_empleado
+)
+from app.services.calendario_service import zona
+from tests.utilidades import TZ, fila, local
+
+
+def emparejar(filas):
+    return list(emparejar_bloques(filas, zona(TZ)))
+
+
+# =====================================================
+# EMPAREJADO INGRESO → SALIDA
+# =====================================================
+def test_salida_cierra_el_bloque():
+
+    bloques = emparejar([
+        fila(1, "INGRESO", local(2026, 3, 2, 9)),
+        fila(1, "SALIDA", local(2026, 3, 2, 13, 30), "caja")
+    ])
+
+    assert len(bloques) == 1
+    assert bloques[0]["fecha"] == date(2026, 3, 2)
+    assert bloques[0]["segundos"] == 4.5 * 3600
+    assert bloques[0]["actividad"] == "caja"
+
+
+def test_ingreso_seguido_de_ingreso_descarta_el_primero():
+
+    bloques = emparejar([
+        fila(1, "INGRESO", local(2026, 3, 2, 8)),
+        fila(1, "INGRESO", local(2026, 3, 2, 9)),
+        fila(1, "SALIDA", local(2026, 3, 2, 12))
+    ])
+
+    assert len(bloques) == 1
+    assert bloques[0]["ingreso"] == local(2026, 3, 2, 9)
+    assert bloques[0]["segundos"] == 3 * 3600
+
+
+def test_salida_sin_ingreso_se_ignora():
+
+    bloques = emparejar([
+        fila(1, "SALIDA", local(2026, 3, 2, 8)),
+        fila(1, "INGRESO", local(2026, 3, 2, 9)),
+        fila(1, "SALIDA", local(2026, 3, 2, 10))
+    ])
+
+    assert [b["segundos"] for b in bloques] == [3600]
+
+
+def test_ingreso_final_queda_abierto():
+
+    bloques = emparejar([
+        fila(1, "INGRESO", local(2026, 3, 2, 9))
+    ])
+
+    assert bloques[0]["salida"] is None
+    assert bloques[0]["segundos"] == 0
+
+
+def test_un_grupo_por_empleado():
+
+    bloques = emparejar([
+        fila(1, "INGRESO", local(2026, 3, 2, 9)),
+        fila(2, "SALIDA", local(2026, 3, 2, 10)),
+        fila(2, "INGRESO", local(2026, 3, 2, 11)),
+        fila(2, "SALIDA", local(2026, 3, 2, 12))
+    ])
+
+    # el INGRESO del empleado 1 no se cierra con la SALIDA del 2
+    assert [(b["empleado_id"], b["salida"] is None) for b in bloques] == [
+        (1, True),
+        (2, False)
+    ]
+
+
+# =====================================================
+# RANGO: EL BLOQUE ES DEL DÍA DE SU INGRESO
+# =====================================================
+def test_turno_noche_pertenece_al_dia_del_ingreso():
+
+    bloque, = emparejar([
+        fila(1, "INGRESO", local(2026, 3, 31, 22)),
+        fila(1, "SALIDA", local(2026, 4, 1, 6))
+    ])
+
+    assert bloque["fecha"] == date(2026, 3, 31)
+    assert bloque_en_rango(bloque, date(2026, 3, 1), date(2026, 4, 1))
+    assert not bloque_en_rango(bloque, date(2026, 4, 1), date(2026, 5, 1))
+
+
+def test_totales_por_empleado_del_rango():
+
+    bloques = emparejar([
+        fila(1, "INGRESO", local(2026, 3, 31, 22)),
+        fila(1, "SALIDA", local(2026, 4, 1, 6)),
+        fila(1, "INGRESO", local(2026, 4, 2, 9)),
+        fila(1, "SALIDA", local(2026, 4, 2, 17)),
+        fila(2, "INGRESO", local(2026, 4, 3, 9))
+    ])
+
+    totales = list(totales_por_empleado(bloques, date(2026, 4, 1), date(2026, 5, 1)))
+
+    assert totales == [
+        {"empleado_id": 1, "segundos": 8 * 3600, "dias": 1, "incompleto": False},
+        {"empleado_id": 2, "segundos": 0, "dias": 1, "incompleto": True}
+    ]
@@ -0,0 +1,125 @@
+from datetime import date
+import pytest
+from app.models import CierreMesBloque, CierreMesEmpleado
+from app.services.cierre_service import (
+    cerrar_mes,
+    detalle_desde_cierres,
+    periodo_cerrado_fichaje,
+    registrar_ajuste,
+    resumen_desde_cierres
+)
+from tests.utilidades import local
+
+
+SIN_CUMPLIMIENTO = {"filas": []}
+
+
+def cerrar_marzo(empresa_id):
+    return cerrar_mes(empresa_id, 2025, 3, SIN_CUMPLIMIENTO)
+
+
+# =====================================================
+# SNAPSHOT DEL MES
+# =====================================================
+def test_cierre_congela_bloques_y_totales(sesion, empleado, fichar):
+
+    fichar(empleado, "INGRESO", local(2025, 3, 3, 9))
+    fichar(empleado, "SALIDA", local(2025, 3, 3, 17))
+    # turno noche del último día: es de marzo
+    fichar(empleado, "INGRESO", local(2025, 3, 31, 22))
+    fichar(empleado, "SALIDA", local(2025, 4, 1, 6))
+
+    cierre = cerrar_marzo(empleado.empresa_id)
+
+    total = CierreMesEmpleado.query.filter_by(
+        cierre_id=cierre.id, empleado_id=empleado.id
+    ).one()
+
+    assert cierre.total_segundos == 16 * 3600
+    assert (total.segundos, total.dias, total.incompleto) == (16 * 3600, 2, False)
+    assert CierreMesBloque.query.filter_by(cierre_id=cierre.id).count() == 2
+
+
+def test_no_se_cierra_con_una_jornada_abierta(sesion, empleado, fichar):
+
+    fichar(empleado, "INGRESO", local(2025, 3, 31, 22))
+
+    with pytest.raises(ValueError, match="abierta"):
+        cerrar_marzo(empleado.empresa_id)
+
+
+def test_salida_fuera_del_margen_completa_el_bloque(sesion, empleado, fichar):
+
+    # 18 h: la SALIDA cae después de las 12 h de margen de lectura
+    fichar(empleado, "INGRESO", local(2025, 3, 31, 22))
+    fichar(empleado, "SALIDA", local(2025, 4, 1, 16))
+
+    cierre = cerrar_marzo(empleado.empresa_id)
+
+    bloque = CierreMesBloque.query.filter_by(cierre_id=cierre.id).one()
+
+    assert bloque.segundos == 18 * 3600
+    assert bloque.salida == local(2025, 4, 1, 16)
+
+
+def test_no_se_cierra_dos_veces(sesion, empleado):
+
+    cerrar_marzo(empleado.empresa_id)
+
+    with pytest.raises(ValueError, match="ya está cerrado"):
+        cerrar_marzo(empleado.empresa_id)
+
+
+# =====================================================
+# FICHAJES QUE TOCARÍAN UN MES CERRADO
+# =====================================================
+def test_fichaje_que_empareja_un_ingreso_del_mes_cerrado(sesion, empleado, fichar):
+
+    fichar(empleado, "INGRESO", local(2025, 3, 31, 22))
+    salida = fichar(empleado, "SALIDA", local(2025, 4, 1, 6))
+
+    cerrar_marzo(empleado.empresa_id)
+
+    # borrar o mover la SALIDA de abril reabre el bloque de marzo
+    assert periodo_cerrado_fichaje(
+        empleado.empresa_id, empleado.id, salida.fecha_hora, excluir_id=salida.id
+    ) is not None
+
+    # un INGRESO de abril en medio del bloque lo cortaría
+    assert periodo_cerrado_fichaje(
+        empleado.empresa_id, empleado.id, local(2025, 4, 1, 2)
+    ) is not None
+
+    # después de la SALIDA, abril queda libre
+    assert periodo_cerrado_fichaje(
+        empleado.empresa_id, empleado.id, local(2025, 4, 2, 9)
+    ) is None
+
+
+# =====================================================
+# LECTURA DESDE EL CIERRE
+# =====================================================
+def test_detalle_y_resumen_incluyen_los_ajustes(sesion, empleado, fichar):
+
+    fichar(empleado, "INGRESO", local(2025, 3, 3, 9))
+    fichar(empleado, "SALIDA", local(2025, 3, 3, 17))
+
+    cierre = cerrar_marzo(empleado.empresa_id)
+    registrar_ajuste(cierre, empleado.id, 3600, "Salida no registrada")
+
+    desde, hasta = date(2025, 3, 1), date(2025, 4, 1)
+
+    detalle = detalle_desde_cierres(empleado.empresa_id, empleado.id, desde, hasta)
+    resumen = resumen_desde_cierres(empleado.empresa_id, desde, hasta)
+
+    assert [d["estado"] for d in detalle] == ["OK", "AJUSTE"]
+    assert detalle[-1]["ajuste"] == 3600
+    assert detalle[-1]["fecha"] == date(2025, 3, 31)
+    assert resumen["total_segundos"] == 9 * 3600
+
+
+def test_mes_abierto_no_se_lee_del_cierre(sesion, empleado):
+
+    assert detalle_desde_cierres(
+        empleado.empresa_id, empleado.id, date(2025, 3, 1), date(2025, 4, 1)
+    ) is None
@@ -0,0 +1,59 @@
+from datetime import date, time
+from types import SimpleNamespace
+from app.services.calendario_service import zona
+from app.services.cumplimiento_service import clasificar_dia
+from tests.utilidades import TZ, local
+
+
+def trabaja(*bloques):
+    return SimpleNamespace(
+        tipo="TRABAJA",
+        hora_inicio=None,
+        hora_fin=None,
+        bloques=[SimpleNamespace(hora_inicio=i, hora_fin=f) for i, f in bloques]
+    )
+
+
+def estado(fecha, horario, primer_ingreso=None, ahora=None, tolerancia=0):
+    return clasificar_dia(fecha, horario, primer_ingreso, zona(TZ), tolerancia, ahora)["estado"]
+
+
+def test_hoy_sin_fichar_antes_del_fin_del_turno_queda_pendiente():
+
+    horario = trabaja((time(9), time(17)))
+
+    assert estado(date(2026, 3, 2), horario, ahora=local(2026, 3, 2, 8)) is None
+    assert estado(date(2026, 3, 2), horario, ahora=local(2026, 3, 2, 16)) is None
+    assert estado(date(2026, 3, 2), horario, ahora=local(2026, 3, 2, 17, 1)) == "AUSENTE"
+
+
+def test_turno_noche_de_ayer_sigue_pendiente_hasta_su_fin():
+
+    horario = trabaja((time(22), time(6)))
+
+    assert estado(date(2026, 3, 2), horario, ahora=local(2026, 3, 3, 5)) is None
+    assert estado(date(2026, 3, 2), horario, ahora=local(2026, 3, 3, 7)) == "AUSENTE"
+
+
+def test_dia_futuro_queda_pendiente():
+
+    horario = trabaja((time(9), time(17)))
+
+    assert estado(date(2026, 3, 5), horario, ahora=local(2026, 3, 2, 12)) is None
+
+
+def test_dia_pasado_sin_fichar_es_ausente():
+
+    horario = trabaja((time(9), time(17)))
+
+    assert estado(date(2026, 3, 1), horario, ahora=local(2026, 3, 3, 12)) == "AUSENTE"
+    assert estado(date(2026, 3, 1), horario) == "AUSENTE"
+
+
+def test_tarde_respeta_la_tolerancia():
+
+    horario = trabaja((time(9), time(17)))
+    dia = date(2026, 3, 2)
+
+    assert estado(dia, horario, local(2026, 3, 2, 9, 10), tolerancia=15) == "OK"
+    assert estado(dia, horario, local(2026, 3, 2, 9, 20), tolerancia=15) == "TARDE"
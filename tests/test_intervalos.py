@@ -0,0 +1,78 @@
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+from app.services.calendario_service import zona
+from app.services.intervalos_service import (
+    comparar_intervalos,
+    intervalos_planificados,
+    unir_intervalos
+)
+from tests.utilidades import TZ, local
+
+
+def horario(fecha, *bloques):
+    return SimpleNamespace(
+        tipo="TRABAJA",
+        fecha=fecha,
+        hora_inicio=None,
+        hora_fin=None,
+        bloques=[SimpleNamespace(hora_inicio=i, hora_fin=f) for i, f in bloques]
+    )
+
+
+def test_unir_intervalos_fusiona_solapados_y_contiguos():
+
+    dia = local(2026, 3, 2)
+    h = lambda n: dia + timedelta(hours=n)
+
+    assert unir_intervalos([
+        (h(15), h(16)),
+        (h(9), h(12)),
+        (h(11), h(14)),
+        (h(16), h(17)),
+        (h(18), h(18))
+    ]) == [(h(9), h(14)), (h(15), h(17))]
+
+
+def test_turno_noche_termina_al_dia_siguiente():
+
+    intervalos = intervalos_planificados(
+        horario(date(2026, 3, 2), (time(22), time(6))),
+        zona(TZ)
+    )
+
+    assert intervalos == [(local(2026, 3, 2, 22), local(2026, 3, 3, 6))]
+
+
+def test_barrido_plan_contra_trabajado():
+
+    planificados = [
+        (local(2026, 3, 2, 9), local(2026, 3, 2, 13)),
+        (local(2026, 3, 2, 14), local(2026, 3, 2, 18))
+    ]
+    trabajados = [
+        (local(2026, 3, 2, 9, 30), local(2026, 3, 2, 13)),
+        (local(2026, 3, 2, 14), local(2026, 3, 2, 19))
+    ]
+
+    r = comparar_intervalos(planificados, trabajados)
+
+    assert r["planificado"] == 8 * 3600
+    assert r["trabajado"] == 8.5 * 3600
+    assert r["solapado"] == 7.5 * 3600
+    assert r["extra"] == 3600
+    assert r["faltante"] == 1800
+    assert r["llegada_tarde"] == 1800
+    assert r["salida_tardia"] == 3600
+    assert r["salida_anticipada"] == 0
+
+
+def test_barrido_sin_trabajo_es_todo_faltante():
+
+    r = comparar_intervalos(
+        [(local(2026, 3, 2, 9), local(2026, 3, 2, 17))],
+        []
+    )
+
+    assert r["faltante"] == 8 * 3600
+    assert r["solapado"] == 0
+    assert r["llegada_tarde"] == 0
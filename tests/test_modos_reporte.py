@@ -0,0 +1,53 @@
+from datetime import date
+import pytest
+from app.models import Empleado
+from app.services.reporte_mensual_service import MODOS_REPORTE, calcular_resumen_mensual
+from app.services.rollup_service import reconstruir_rollup
+from tests.utilidades import TZ, local
+
+
+@pytest.fixture
+def fichajes(sesion, empleado, fichar):
+
+    otro = Empleado(
+        empresa_id=empleado.empresa_id,
+        sucursal_id=empleado.sucursal_id,
+        dni="30999888",
+        apellido="Pérez",
+        nombre="Juan",
+        activo=True
+    )
+    sesion.add(otro)
+    sesion.commit()
+
+    # turno noche que cruza el fin de febrero: es de febrero
+    fichar(empleado, "INGRESO", local(2026, 2, 28, 22))
+    fichar(empleado, "SALIDA", local(2026, 3, 1, 6))
+    fichar(empleado, "INGRESO", local(2026, 3, 2, 9))
+    fichar(empleado, "SALIDA", local(2026, 3, 2, 17))
+
+    # turno noche que cruza el fin de marzo: es de marzo
+    fichar(otro, "INGRESO", local(2026, 3, 31, 22))
+    fichar(otro, "SALIDA", local(2026, 4, 1, 6))
+    fichar(otro, "INGRESO", local(2026, 4, 1, 22))
+
+    reconstruir_rollup(empleado.empresa_id, tz_nombre=TZ)
+    sesion.commit()
+
+    return empleado, otro
+
+
+@pytest.mark.parametrize("modo", MODOS_REPORTE)
+def test_todos_los_modos_cuentan_por_dia_de_ingreso(fichajes, modo):
+
+    empleado, otro = fichajes
+
+    resumen = calcular_resumen_mensual(
+        empleado.empresa_id, TZ, date(2026, 3, 1), date(2026, 4, 1), modo=modo
+    )
+
+    assert {f["empleado_id"]: f["segundos"] for f in resumen["filas"]} == {
+        empleado.id: 8 * 3600,
+        otro.id: 8 * 3600
+    }
+    assert resumen["total_segundos"] == 16 * 3600
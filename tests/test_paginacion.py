@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from app.models import Asistencia
+from app.services.paginacion_service import (
+    codificar_cursor,
+    decodificar_cursor,
+    pagina_keyset
+)
+from tests.utilidades import local
+
+
+def test_cursor_ida_y_vuelta():
+
+    fecha = datetime(2026, 3, 2, 12, 30, tzinfo=timezone.utc)
+
+    assert decodificar_cursor(codificar_cursor(fecha, 42)) == (fecha, 42)
+
+
+def test_cursor_invalido_es_none():
+
+    assert decodificar_cursor(None) is None
+    assert decodificar_cursor("") is None
+    assert decodificar_cursor("basura") is None
+    assert decodificar_cursor("2026-03-02T12:00:00_x") is None
+
+
+def test_keyset_recorre_todo_sin_repetir_con_fechas_iguales(sesion, empleado, fichar):
+
+    momentos = [
+        local(2026, 3, 2, 9),
+        local(2026, 3, 2, 10),
+        local(2026, 3, 2, 10),
+        local(2026, 3, 2, 10),
+        local(2026, 3, 2, 11)
+    ]
+
+    for i, momento in enumerate(momentos):
+        fichar(empleado, "INGRESO" if i % 2 == 0 else "SALIDA", momento)
+
+    consulta = Asistencia.query.filter_by(empresa_id=empleado.empresa_id)
+
+    esperado = [
+        a.id for a in consulta.order_by(
+            Asistencia.fecha_hora.desc(), Asistencia.id.desc()
+        )
+    ]
+
+    paginas = []
+    antes = None
+
+    while True:
+
+        filas, mas_viejas, mas_nuevas = pagina_keyset(
+            consulta, Asistencia.fecha_hora, Asistencia.id, antes=antes, por_pagina=2
+        )
+        paginas.append(([f.id for f in filas], mas_nuevas))
+
+        if not mas_viejas:
+            break
+
+        antes = mas_viejas
+
+    assert [i for ids, _ in paginas for i in ids] == esperado
+    assert [len(ids) for ids, _ in paginas] == [2, 2, 1]
+
+    # volver desde la segunda página da la primera
+    filas, _, mas_nuevas = pagina_keyset(
+        consulta, Asistencia.fecha_hora, Asistencia.id, despues=paginas[1][1], por_pagina=2
+    )
+
+    assert [f.id for f in filas] == paginas[0][0]
+    assert mas_nuevas is None
@@ -0,0 +1,118 @@
+from collections import defaultdict
+from datetime import date
+from app.models import Asistencia, AsistenciaDiaria
+from app.services.bloques_service import emparejar_bloques
+from app.services.calendario_service import zona
+from app.services.rollup_service import (
+    actualizar_rollup,
+    rango_afectado,
+    reconstruir_rollup
+)
+from tests.utilidades import TZ, local
+
+
+def filas_rollup(empleado):
+
+    return {
+        d.fecha: (d.segundos, d.bloques, d.bloque_abierto)
+        for d in AsistenciaDiaria.query.filter_by(empleado_id=empleado.id)
+    }
+
+
+# =====================================================
+# EMPAREJADO CON LEAD() EN LA BASE
+# =====================================================
+def test_lead_empareja_igual_que_procesar_bloques(sesion, empleado, fichar):
+
+    for tipo, momento in [
+        ("INGRESO", local(2026, 3, 2, 8)),
+        ("INGRESO", local(2026, 3, 2, 9)),      # reemplaza al anterior
+        ("SALIDA", local(2026, 3, 2, 13)),
+        ("SALIDA", local(2026, 3, 2, 14)),      # sin INGRESO: se ignora
+        ("INGRESO", local(2026, 3, 2, 15)),
+        ("SALIDA", local(2026, 3, 2, 18)),
+        ("INGRESO", local(2026, 3, 3, 22)),     # turno noche
+        ("SALIDA", local(2026, 3, 4, 6)),
+        ("INGRESO", local(2026, 3, 5, 9))       # abierto
+    ]:
+        fichar(empleado, tipo, momento)
+
+    reconstruir_rollup(empleado.empresa_id, tz_nombre=TZ)
+    sesion.commit()
+
+    esperado = defaultdict(lambda: [0, 0, False])
+
+    for b in emparejar_bloques(
+        Asistencia.query.order_by(Asistencia.empleado_id, Asistencia.fecha_hora, Asistencia.id),
+        zona(TZ)
+    ):
+        fila = esperado[b["fecha"]]
+        fila[0] += int(b["segundos"])
+        fila[1] += 1 if b["salida"] else 0
+        fila[2] = fila[2] or b["salida"] is None
+
+    assert filas_rollup(empleado) == {f: tuple(v) for f, v in esperado.items()}
+    assert filas_rollup(empleado)[date(2026, 3, 2)] == (7 * 3600, 2, False)
+    assert filas_rollup(empleado)[date(2026, 3, 3)] == (8 * 3600, 1, False)
+    assert filas_rollup(empleado)[date(2026, 3, 5)] == (0, 0, True)
+
+
+def test_rango_con_el_primer_fichaje_posterior(sesion, empleado, fichar):
+
+    fichar(empleado, "INGRESO", local(2026, 3, 2, 22))
+    fichar(empleado, "SALIDA", local(2026, 3, 3, 6))
+
+    # solo el 2/3: la SALIDA del 3/3 igual cierra el bloque
+    reconstruir_rollup(
+        empleado.empresa_id,
+        desde=date(2026, 3, 2),
+        hasta=date(2026, 3, 2),
+        tz_nombre=TZ
+    )
+    sesion.commit()
+
+    assert filas_rollup(empleado) == {date(2026, 3, 2): (8 * 3600, 1, False)}
+
+
+# =====================================================
+# RECÁLCULO INCREMENTAL
+# =====================================================
+def test_rango_afectado_arranca_en_el_fichaje_anterior(sesion, empleado, fichar):
+
+    fichar(empleado, "INGRESO", local(2026, 3, 2, 22))
+    salida = fichar(empleado, "SALIDA", local(2026, 3, 4, 6))
+
+    assert rango_afectado(
+        empleado.empresa_id, empleado.id, [salida.fecha_hora], TZ
+    ) == (date(2026, 3, 2), date(2026, 3, 4))
+
+
+def test_salida_al_dia_siguiente_recalcula_el_dia_del_ingreso(sesion, empleado, fichar):
+
+    ingreso = fichar(empleado, "INGRESO", local(2026, 3, 2, 22))
+    actualizar_rollup(empleado.empresa_id, empleado.id, [ingreso.fecha_hora])
+    sesion.commit()
+
+    assert filas_rollup(empleado) == {date(2026, 3, 2): (0, 0, True)}
+
+    salida = fichar(empleado, "SALIDA", local(2026, 3, 3, 6))
+    actualizar_rollup(empleado.empresa_id, empleado.id, [salida.fecha_hora])
+    sesion.commit()
+
+    assert filas_rollup(empleado) == {date(2026, 3, 2): (8 * 3600, 1, False)}
+
+
+def test_borrar_la_salida_reabre_el_bloque(sesion, empleado, fichar):
+
+    fichar(empleado, "INGRESO", local(2026, 3, 2, 9))
+    salida = fichar(empleado, "SALIDA", local(2026, 3, 2, 17))
+    reconstruir_rollup(empleado.empresa_id, tz_nombre=TZ)
+    sesion.commit()
+
+    fecha_hora = salida.fecha_hora
+    sesion.delete(salida)
+    sesion.flush()
+    actualizar_rollup(empleado.empresa_id, empleado.id, [fecha_hora])
+    sesion.commit()
+
+    assert filas_rollup(empleado) == {date(2026, 3, 2): (0, 0, True)}
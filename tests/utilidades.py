@@ -0,0 +1,22 @@
+from collections import namedtuple
+from datetime import datetime
+from app.services.calendario_service import zona
+
+
+TZ = "America/Argentina/Buenos_Aires"
+
+# mismas columnas que iterar_fichajes
+Fila = namedtuple("Fila", "empleado_id tipo fecha_hora actividad")
+
+
+def local(year, month, day, hour=0, minute=0):
+
+    """
+    datetime con la zona de las pruebas (UTC-3).
+    """
+
+    return datetime(year, month, day, hour, minute, tzinfo=zona(TZ))
+
+
+def fila(empleado_id, tipo, fecha_hora, actividad=None):
+    return Fila(empleado_id, tipo, fecha_hora, actividad)